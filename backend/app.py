@@ -3,12 +3,12 @@ from flask_cors import CORS
 from flask_restful import Api
 from flask_jwt_extended import JWTManager
 
-from views.payment_route import PublicKeyResource
+from views.payment_route import PublicKeyResource, StripeWebhookResource
 from views.attendee_route import RegisterToEventResource, CheckRegistration, GetRegisteredEventsResource, CancelRegistration
 from views.authentication_route import LoginResource, RegisterResource
-from views.event_route import CreateEventResource, GetEventResource, DeleteEventResource, EditEventResource, GetAnalyticsResource, GetCalendarResource
-from views.admin_route import GetUsersResource, DeleteUserResource
-from views.organizer_route import GetOrganizerEventResource, RequestSponsorshipResource
+from views.event_route import CreateEventResource, GetEventResource, DeleteEventResource, EditEventResource, GetAnalyticsResource, GetCalendarResource, ExportRosterResource, SearchEventsResource, GetEventsInRangeResource, GetEventStatusesResource
+from views.admin_route import GetUsersResource, ExportUsersResource, DeleteUserResource, GetCacheStatsResource, GetOutboundMetricsResource
+from views.organizer_route import GetOrganizerEventResource, GetOrganizerAnalyticsResource, RequestSponsorshipResource
 from views.user_routes import UpdatePasswordResource, GetUserProfile, EditProfileResource, GetAllStakeholdersResource
 from views.stakeholder_route import (
     CheckSponsorshipResource, 
@@ -20,27 +20,34 @@ from views.stakeholder_route import (
     RejectSponsorshipResource
 )
 
-from controllers import Controller
+from controllers import Controller, CalendarController, PaymentController
 from models import db
 
-app = Flask(__name__)
+import os
 
-Controller.initialize()
 
-app.config['SQLALCHEMY_DATABASE_URI'] = Controller.database_uri
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def create_app( config : dict = None ) -> Flask:
+    """
+    Build the Flask app. Settings are read from 'config' first, then from the environment.
+    Nothing talks to Google or Stripe here, the provider clients are built on first use, and
+    no background thread is started, see start_background_jobs.
+    """
+    app = Flask(__name__)
 
-app.config["JWT_SECRET_KEY"] = Controller.JWT_secret_key
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False
+    Controller.initialize(config)
 
+    app.config['SQLALCHEMY_DATABASE_URI'] = Controller.database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-CORS(app, origins="http://localhost:3000")  
-JWTManager(app)
-api = Api(app)
-db.init_app(app)
+    app.config["JWT_SECRET_KEY"] = Controller.JWT_secret_key
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = False
+
+
+    CORS(app, origins="http://localhost:3000")  
+    JWTManager(app)
+    api = Api(app)
+    db.init_app(app)
 
-with app.app_context():
-    
     api.add_resource(LoginResource, '/login')
     api.add_resource(RegisterResource, '/register')
     
@@ -48,6 +55,7 @@ with app.app_context():
     api.add_resource(GetUserProfile, '/user/get_profile')
     api.add_resource(EditProfileResource, '/user/edit_profile')
     api.add_resource(PublicKeyResource, '/payment/get_key')
+    api.add_resource(StripeWebhookResource, '/payment/webhook')
 
     api.add_resource(GetRegisteredEventsResource, '/attendee/get_events')
 
@@ -58,14 +66,22 @@ with app.app_context():
     api.add_resource(CancelRegistration, '/event/deregister')
     api.add_resource(DeleteEventResource, '/event/delete_event')
     api.add_resource(CheckRegistration, '/event/check_registration')
+    api.add_resource(GetEventStatusesResource, '/event/statuses')
 
+    api.add_resource(SearchEventsResource, '/event/search')
+    api.add_resource(GetEventsInRangeResource, '/event/range')
     api.add_resource(GetAnalyticsResource, '/event/analytics')
+    api.add_resource(ExportRosterResource, '/event/roster')
     api.add_resource(GetCalendarResource, '/event/calendar')
 
     api.add_resource(GetUsersResource, '/admin/get_users')
+    api.add_resource(ExportUsersResource, '/admin/export_users')
     api.add_resource(DeleteUserResource, '/admin/delete_user')
+    api.add_resource(GetCacheStatsResource, '/admin/cache_stats')
+    api.add_resource(GetOutboundMetricsResource, '/admin/outbound_metrics')
 
     api.add_resource(GetOrganizerEventResource, '/organizer/get_event')
+    api.add_resource(GetOrganizerAnalyticsResource, '/organizer/analytics')
     api.add_resource(RequestSponsorshipResource, '/organizer/request_sponsorship')
     
     # Stakeholder routes
@@ -80,5 +96,38 @@ with app.app_context():
     api.add_resource(AcceptSponsorshipResource, '/stakeholder/accept_sponsorship')
     api.add_resource(RejectSponsorshipResource, '/stakeholder/reject_sponsorship')
 
+    return app
+
+
+def start_background_jobs( app : Flask ) -> None:
+    """
+    Start the threads that write to the database behind the requests' back. Kept out of
+    create_app so that scripts, tests and a preforking server master never run them: call it
+    once per serving process, after any fork (see calendar_worker.py).
+    """
+    # Google Calendar calls queued in the outbox run on these background threads
+    CalendarController.start_workers(app, int(Controller.get_setting('CALENDAR_WORKERS', 1)))
+
+    # Cancels checkouts that were abandoned for longer than PAYMENT_INTENT_TTL_MINUTES
+    sweep_interval : float = float(Controller.get_setting('PAYMENT_SWEEP_INTERVAL', 300))
+    if sweep_interval > 0:
+        PaymentController.start_sweeper(app, sweep_interval)
+
+
+def __getattr__( name : str ):
+    # Keeps 'from app import app' and 'gunicorn app:app' working: the app is only built
+    # when something asks for it, so importing this module has no side effects
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == "__main__":
-    app.run(debug=True, port=5003)
\ No newline at end of file
+    app = create_app()
+
+    # The reloader parent only watches files, the jobs belong to the child that serves
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_jobs(app)
+
+    app.run(debug=True, port=5003)
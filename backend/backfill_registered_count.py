@@ -0,0 +1,16 @@
+from app import create_app
+from models import db, Event
+
+app = create_app()
+
+with app.app_context():
+
+    # db.create_all() does not alter existing tables, so add the column by hand on older databases
+    columns = [column['name'] for column in db.inspect(db.engine).get_columns('events')]
+    if 'registered_count' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(db.text('ALTER TABLE events ADD COLUMN registered_count INTEGER NOT NULL DEFAULT 0'))
+
+    Event.backfill_registered_counts()
+
+    print("Registration counts backfilled successfully!")
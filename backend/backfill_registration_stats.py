@@ -0,0 +1,21 @@
+import argparse
+
+from app import create_app
+from models import db, RegistrationDailyStats
+
+# Rebuilds registration_daily_stats from the registrations table, e.g. after upgrading an
+# existing database. Cancellations made before the upgrade were never recorded.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--event-id', type=int, default=None, help='Only rebuild this event')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        # Creates the table on databases that predate it
+        db.create_all()
+
+        written : int = RegistrationDailyStats.backfill(args.event_id)
+
+        print(f"Registration stats backfilled successfully! ({written} daily buckets)")
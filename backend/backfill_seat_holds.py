@@ -0,0 +1,20 @@
+from app import create_app
+from models import db, PaymentIntent
+
+# Adds seat holds to databases created before checkouts held a seat: every open payment intent holds one.
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        # db.create_all() does not alter existing tables, so add the columns by hand on older databases
+        event_columns           = [column['name'] for column in db.inspect(db.engine).get_columns('events')]
+        payment_intent_columns  = [column['name'] for column in db.inspect(db.engine).get_columns('payment_intents')]
+        with db.engine.begin() as connection:
+            if 'held_count' not in event_columns:
+                connection.execute(db.text('ALTER TABLE events ADD COLUMN held_count INTEGER NOT NULL DEFAULT 0'))
+            if 'seat_held' not in payment_intent_columns:
+                connection.execute(db.text('ALTER TABLE payment_intents ADD COLUMN seat_held BOOLEAN NOT NULL DEFAULT FALSE'))
+
+        held : int = PaymentIntent.backfill_seat_holds()
+
+        print(f"Seat holds backfilled successfully! ({held} checkouts holding a seat)")
@@ -0,0 +1,20 @@
+from app import create_app
+from models import db, User
+
+# Adds the signup date and the admin directory indexes to databases created before them.
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        # db.create_all() does not alter existing tables, so add the column by hand on older databases
+        columns = [column['name'] for column in db.inspect(db.engine).get_columns('users')]
+        if 'created_at' not in columns:
+            with db.engine.begin() as connection:
+                connection.execute(db.text('ALTER TABLE users ADD COLUMN created_at TIMESTAMP'))
+
+        for index in User.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+        updated : int = User.backfill_created_at()
+
+        print(f"User signup dates backfilled successfully! ({updated} users updated)")
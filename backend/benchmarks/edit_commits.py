@@ -0,0 +1,133 @@
+"""
+Commits, UPDATE statements and latency per event edit: one commit per setter (how the
+setters used to behave) against EventController.edit_event's single unit of work, for an
+edit of every field and for a title change, sent as a full body or as a PATCH.
+
+    python -m benchmarks.edit_commits --edits 200
+
+Runs against a throwaway SQLite file, so every commit pays for a real fsync.
+"""
+from datetime import datetime, timedelta
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from sqlalchemy import event as sqlalchemy_event
+
+from app            import create_app
+from models         import db, Event
+from controllers    import EventController, OrganizerController
+
+
+def count_statements( engine, counters : dict[str, int] ) -> None:
+    def before_cursor_execute(connection, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('UPDATE'):
+            counters['updates'] += 1
+
+    def commit(connection):
+        counters['commits'] += 1
+
+    sqlalchemy_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    sqlalchemy_event.listen(engine, 'commit', commit)
+
+
+def edit_per_setter( event_id : int, fields : dict ) -> None:
+    event : Event = Event.find(event_id=event_id)
+    setters : dict = {
+        'title'             : event.set_title,
+        'start'             : event.set_start,
+        'end'               : event.set_end,
+        'category'          : event.set_category,
+        'description'       : event.set_description,
+        'location'          : event.set_location,
+        'capacity'          : event.set_capacity,
+        'event_type'        : event.set_event_type,
+        'registration_fee'  : event.set_fee
+    }
+    for name, value in fields.items():
+        if value is not None:
+            setters[name](value if name not in ('start', 'end') else datetime.strptime(value, "%Y-%m-%dT%H:%M"))
+            db.session.commit()
+
+
+def edit_unit_of_work( event_id : int, fields : dict ) -> None:
+    EventController.edit_event(event_id, **fields)
+
+
+def measure( name : str, edit, event_id : int, make_fields, edits : int, counters : dict[str, int] ) -> dict:
+    counters['commits'] = counters['updates'] = 0
+
+    start : float = time.perf_counter()
+    for i in range(edits):
+        edit(event_id, make_fields(i))
+        db.session.expire_all()
+    elapsed : float = time.perf_counter() - start
+
+    return {
+        'strategy'          : name,
+        'edits'             : edits,
+        'commits_per_edit'  : round(counters['commits'] / edits, 2),
+        'updates_per_edit'  : round(counters['updates'] / edits, 2),
+        'ms_per_edit'       : round(elapsed * 1000 / edits, 3)
+    }
+
+
+def full_edit( i : int ) -> dict:
+    day : datetime = datetime(2030, 1, 1) + timedelta(days=i)
+    return {
+        'title'             : f'Event {i}',
+        'start'             : day.strftime("%Y-%m-%dT%H:%M"),
+        'end'               : (day + timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M"),
+        'category'          : ('Technology', 'Finance')[i % 2],
+        'description'       : f'Description {i}',
+        'location'          : ('Montreal', 'Toronto')[i % 2],
+        'capacity'          : 100 + i,
+        'event_type'        : ('Online', 'In-Person')[i % 2],
+        'registration_fee'  : float(i % 50)
+    }
+
+
+def title_edit( i : int ) -> dict:
+    # The body the edit form sends: every field, only the title differs
+    return {**full_edit(0), 'title' : f'Event {i}'}
+
+
+def title_patch( i : int ) -> dict:
+    return {'title' : f'Event {i}'}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--edits', type=int, default=200)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'DATABASE_URI'              : f'sqlite:///{os.path.join(directory, "edit_commits.sqlite3")}',
+        'GOOGLE_CALENDAR_FAKE'      : '1',
+        'BCRYPT_ROUNDS'             : 4,
+        'PASSWORD_HASH_WORKERS'     : 0
+    })
+
+    with app.app_context():
+        db.create_all()
+
+        organizer_id    : int = OrganizerController.create_organizer('organizer@example.com', 'password', 'Olivia', 'Organizer', 'Org', '(514) 555-0000')
+        event_id        : int = EventController.create_event(organizer_id, 'Event', '2030-01-01T10:00', '2030-01-01T12:00', 'Technology', 'Description', 'Montreal', 100, 'Online', 0.0)
+
+        counters : dict[str, int] = {'commits' : 0, 'updates' : 0}
+        count_statements(db.engine, counters)
+
+        runs : list[tuple] = [
+            ('full',        'commit_per_setter',    edit_per_setter,    full_edit   ),
+            ('full',        'unit_of_work',         edit_unit_of_work,  full_edit   ),
+            ('title_only',  'commit_per_setter',    edit_per_setter,    title_edit  ),
+            ('title_only',  'unit_of_work',         edit_unit_of_work,  title_edit  ),
+            ('title_only',  'unit_of_work_patch',   edit_unit_of_work,  title_patch )
+        ]
+
+        for label, name, edit, make_fields in runs:
+            print(json.dumps({'edit' : label, **measure(name, edit, event_id, make_fields, args.edits, counters)}))
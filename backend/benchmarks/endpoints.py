@@ -0,0 +1,294 @@
+"""
+Load and latency benchmark for the API. Boots the app against a generated database (see
+create_db.py), with benchmarks.fake_stripe and the fake Calendar service standing in for
+Stripe and Google, and drives a mixed workload from concurrent clients.
+
+    python -m benchmarks.endpoints --scale 0.01 --clients 8 --duration 20
+    python -m benchmarks.endpoints --database-uri sqlite:////tmp/sees.sqlite3 --baseline results/endpoints-abc1234.json
+
+Reports throughput, p50/p95/p99 latency, status codes and SQL queries per request for
+each route, and writes them to a JSON file (by default benchmarks/results/endpoints-<commit>.json)
+so that runs can be compared across commits with --baseline.
+"""
+from __future__ import annotations
+
+from collections    import defaultdict
+from datetime       import datetime
+from threading      import Lock, local
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy         import event as sqlalchemy_event
+
+from app                        import create_app
+from benchmarks.fake_stripe     import FakeStripe
+from models                     import db, Event, User, Attendee, Organizer, Stakeholder, SponsorshipRequest
+
+import create_db
+
+
+# Share of requests per route, roughly what browsing-heavy traffic looks like
+WORKLOAD : dict[str, float] = {
+    'browse_events'         : 35,
+    'event_statuses'        : 20,
+    'register'              : 10,
+    'login'                 : 5,
+    'organizer_analytics'   : 10,
+    'sponsored_events'      : 10,
+    'sponsorship_requests'  : 10
+}
+
+
+class Recorder:
+    """
+    Latencies, status codes and SQL query counts per route. Queries are attributed to the
+    route the current thread is running.
+    """
+
+    def __init__(self):
+        self.__current  : local = local()
+        self.__lock     : Lock  = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.latencies  : dict[str, list[float]]        = defaultdict(list)
+        self.queries    : dict[str, list[int]]          = defaultdict(list)
+        self.statuses   : dict[str, dict[int, int]]     = defaultdict(lambda: defaultdict(int))
+
+    def listen(self, engine) -> None:
+        def before_cursor_execute(*args):
+            self.__current.queries = getattr(self.__current, 'queries', 0) + 1
+        sqlalchemy_event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+    def measure(self, route : str, request) -> None:
+        self.__current.queries = 0
+        start       : float = time.perf_counter()
+        response            = request()
+        elapsed     : float = (time.perf_counter() - start) * 1000
+
+        with self.__lock:
+            self.latencies[route].append(elapsed)
+            self.queries[route].append(self.__current.queries)
+            self.statuses[route][response.status_code] += 1
+
+    def summarize(self, seconds : float) -> dict:
+        def percentile(values : list[float], p : float) -> float:
+            return round(values[min(len(values) - 1, int(p * len(values)))], 2)
+
+        routes : dict[str, dict] = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies = sorted(latencies)
+            routes[route] = {
+                'requests'              : len(latencies),
+                'requests_per_second'   : round(len(latencies) / seconds, 2),
+                'latency_ms_p50'        : percentile(latencies, 0.50),
+                'latency_ms_p95'        : percentile(latencies, 0.95),
+                'latency_ms_p99'        : percentile(latencies, 0.99),
+                'latency_ms_max'        : round(latencies[-1], 2),
+                'queries_per_request'   : round(sum(self.queries[route]) / len(latencies), 2),
+                'statuses'              : { str(status) : count for status, count in sorted(self.statuses[route].items()) }
+            }
+
+        total : int = sum(route['requests'] for route in routes.values())
+        return {
+            'requests'              : total,
+            'requests_per_second'   : round(total / seconds, 2),
+            'routes'                : routes
+        }
+
+
+class Population:
+    """
+    The users and events the clients pick from, with a token per user made the way login does.
+    """
+
+    def __init__(self, sample : int):
+        def pick(query) -> list:
+            return [row[0] for row in query.order_by(db.func.random()).limit(sample).all()]
+
+        self.attendees      : list[int] = pick(db.session.query(Attendee.id))
+        self.organizers     : list[int] = pick(db.session.query(Organizer.id).filter(Organizer._Organizer__event_id.isnot(None)))
+        self.stakeholders   : list[int] = pick(db.session.query(SponsorshipRequest.stakeholder_id).distinct()) or pick(db.session.query(Stakeholder.id))
+        self.events         : list[int] = pick(db.session.query(Event.id))
+        self.upcoming       : list[int] = pick(db.session.query(Event.id).filter(Event._Event__start >= datetime.now())) or self.events
+        self.categories     : list[str] = [row[0] for row in db.session.query(Event._Event__category).distinct().all()]
+        self.emails         : list[str] = [row[0] for row in db.session.query(User._User__email).filter(User.id.in_(self.attendees[:50])).all()]
+
+        self.organizer_events : dict[int, int] = dict(
+            db.session.query(Organizer.id, Organizer._Organizer__event_id).filter(Organizer.id.in_(self.organizers)).all()
+        )
+
+        self.tokens : dict[int, str] = {}
+        for user_ids, user_type in ((self.attendees, 'attendee'), (self.organizers, 'organizer'), (self.stakeholders, 'stakeholder')):
+            for user_id in user_ids:
+                self.tokens[user_id] = create_access_token(identity=f'{user_id}', additional_claims={'user_type' : user_type})
+
+    def headers(self, user_id : int) -> dict:
+        return {'Authorization' : f'Bearer {self.tokens[user_id]}'}
+
+
+def make_requests( client, population : Population, rng : random.Random ) -> dict:
+    """
+    One callable per route, each sending a single request.
+    """
+    def browse_events():
+        query : str = f'limit=20&category={rng.choice(population.categories)}' if rng.random() < 0.3 else 'limit=20'
+        return client.get(f'/event/get?{query}')
+
+    def event_statuses():
+        # The statuses of a page of events, which pages now ask for in one call
+        attendee    : int       = rng.choice(population.attendees)
+        event_ids   : list[int] = rng.sample(population.events, min(20, len(population.events)))
+        return client.get(f'/event/statuses?event_ids={",".join(map(str, event_ids))}', headers=population.headers(attendee))
+
+    def register():
+        attendee : int = rng.choice(population.attendees)
+        return client.post('/event/register', json={'event_id' : rng.choice(population.upcoming)}, headers=population.headers(attendee))
+
+    def login():
+        return client.post('/login', json={'email' : rng.choice(population.emails), 'password' : create_db.PASSWORD})
+
+    def organizer_analytics():
+        organizer : int = rng.choice(population.organizers)
+        return client.get(f'/event/analytics?event_id={population.organizer_events[organizer]}', headers=population.headers(organizer))
+
+    def sponsored_events():
+        stakeholder : int = rng.choice(population.stakeholders)
+        return client.get('/stakeholder/sponsored_events', headers=population.headers(stakeholder))
+
+    def sponsorship_requests():
+        stakeholder : int = rng.choice(population.stakeholders)
+        return client.get('/stakeholder/sponsorship_requests', headers=population.headers(stakeholder))
+
+    return {
+        'browse_events'         : browse_events,
+        'event_statuses'        : event_statuses,
+        'register'              : register,
+        'login'                 : login,
+        'organizer_analytics'   : organizer_analytics,
+        'sponsored_events'      : sponsored_events,
+        'sponsorship_requests'  : sponsorship_requests
+    }
+
+
+def run_client( app, population : Population, recorder : Recorder, seed : int, deadline : float, routes : list[str], weights : list[float] ) -> None:
+    rng         : random.Random = random.Random(seed)
+    client                      = app.test_client()
+    requests    : dict          = make_requests(client, population, rng)
+
+    while time.perf_counter() < deadline:
+        route : str = rng.choices(routes, weights)[0]
+        recorder.measure(route, requests[route])
+
+
+def get_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare( results : dict, baseline : dict ) -> None:
+    print(f"\n{'route':<24}{'p50 ms':>18}{'p95 ms':>18}{'queries':>16}")
+    for route, current in results['routes'].items():
+        previous : dict = baseline['routes'].get(route)
+        if not previous:
+            continue
+        cells : list[str] = [
+            f"{previous[key]:>7} -> {current[key]:<7}" for key in ('latency_ms_p50', 'latency_ms_p95', 'queries_per_request')
+        ]
+        print(f'{route:<24}' + ''.join(f'{cell:>18}' for cell in cells))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri',   default=None,               help='Reuse a database; it is generated first if it has no users. Defaults to a throwaway SQLite file')
+    parser.add_argument('--scale',          type=float, default=0.01,   help='create_db.py scale for generated databases')
+    parser.add_argument('--seed',           type=int,   default=343)
+    parser.add_argument('--clients',        type=int,   default=8)
+    parser.add_argument('--duration',       type=float, default=20,     help='Seconds of measured load')
+    parser.add_argument('--warmup',         type=float, default=2,      help='Seconds of unmeasured load first')
+    parser.add_argument('--stripe-latency', type=float, default=0.05,   help='Seconds the fake Stripe waits per request')
+    parser.add_argument('--bcrypt-rounds',  type=int,   default=12)
+    parser.add_argument('--routes',         nargs='+',  default=list(WORKLOAD), choices=list(WORKLOAD))
+    parser.add_argument('--output',         default=None)
+    parser.add_argument('--baseline',       default=None,               help='An earlier output file to compare with')
+    args = parser.parse_args()
+
+    database_uri : str = args.database_uri or f'sqlite:///{os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")}'
+
+    with FakeStripe(latency=args.stripe_latency) as fake_stripe:
+        app = create_app({
+            'DATABASE_URI'              : database_uri,
+            'JWT_SECRET_KEY'            : os.getenv('JWT_SECRET_KEY') or 'benchmark-secret-key-that-is-long-enough',
+            'STRIPE_API_BASE'           : fake_stripe.url,
+            'STRIPE_SECRET_KEY'         : 'sk_test_fake',
+            'GOOGLE_CALENDAR_FAKE'      : '1',
+            'BCRYPT_ROUNDS'             : args.bcrypt_rounds
+        })
+
+        with app.app_context():
+            db.create_all()
+            if not db.session.query(User.id).first():
+                print(f'Generating a database at scale {args.scale}')
+                create_db.generate(args.scale, args.seed)
+
+            population  : Population    = Population(500)
+            recorder    : Recorder      = Recorder()
+            recorder.listen(db.engine)
+
+        routes  : list[str]     = args.routes
+        weights : list[float]   = [WORKLOAD[route] for route in routes]
+
+        for phase, seconds in (('warmup', args.warmup), ('measure', args.duration)):
+            recorder.reset()
+
+            deadline : float = time.perf_counter() + seconds
+            clients  : list[threading.Thread] = [
+                threading.Thread(target=run_client, args=(app, population, recorder, args.seed * 1000 + index, deadline, routes, weights))
+                for index in range(args.clients)
+            ]
+            start : float = time.perf_counter()
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            elapsed : float = time.perf_counter() - start
+
+        results : dict = {
+            'commit'        : get_commit(),
+            'created_at'    : datetime.now().isoformat(timespec='seconds'),
+            'python'        : platform.python_version(),
+            'database'      : database_uri.split(':')[0],
+            'scale'         : args.scale,
+            'seed'          : args.seed,
+            'clients'       : args.clients,
+            'duration'      : round(elapsed, 2),
+            'stripe_latency': args.stripe_latency,
+            'stripe_calls'  : fake_stripe.requests,
+            **recorder.summarize(elapsed)
+        }
+
+    output : str = args.output or os.path.join(os.path.dirname(__file__), 'results', f'endpoints-{results["commit"]}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    print(f"{'route':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}  statuses")
+    for route, summary in results['routes'].items():
+        print(f"{route:<24}{summary['requests_per_second']:>10}{summary['latency_ms_p50']:>10}{summary['latency_ms_p95']:>10}{summary['latency_ms_p99']:>10}{summary['queries_per_request']:>10}  {summary['statuses']}")
+    print(f"{'total':<24}{results['requests_per_second']:>10}")
+    print(f'\nWritten to {output}')
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
@@ -0,0 +1,107 @@
+"""
+Latency of /event/search over a large catalog: the FTS index (first page and the page after
+it, with highlights) against a LIKE scan of the same columns, which is what a search without
+the index would run. Also reports how long the index takes to build.
+
+    python -m benchmarks.event_search --events 100000
+
+Events come from create_db's generator, without registrations, in a throwaway SQLite file.
+Point DATABASE_URI at an empty PostgreSQL database to measure the tsvector index instead.
+"""
+from datetime import datetime
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app            import create_app
+from models         import db, User, Organizer, Event, EventSearch
+from controllers    import EventController
+from create_db      import plan_users, plan_events, load
+
+QUERIES : list[str] = ['health', 'healt', 'machine learning', 'montreal', 'fin', 'strategy day', 'labs', 'cloud native toronto', 'quokka']
+
+
+def fill( events : int, batch_size : int = 10_000 ) -> None:
+    rng     : random.Random     = random.Random(343)
+    volumes : dict[str, int]    = { 'stakeholders' : 0, 'attendees' : 0, 'events' : events, 'registrations' : 0 }
+
+    users   : dict[str, list[dict]] = plan_users(rng, volumes, 'x', datetime(2030, 1, 1))
+    rows    : list[dict]            = plan_events(rng, volumes, [row['id'] for row in users['organizers']], 0, datetime(2030, 1, 1))
+
+    load(User.__table__,        users['users'],         batch_size)
+    load(Organizer.__table__,   users['organizers'],    batch_size)
+    load(Event.__table__,       rows,                   batch_size)
+
+
+def like_scan( query : str, limit : int ) -> list[int]:
+    events      = Event.__table__
+    organizers  = Organizer.__table__
+    columns     = [events.c.title, events.c.description, events.c.category, events.c.location, organizers.c[Organizer._Organizer__organization_name.key]]
+
+    select = db.select(events.c.id).join(organizers, organizers.c.id == events.c.organizer_id)
+    for term in EventSearch.terms(query):
+        select = select.where(db.or_(*[column.ilike(f'%{term}%') for column in columns]))
+
+    return db.session.execute(select.order_by(events.c.start, events.c.id).limit(limit)).scalars().all()
+
+
+def measure( name : str, run, repeat : int ) -> dict:
+    timings : list[float] = []
+    for _ in range(repeat):
+        start : float = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.expunge_all()
+
+    timings.sort()
+    return {
+        'strategy'  : name,
+        'p50_ms'    : round(statistics.median(timings), 2),
+        'p95_ms'    : round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=100_000)
+    parser.add_argument('--limit',  type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'DATABASE_URI'              : os.getenv('DATABASE_URI') or f'sqlite:///{os.path.join(directory, "event_search.sqlite3")}',
+        'GOOGLE_CALENDAR_FAKE'      : '1'
+    })
+
+    # Straight to the search, the response cache would answer every repeat after the first
+    load_search = EventController._EventController__load_search
+
+    with app.app_context():
+        db.create_all()
+        fill(args.events)
+
+        start : float = time.perf_counter()
+        indexed : int = EventSearch.rebuild()
+        print(json.dumps({'dialect' : db.engine.dialect.name, 'events' : indexed, 'index_build_s' : round(time.perf_counter() - start, 2)}))
+
+        for query in QUERIES:
+            first_page  : dict = load_search(query, args.limit, None)
+            matches     : int  = len(EventSearch.search(query, args.events))
+            last        : dict = first_page['events'][-1] if first_page['events'] else None
+            after       : tuple[float, int] = (last['score'], last['id']) if last else None
+
+            results : list[dict] = [
+                measure('like_scan',        lambda: like_scan(query, args.limit),               args.repeat),
+                measure('fts_first_page',   lambda: load_search(query, args.limit, None),       args.repeat)
+            ]
+            if after:
+                results.append(measure('fts_next_page', lambda: load_search(query, args.limit, after), args.repeat))
+
+            for result in results:
+                print(json.dumps({'query' : query, 'matches' : matches, **result}))
@@ -0,0 +1,134 @@
+"""
+A local stand-in for the parts of the Stripe API the app calls: customers, payment intents
+(create, retrieve, cancel) and refunds. Point the app at it with STRIPE_API_BASE.
+
+    with FakeStripe(latency=0.05) as fake_stripe:
+        app = create_app({'STRIPE_API_BASE' : fake_stripe.url, 'STRIPE_SECRET_KEY' : 'sk_test_fake'})
+"""
+from __future__ import annotations
+
+from http.server    import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading      import Lock, Thread
+from urllib.parse   import parse_qsl
+
+import json
+import time
+
+
+class FakeStripe:
+
+    def __init__(self, latency : float = 0):
+        """
+        :param latency: Seconds every request waits before answering, to stand in for the network
+        """
+        self.latency            : float             = latency
+        self.customers          : dict[str, dict]   = {}
+        self.payment_intents    : dict[str, dict]   = {}
+        self.refunds            : dict[str, dict]   = {}
+        self.requests           : int               = 0
+        self.__idempotent       : dict[str, dict]   = {}
+        self.__lock             : Lock              = Lock()
+        self.__server           : ThreadingHTTPServer = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.__server.server_port}'
+
+    def start(self) -> FakeStripe:
+        fake_stripe : FakeStripe = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                self.__answer(*fake_stripe.handle('GET', self.path, {}, None))
+
+            def do_POST(self):
+                length  : int   = int(self.headers.get('Content-Length') or 0)
+                form    : dict  = dict(parse_qsl(self.rfile.read(length).decode('utf-8')))
+                self.__answer(*fake_stripe.handle('POST', self.path, form, self.headers.get('Idempotency-Key')))
+
+            def __answer(self, status : int, body : dict):
+                payload : bytes = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.__server.daemon_threads = True
+        Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def __enter__(self) -> FakeStripe:
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def handle(self, method : str, path : str, form : dict, idempotency_key : str) -> tuple[int, dict]:
+        time.sleep(self.latency)
+
+        with self.__lock:
+            self.requests += 1
+
+            if idempotency_key and idempotency_key in self.__idempotent:
+                return 200, self.__idempotent[idempotency_key]
+
+            parts : list[str] = path.split('?')[0].strip('/').split('/')
+
+            if method == 'POST' and parts == ['v1', 'customers']:
+                customer : dict = {'id' : f'cus_fake_{len(self.customers) + 1}', 'object' : 'customer', 'email' : form.get('email'), 'name' : form.get('name')}
+                self.customers[customer['id']] = customer
+                response : tuple[int, dict] = 200, customer
+
+            elif method == 'POST' and parts == ['v1', 'payment_intents']:
+                payment_intent_id : str = f'pi_fake_{len(self.payment_intents) + 1}'
+                payment_intent : dict = {
+                    'id'            : payment_intent_id,
+                    'object'        : 'payment_intent',
+                    'amount'        : int(form['amount']),
+                    'currency'      : form.get('currency'),
+                    'customer'      : form.get('customer'),
+                    'client_secret' : f'{payment_intent_id}_secret_fake',
+                    'status'        : 'requires_payment_method',
+                    'metadata'      : { key[len('metadata['):-1] : value for key, value in form.items() if key.startswith('metadata[') }
+                }
+                self.payment_intents[payment_intent_id] = payment_intent
+                response = 200, payment_intent
+
+            elif method == 'POST' and parts == ['v1', 'refunds'] and form.get('payment_intent') in self.payment_intents:
+                if any(refund['payment_intent'] == form['payment_intent'] for refund in self.refunds.values()):
+                    response = 400, {'error' : {'type' : 'invalid_request_error', 'code' : 'charge_already_refunded', 'message' : 'Charge has already been refunded.'}}
+                else:
+                    refund : dict = {
+                        'id'                : f'pyr_fake_{len(self.refunds) + 1}',
+                        'object'            : 'refund',
+                        'amount'            : self.payment_intents[form['payment_intent']]['amount'],
+                        'payment_intent'    : form['payment_intent'],
+                        'status'            : 'succeeded'
+                    }
+                    self.refunds[refund['id']] = refund
+                    response = 200, refund
+
+            elif len(parts) >= 3 and parts[:2] == ['v1', 'payment_intents'] and parts[2] in self.payment_intents:
+                payment_intent = self.payment_intents[parts[2]]
+                if method == 'POST' and parts[3:] == ['cancel']:
+                    payment_intent['status'] = 'canceled'
+                response = 200, payment_intent
+
+            else:
+                response = 404, {'error' : {'type' : 'invalid_request_error', 'message' : f'No such route: {method} {path}'}}
+
+            if idempotency_key and response[0] == 200:
+                self.__idempotent[idempotency_key] = response[1]
+
+            return response
@@ -0,0 +1,82 @@
+"""
+Cold start budget: fails (exit code 1) when importing the app gets slower than the budget,
+or when importing it pulls in a provider library that should only load on first use.
+
+    python -m benchmarks.import_time --budget-ms 1200 --runs 5
+
+Run from backend/. The budget can also be set with IMPORT_TIME_BUDGET_MS.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+# Only ever needed by the first Google Calendar call, Stripe call or analytics request, see
+# Controller.get_service, Controller.get_stripe and OrganizerController.get_analytics
+LAZY_MODULES : tuple[str] = ('googleapiclient', 'google.oauth2', 'google_auth_httplib2', 'httplib2', 'stripe', 'numpy')
+
+# About twice the cold start of the app today, so only a real regression goes over it
+BUDGET_MS : float = float(os.getenv('IMPORT_TIME_BUDGET_MS', 1200))
+
+
+def measure( module : str ) -> tuple[float, set[str]]:
+    """
+    Import 'module' in a fresh interpreter, returns its cumulative import time in ms and
+    the names of every module imported along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True
+    )
+
+    cumulative  : float     = None
+    imported    : set[str]  = set()
+
+    # Lines look like 'import time:  self [us] | cumulative | <indented module name>'
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.add(name)
+
+        if name == module:
+            cumulative = int(cumulative_us) / 1000
+
+    return cumulative, imported
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--module',     default='app')
+    parser.add_argument('--budget-ms',  type=float, default=BUDGET_MS)
+    parser.add_argument('--runs',       type=int,   default=5)
+    args = parser.parse_args()
+
+    timings     : list[float]   = []
+    imported    : set[str]      = set()
+    for _ in range(args.runs):
+        cumulative, modules = measure(args.module)
+        timings.append(cumulative)
+        imported |= modules
+
+    # The best run is the least disturbed by the rest of the machine
+    best        : float     = min(timings)
+    eager       : list[str] = sorted(name for name in imported if name.startswith(LAZY_MODULES))
+
+    print(json.dumps({
+        'module'        : args.module,
+        'budget_ms'     : args.budget_ms,
+        'best_ms'       : round(best, 1),
+        'timings_ms'    : [round(timing, 1) for timing in timings],
+        'eager_imports' : eager
+    }, indent=2))
+
+    if best > args.budget_ms:
+        sys.exit(f'importing {args.module} took {best:.1f}ms, over the {args.budget_ms:.0f}ms budget')
+
+    if eager:
+        sys.exit(f'importing {args.module} loaded {", ".join(eager)}, which should load on first use')
@@ -0,0 +1,49 @@
+"""
+Login throughput per bcrypt cost, to pick BCRYPT_ROUNDS and PASSWORD_HASH_WORKERS for a deployment.
+
+    python -m benchmarks.login_throughput --rounds 10 11 12 13 --workers 4 --clients 16 --logins 64
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import json
+import time
+
+from models import PasswordHasher
+
+
+def measure( rounds : int, workers : int, clients : int, logins : int ) -> dict:
+    PasswordHasher.configure(rounds=rounds, workers=workers)
+
+    password        : str = 'password123'
+    hashed_password : str = PasswordHasher.hash(password)
+
+    # Simulates 'clients' request threads verifying passwords at the same time
+    start : float = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as request_threads:
+        results = list(request_threads.map(lambda _: PasswordHasher.verify(password, hashed_password), range(logins)))
+    elapsed : float = time.perf_counter() - start
+
+    PasswordHasher.shutdown()
+
+    assert all(results)
+    return {
+        'rounds'            : rounds,
+        'workers'           : workers,
+        'clients'           : clients,
+        'logins'            : logins,
+        'seconds'           : round(elapsed, 3),
+        'logins_per_second' : round(logins / elapsed, 2)
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds',     type=int, nargs='+',    default=[10, 11, 12, 13])
+    parser.add_argument('--workers',    type=int,               default=4)
+    parser.add_argument('--clients',    type=int,               default=16)
+    parser.add_argument('--logins',     type=int,               default=64)
+    args = parser.parse_args()
+
+    for rounds in args.rounds:
+        print(json.dumps(measure(rounds, args.workers, args.clients, args.logins)))
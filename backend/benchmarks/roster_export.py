@@ -0,0 +1,101 @@
+"""
+Peak Python memory and time to export an event's attendee list: Event.get_attendees(), which
+loads every Registration and Attendee object, against the streamed CSV and NDJSON export
+of EventController.export_roster, for growing events.
+
+    python -m benchmarks.roster_export --sizes 1000 10000 100000
+
+Runs against a throwaway SQLite file. Memory is measured with tracemalloc, so it counts
+what Python allocates, not the database's own cache.
+"""
+from datetime import datetime, timedelta
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from app            import create_app
+from models         import db, Event, User, Attendee, Registration
+from controllers    import EventController, OrganizerController
+
+
+def add_attendees( event_id : int, first_id : int, count : int ) -> None:
+    users   = User.__table__
+    start   : datetime = datetime(2030, 1, 1)
+
+    db.session.execute(users.insert(), [
+        {'id' : first_id + i, 'email' : f'attendee{first_id + i}@example.com', 'password' : 'x', 'first_name' : 'Attendee', 'last_name' : str(first_id + i), 'user_type' : 'attendee'}
+        for i in range(count)
+    ])
+    db.session.execute(Attendee.__table__.insert(), [{'id' : first_id + i} for i in range(count)])
+    db.session.execute(Registration.__table__.insert(), [
+        {'attendee_id' : first_id + i, 'event_id' : event_id, 'registration_time' : start + timedelta(seconds=i)}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def measure( name : str, export, size : int ) -> dict:
+    db.session.expunge_all()
+    tracemalloc.start()
+
+    start   : float = time.perf_counter()
+    written : int   = export()
+    elapsed : float = time.perf_counter() - start
+
+    peak : int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'strategy'      : name,
+        'registrations' : size,
+        'bytes'         : written,
+        'peak_mb'       : round(peak / 2**20, 2),
+        'seconds'       : round(elapsed, 3)
+    }
+
+
+def load_attendees( event_id : int ) -> int:
+    attendees : list = Event.find(event_id).get_attendees()
+    return sum(len(f'{attendee.id},{attendee.get_first_name()},{attendee.get_last_name()},{attendee.get_email()}\n') for attendee in attendees)
+
+
+def stream( user_id : int, event_id : int, format : str ) -> int:
+    return sum(len(chunk) for chunk in EventController.export_roster(user_id, event_id, format))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'DATABASE_URI'              : f'sqlite:///{os.path.join(directory, "roster_export.sqlite3")}',
+        'GOOGLE_CALENDAR_FAKE'      : '1',
+        'BCRYPT_ROUNDS'             : 4,
+        'PASSWORD_HASH_WORKERS'     : 0
+    })
+
+    with app.app_context():
+        db.create_all()
+
+        first_id : int = 1
+
+        for size in args.sizes:
+            # Organizers have a single event, so every size gets its own
+            organizer_id : int = OrganizerController.create_organizer(f'organizer{size}@example.com', 'password', 'Olivia', 'Organizer', 'Org', '(514) 555-0000')
+            first_id = max(first_id, organizer_id + 1)
+            event_id : int = EventController.create_event(organizer_id, f'Event {size}', '2030-01-01T10:00', '2030-01-01T12:00', 'Technology', 'Description', 'Montreal', size, 'Online', 0.0)
+            add_attendees(event_id, first_id, size)
+            first_id += size
+
+            for name, export in (
+                ('get_attendees',   lambda: load_attendees(event_id)                ),
+                ('stream_csv',      lambda: stream(organizer_id, event_id, 'csv')   ),
+                ('stream_ndjson',   lambda: stream(organizer_id, event_id, 'ndjson'))
+            ):
+                print(json.dumps(measure(name, export, size)))
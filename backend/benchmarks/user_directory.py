@@ -0,0 +1,86 @@
+"""
+Time and SQL statements of the admin user directory: User.find() with get_data() on every
+user, which is what /admin/get_users used to run, against the same list from one polymorphic
+query, the first page, a page deep into the directory and the streamed CSV export.
+
+    python -m benchmarks.user_directory --users 100000
+
+Users come from create_db's generator in a throwaway SQLite file. Point DATABASE_URI at an
+empty PostgreSQL database to also see the estimated totals.
+"""
+from datetime import datetime
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy     import event as sqlalchemy_event
+from app            import create_app
+from models         import db, User, Admin, Attendee, Organizer, Stakeholder
+from controllers    import UserController
+from create_db      import plan_users, load
+
+
+def fill( users : int, batch_size : int = 10_000 ) -> None:
+    rng     : random.Random     = random.Random(343)
+    volumes : dict[str, int]    = { 'stakeholders' : users // 100, 'events' : users // 10, 'attendees' : users - users // 100 - users // 10, 'registrations' : 0 }
+
+    rows : dict[str, list[dict]] = plan_users(rng, volumes, 'x', datetime(2030, 1, 1))
+    for model, name in ((User, 'users'), (Admin, 'admins'), (Stakeholder, 'stakeholders'), (Organizer, 'organizers'), (Attendee, 'attendees')):
+        load(model.__table__, rows[name], batch_size)
+
+
+def legacy() -> int:
+    return len([user.get_data() for user in User.find()])
+
+
+def export() -> int:
+    return sum(len(chunk) for chunk in UserController.export_users('csv'))
+
+
+def measure( name : str, run ) -> dict:
+    statements : list[int] = [0]
+    count = lambda *args: statements.__setitem__(0, statements[0] + 1)
+
+    db.session.expunge_all()
+    sqlalchemy_event.listen(db.engine, 'before_cursor_execute', count)
+    start   : float = time.perf_counter()
+    result          = run()
+    elapsed : float = time.perf_counter() - start
+    sqlalchemy_event.remove(db.engine, 'before_cursor_execute', count)
+
+    return { 'strategy' : name, 'ms' : round(elapsed * 1000, 2), 'statements' : statements[0], 'result' : result }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000)
+    parser.add_argument('--limit', type=int, default=50)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    app = create_app({
+        'DATABASE_URI'              : os.getenv('DATABASE_URI') or f'sqlite:///{os.path.join(directory, "user_directory.sqlite3")}',
+        'GOOGLE_CALENDAR_FAKE'      : '1'
+    })
+
+    with app.app_context():
+        db.create_all()
+        fill(args.users)
+
+        # A cursor halfway down the attendees sorted by signup date
+        middle : User = User.find_directory({ 'user_type' : 'attendee' }, 'created_at', False, args.users // 2)[-1]
+        cursor : str  = UserController._UserController__encode_cursor('created_at', middle)
+
+        for name, run in (
+            ('legacy_find_all',     legacy                                                                                                                  ),
+            ('polymorphic_all',     lambda: len(UserController.get_users())                                                                                 ),
+            ('first_page',          lambda: len(UserController.get_users(limit=args.limit)['users'])                                                        ),
+            ('filtered_deep_page',  lambda: len(UserController.get_users(user_type='attendee', sort='created_at', limit=args.limit, cursor=cursor)['users'])),
+            ('email_prefix_page',   lambda: UserController.get_users(email_prefix='olivia', sort='email', limit=args.limit)['total']                          ),
+            ('export_csv_bytes',    export                                                                                                                  )
+        ):
+            print(json.dumps({ 'users' : args.users, **measure(name, run) }))
@@ -0,0 +1,17 @@
+import os
+
+from app import create_app, start_background_jobs
+from controllers import CalendarController, PaymentController
+
+# Runs the background jobs (calendar outbox and payment sweeper) in their own process. Servers
+# such as gunicorn only build the app, so deployments run this next to the web workers.
+if __name__ == "__main__":
+    app = create_app({'CALENDAR_WORKERS' : int(os.getenv('CALENDAR_WORKER_THREADS', 4))})
+    start_background_jobs(app)
+
+    try:
+        while True:
+            CalendarController.join_workers(timeout=1)
+    except KeyboardInterrupt:
+        PaymentController.stop_sweeper()
+        CalendarController.stop_workers()
@@ -1,4 +1,6 @@
 from .controller                import Controller
+from .cache_controller          import CacheController
+from .outbound_controller       import OutboundController
 from .calendar_controller       import CalendarController
 from .payment_controller        import PaymentController
 from .event_controller          import EventController
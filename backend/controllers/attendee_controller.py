@@ -9,10 +9,8 @@ class AttendeeController:
 
     def create_attendee( email : str, password : str, first_name : str, last_name : str):
 
+        # The Stripe customer is created on the first paid registration, see PaymentController.get_stripe_customer
         new_attendee        : Attendee  = Attendee( email = email, password = password, first_name = first_name, last_name = last_name)
-        stripe_customer_id  : str       = PaymentController.create_stripe_customer( first_name = first_name, last_name = last_name, email = email )
-        
-        new_attendee.set_customer_id( stripe_customer_id = stripe_customer_id )
         user_id : int  = Attendee.add(new_attendee)
         return user_id
     
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections    import OrderedDict
+from threading      import Lock
+from typing         import Callable
+
+import json
+import sqlite3
+import time
+
+
+class MemoryCache:
+    """
+    In-process LRU cache with a TTL per entry. Version counters are kept apart from the
+    entries so that LRU eviction can never reset a version and resurrect a stale entry.
+    """
+
+    def __init__(self, max_entries : int = 1024, ttl : float = 300):
+        self.__max_entries  : int           = max_entries
+        self.__ttl          : float         = ttl
+        self.__entries      : OrderedDict   = OrderedDict()
+        self.__counters     : dict          = {}
+        self.__lock         : Lock          = Lock()
+
+    def get(self, key : str):
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self.__entries[key]
+                return None
+
+            self.__entries.move_to_end(key)
+            return value
+
+    def set(self, key : str, value) -> None:
+        with self.__lock:
+            self.__entries[key] = (time.monotonic() + self.__ttl, value)
+            self.__entries.move_to_end(key)
+
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+
+    def counter(self, name : str) -> int:
+        with self.__lock:
+            return self.__counters.get(name, 0)
+
+    def incr(self, name : str) -> int:
+        with self.__lock:
+            self.__counters[name] = self.__counters.get(name, 0) + 1
+            return self.__counters[name]
+
+    def reset(self, name : str) -> None:
+        with self.__lock:
+            self.__counters.pop(name, None)
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+
+
+class SqliteCache:
+    """
+    Local stand-in for a shared cache: entries and counters live in a SQLite file, so every
+    gunicorn worker on the host sees the same versions and the same cached responses.
+    """
+
+    def __init__(self, path : str, max_entries : int = 1024, ttl : float = 300):
+        self.__path         : str   = path
+        self.__max_entries  : int   = max_entries
+        self.__ttl          : float = ttl
+
+        with self.__connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at)')
+            connection.execute('CREATE TABLE IF NOT EXISTS cache_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def __connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.__path, timeout=5)
+
+    def get(self, key : str):
+        now : float = time.time()
+        with self.__connect() as connection:
+            row = connection.execute('SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at < now:
+                connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+                return None
+
+            connection.execute('UPDATE cache_entries SET accessed_at = ? WHERE key = ?', (now, key))
+            return json.loads(value)
+
+    def set(self, key : str, value) -> None:
+        now : float = time.time()
+        with self.__connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now + self.__ttl, now)
+            )
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.__max_entries,)
+            )
+
+    def counter(self, name : str) -> int:
+        with self.__connect() as connection:
+            row = connection.execute('SELECT value FROM cache_counters WHERE name = ?', (name,)).fetchone()
+            return row[0] if row else 0
+
+    def incr(self, name : str) -> int:
+        with self.__connect() as connection:
+            connection.execute(
+                'INSERT INTO cache_counters (name, value) VALUES (?, 1) ON CONFLICT(name) DO UPDATE SET value = value + 1',
+                (name,)
+            )
+            return connection.execute('SELECT value FROM cache_counters WHERE name = ?', (name,)).fetchone()[0]
+
+    def reset(self, name : str) -> None:
+        with self.__connect() as connection:
+            connection.execute('DELETE FROM cache_counters WHERE name = ?', (name,))
+
+    def clear(self) -> None:
+        with self.__connect() as connection:
+            connection.execute('DELETE FROM cache_entries')
+
+
+class CacheController:
+    """
+    Versioned read-through cache for event reads.
+    Keys embed a global generation, the catalog version and, for a single event, that
+    event's version. Writers bump versions instead of deleting keys, so stale entries are
+    simply never read again and age out through LRU/TTL eviction.
+    """
+
+    backend = MemoryCache()
+    # Hits and misses are backend counters, like the versions, so a shared backend reports
+    # them for every worker and the increments are atomic
+    STATS   : tuple[str, ...] = ('hits', 'misses')
+
+    def configure( backend ) -> None:
+        CacheController.backend = backend
+
+    def reset_stats() -> None:
+        for name in CacheController.STATS:
+            CacheController.backend.reset(f'stats:{name}')
+
+    def get_stats() -> dict:
+        return {name : CacheController.backend.counter(f'stats:{name}') for name in CacheController.STATS}
+
+    def get_or_load( key : str, loader : Callable[[], object] ):
+        value = CacheController.backend.get(key)
+
+        if value is not None:
+            CacheController.backend.incr('stats:hits')
+            return value
+
+        CacheController.backend.incr('stats:misses')
+        value = loader()
+        CacheController.backend.set(key, value)
+        return value
+
+    def event_key( event_id : int ) -> str:
+        generation  : int = CacheController.backend.counter('generation')
+        version     : int = CacheController.backend.counter(f'event:{event_id}')
+        return f'event:{generation}:{event_id}:{version}'
+
+    def catalog_key( *parts ) -> str:
+        generation  : int = CacheController.backend.counter('generation')
+        version     : int = CacheController.backend.counter('catalog')
+        suffix      : str = ':'.join(str(part) for part in parts)
+        return f'catalog:{generation}:{version}:{suffix}'
+
+    def invalidate_event( event_id : int ) -> None:
+        CacheController.backend.incr(f'event:{event_id}')
+        CacheController.backend.incr('catalog')
+
+    def invalidate_all() -> None:
+        """
+        For changes that can show up in any event, e.g. an organizer or stakeholder renaming themselves.
+        """
+        CacheController.backend.incr('generation')
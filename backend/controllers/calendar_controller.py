@@ -1,39 +1,177 @@
-from .controller import Controller
+from .controller    import Controller
+from models         import CalendarTask, Event, UnitOfWork, db
+
+from datetime       import datetime, timedelta
+from threading      import Thread, Event as ThreadEvent
+
+import random
 
 class CalendarController:
+
+    max_attempts    : int       = 8
+    retry_base      : float     = 5
+    retry_max       : float     = 3600
+    lease           : timedelta = timedelta(minutes=5)
+    poll_interval   : float     = 2
+    batch_size      : int       = 20
+
+    __stop          : ThreadEvent   = ThreadEvent()
+    __workers       : list[Thread]  = []
+
+    class CalendarError(Exception):
+
+        class AclFailed(Exception):
+            HTTP_code = 502
+            def __init__(self, failures : dict[str, Exception], message : str = "calendar_acl_failed"):
+                super().__init__(message)
+                self.failures = failures
+
+    # Google caps a batch at 50 calls for the Calendar API
+    BATCH_SIZE : int = 50
+
     def create_calendar( event_title : str, organizer_email : str):
         calendar = {
             'summary': f'{event_title} Organization',
             'timeZone': 'America/Toronto'
         }
-        created_calendar = Controller.service.calendars().insert(body=calendar).execute()
+        created_calendar = Controller.get_service().calendars().insert(body=calendar).execute()
 
         calendar_id = created_calendar['id']
-        CalendarController.share_calendar(calendar_id, organizer_email)
-        CalendarController.make_public(calendar_id)
+        CalendarController.share_calendar_bulk(calendar_id, [organizer_email], public=True)
         return calendar_id
 
+    def __acl_rule( email : str = None ) -> dict:
+        if email is None:
+            return { 'scope': { 'type': 'default' }, 'role': 'reader' }
+        return { 'scope': { 'type': 'user', 'value': email }, 'role': 'writer' }
+
+    def share_calendar_bulk( calendar_id : str, emails : list[str], public : bool = False ) -> dict[str, dict]:
+        """
+        Insert the ACL rules for many users, and optionally the public rule, in batched HTTP
+        requests instead of one round trip per rule.
+        :param calendar_id: The calendar to share
+        :param emails: The users to give write access to
+        :param public: Whether to also make the calendar publicly readable
+        :return: The created rules keyed by email, 'public' for the public rule
+        :raises CalendarError.AclFailed: If any rule failed, with the error of each failed item
+        """
+        rules : dict[str, dict] = { email : CalendarController.__acl_rule(email) for email in emails }
+        if public:
+            rules['public'] = CalendarController.__acl_rule()
+
+        results     : dict[str, dict]       = {}
+        failures    : dict[str, Exception]  = {}
+
+        def collect(request_id, response, exception):
+            if exception is not None:
+                failures[request_id] = exception
+            else:
+                results[request_id] = response
+
+        keys : list[str] = list(rules)
+        for offset in range(0, len(keys), CalendarController.BATCH_SIZE):
+            batch = Controller.get_service().new_batch_http_request(callback=collect)
+            for key in keys[offset : offset + CalendarController.BATCH_SIZE]:
+                batch.add(Controller.get_service().acl().insert(calendarId=calendar_id, body=rules[key]), request_id=key)
+            batch.execute()
+
+        if failures:
+            raise CalendarController.CalendarError.AclFailed(failures)
+
+        return results
+
     def make_public(calendar_id):
-        rule = {
-            'scope': {
-                'type': 'default'
-            },
-            'role': 'reader'
-        }
-    
-        try:
-            result = Controller.service.acl().insert(calendarId=calendar_id, body=rule).execute()
-            return result
-        except Exception as e:
-            print(f"Failed to make calendar public: {e}")
-            return None
+        return CalendarController.share_calendar_bulk(calendar_id, [], public=True)['public']
         
     def share_calendar(calendar_id, email):
-        rule = {
-            'scope': {
-                'type': 'user',
-                'value': email
-            },
-            'role': 'writer'
-        }
-        Controller.service.acl().insert(calendarId=calendar_id, body=rule).execute()
\ No newline at end of file
+        return CalendarController.share_calendar_bulk(calendar_id, [email])[email]
+
+    def enqueue_create_calendar( event_id : int, organizer_email : str ) -> None:
+        with UnitOfWork():
+            CalendarTask.enqueue(CalendarTask.CREATE_CALENDAR, event_id, organizer_email)
+
+    def enqueue_share_calendar( event_id : int, email : str ) -> None:
+        with UnitOfWork():
+            CalendarTask.enqueue(CalendarTask.SHARE_CALENDAR, event_id, email)
+
+    def __run_task( task : CalendarTask ) -> None:
+        event : Event = Event.find(event_id=task.event_id)
+
+        # The event was deleted while the task waited, nothing left to provision
+        if not event:
+            return
+
+        if task.kind == CalendarTask.CREATE_CALENDAR:
+            # Saved before the ACL calls so a retry never creates a second calendar
+            if not event.get_calendar():
+                calendar = {
+                    'summary': f'{event.get_title()} Organization',
+                    'timeZone': 'America/Toronto'
+                }
+                created_calendar = Controller.get_service().calendars().insert(body=calendar).execute()
+                with UnitOfWork():
+                    event.set_calendar(created_calendar['id'])
+
+            CalendarController.share_calendar_bulk(event.get_calendar(), [task.email], public=True)
+
+        elif task.kind == CalendarTask.SHARE_CALENDAR:
+            if not event.get_calendar():
+                raise Exception('calendar_not_provisioned')
+
+            CalendarController.share_calendar(event.get_calendar(), task.email)
+
+    def __retry_at( attempts : int ) -> datetime:
+        delay : float = min(CalendarController.retry_base * 2 ** (attempts - 1), CalendarController.retry_max)
+        return datetime.now() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+    def process_outbox( limit : int = None ) -> int:
+        """
+        Run the calendar tasks that are due. Safe to call from several workers at once.
+        :return: The number of tasks this call attempted
+        """
+        processed : int = 0
+
+        for task in CalendarTask.find_due(limit or CalendarController.batch_size):
+            if not task.claim(CalendarController.lease):
+                continue
+
+            processed += 1
+            try:
+                CalendarController.__run_task(task)
+                task.complete()
+            except Exception as e:
+                db.session.rollback()
+                if task.attempts >= CalendarController.max_attempts:
+                    task.fail(str(e))
+                else:
+                    task.fail(str(e), retry_at=CalendarController.__retry_at(task.attempts))
+
+        return processed
+
+    def __work( app ) -> None:
+        while not CalendarController.__stop.is_set():
+            processed : int = 0
+            try:
+                with app.app_context():
+                    processed = CalendarController.process_outbox()
+            except Exception:
+                app.logger.exception('Calendar worker error')
+
+            if not processed:
+                CalendarController.__stop.wait(CalendarController.poll_interval)
+
+    def start_workers( app, count : int = 1 ) -> None:
+        CalendarController.__stop.clear()
+        for _ in range(count):
+            worker = Thread(target=CalendarController.__work, args=(app,), daemon=True)
+            worker.start()
+            CalendarController.__workers.append(worker)
+
+    def join_workers( timeout : float = None ) -> None:
+        for worker in CalendarController.__workers:
+            worker.join(timeout)
+
+    def stop_workers() -> None:
+        CalendarController.__stop.set()
+        CalendarController.join_workers()
+        CalendarController.__workers = []
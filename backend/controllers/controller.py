@@ -1,42 +1,146 @@
 from flask_sqlalchemy   import SQLAlchemy
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-import stripe
+from datetime import timedelta
+from threading import Lock
 import dotenv
 import os
 
+from .cache_controller import CacheController, MemoryCache, SqliteCache
+from .outbound_controller import OutboundController, OutboundClient, CircuitBreaker, GoogleHttp, stripe_http_client
+from models import PasswordHasher
+
 class Controller:
 
     stripe_public_key   : str = None
+    stripe_webhook_secret : str = None
+    payment_intent_ttl  : timedelta = timedelta(hours=1)
     JWT_secret_key      : str = None
     database_uri        : str = None
     service             = None
+    config              : dict = {}
     db                  : SQLAlchemy = None
+    event_page_size     : int = 20
+    event_page_size_max : int = 100
+
+    __discovery_document    : str   = None
+    __stripe                        = None
+    __service_lock          : Lock  = Lock()
+
+    def get_setting( name : str, default = None ):
+        """
+        A setting from the config given to initialize, falling back to the environment.
+        """
+        return Controller.config.get(name, os.getenv(name, default))
+
+    def __init_outbound():
+        for provider in ('stripe', 'google'):
+            prefix : str = provider.upper()
+            OutboundController.register(OutboundClient(
+                provider        = provider,
+                timeout         = float(Controller.get_setting(f'{prefix}_TIMEOUT', 10)),
+                max_concurrency = int(Controller.get_setting(f'{prefix}_MAX_CONCURRENCY', 10)),
+                acquire_timeout = float(Controller.get_setting(f'{prefix}_ACQUIRE_TIMEOUT', 1)),
+                breaker         = CircuitBreaker(
+                    failure_threshold   = int(Controller.get_setting(f'{prefix}_BREAKER_FAILURES', 5)),
+                    reset_timeout       = float(Controller.get_setting(f'{prefix}_BREAKER_RESET', 30))
+                )
+            ))
 
     def __init_stripe():
-        stripe.api_key = os.getenv('STRIPE_SECRET_KEY')
-        Controller.stripe_public_key = os.getenv('STRIPE_PUBLIC_KEY')
+        # The stripe module itself is configured on first use, see get_stripe
+        Controller.__stripe = None
+        Controller.stripe_public_key = Controller.get_setting('STRIPE_PUBLIC_KEY')
+        Controller.stripe_webhook_secret = Controller.get_setting('STRIPE_WEBHOOK_SECRET')
+        Controller.payment_intent_ttl = timedelta(minutes=float(Controller.get_setting('PAYMENT_INTENT_TTL_MINUTES', 60)))
     
     def __init_JWT():
-        Controller.JWT_secret_key = os.getenv('JWT_SECRET_KEY')
+        Controller.JWT_secret_key = Controller.get_setting('JWT_SECRET_KEY')
     
     def __init_database():
-        Controller.database_uri = os.getenv('DATABASE_URI')
+        Controller.database_uri = Controller.get_setting('DATABASE_URI')
     
-    def __init_google():
+    def __init_pagination():
+        Controller.event_page_size      = int(Controller.get_setting('EVENT_PAGE_SIZE', Controller.event_page_size))
+        Controller.event_page_size_max  = int(Controller.get_setting('EVENT_PAGE_SIZE_MAX', Controller.event_page_size_max))
+
+    def __init_cache():
+        max_entries : int   = int(Controller.get_setting('CACHE_MAX_ENTRIES', 1024))
+        ttl         : float = float(Controller.get_setting('CACHE_TTL', 300))
+
+        if Controller.get_setting('CACHE_BACKEND', 'memory') == 'sqlite':
+            backend = SqliteCache(Controller.get_setting('CACHE_PATH', 'cache.sqlite3'), max_entries=max_entries, ttl=ttl)
+        else:
+            backend = MemoryCache(max_entries=max_entries, ttl=ttl)
+
+        CacheController.configure(backend)
+
+    def __init_password_hashing():
+        PasswordHasher.configure(
+            rounds  = int(Controller.get_setting('BCRYPT_ROUNDS', 12)),
+            workers = int(Controller.get_setting('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+        )
+
+    def __build_google_service():
+        if Controller.get_setting('GOOGLE_CALENDAR_FAKE'):
+            from .fake_calendar_service import FakeCalendarService
+            return FakeCalendarService()
+
+        from google.oauth2 import service_account
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+
+        # The discovery document ships with googleapiclient, read and keep it once per process
+        if Controller.__discovery_document is None:
+            Controller.__discovery_document = get_static_doc('calendar', 'v3')
+
         SCOPES = ['https://www.googleapis.com/auth/calendar']
-        CREDENTIALS = os.getenv('GOOGLE_CREDENTIALS_LOCATION')
+        CREDENTIALS = Controller.get_setting('GOOGLE_CREDENTIALS_LOCATION')
         credentials = service_account.Credentials.from_service_account_file(CREDENTIALS, scopes=SCOPES)                                                                
-        Controller.service = build('calendar', 'v3', credentials=credentials)
+        return build_from_document(Controller.__discovery_document, http=GoogleHttp(OutboundController.clients['google'], credentials))
+
+    def get_service():
+        """
+        The Google Calendar service, built on first use so that startup never waits on Google.
+        """
+        if Controller.service is None:
+            with Controller.__service_lock:
+                if Controller.service is None:
+                    Controller.service = Controller.__build_google_service()
+        return Controller.service
+
+
+    def __configure_stripe():
+        import stripe
+
+        stripe.api_key = Controller.get_setting('STRIPE_SECRET_KEY')
+        # Lets stripe-mock or benchmarks.fake_stripe stand in for the real API
+        stripe.api_base = Controller.get_setting('STRIPE_API_BASE', stripe.DEFAULT_API_BASE)
+        stripe.default_http_client = stripe_http_client(OutboundController.clients['stripe'])
+        return stripe
+
+    def get_stripe():
+        """
+        The stripe module, imported and configured on first use so that startup never loads it.
+        """
+        if Controller.__stripe is None:
+            with Controller.__service_lock:
+                if Controller.__stripe is None:
+                    Controller.__stripe = Controller.__configure_stripe()
+        return Controller.__stripe
 
 
     def initialize_database( app ):
         Controller.db = SQLAlchemy(app)
 
-    def initialize():
+    def initialize( config : dict = None ):
         dotenv.load_dotenv()
 
+        Controller.config   = dict(config or {})
+        Controller.service  = None
+
+        Controller.__init_outbound()
         Controller.__init_stripe()
         Controller.__init_JWT()
-        Controller.__init_google()
-        Controller.__init_database()
\ No newline at end of file
+        Controller.__init_database()
+        Controller.__init_pagination()
+        Controller.__init_cache()
+        Controller.__init_password_hashing()
\ No newline at end of file
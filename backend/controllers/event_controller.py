@@ -1,10 +1,17 @@
-from models         import Event, User, Organizer, Stakeholder, Attendee, db, Registration
-from controllers    import PaymentController, CalendarController
+from models         import Event, User, Organizer, Stakeholder, Attendee, db, Registration, RegistrationDailyStats, EventSearch, UnitOfWork, PaymentIntent
+from controllers    import Controller, CacheController, PaymentController, CalendarController
 
 from datetime       import datetime
+from typing         import Iterator
+import base64
+import csv
+import io
+import json
 
 class EventController:
-    
+
+    # Formats of the attendee roster export and their MIME types
+    ROSTER_FORMATS : dict[str, str] = { 'csv' : 'text/csv', 'ndjson' : 'application/x-ndjson' }
 
     def create_event( user_id : int, title : str, start : str, end : str, category : str, description : str, location : str, capacity : int, event_type : str, registration_fee : float = 0.00):
         organizer : Organizer = Organizer.find(user_id)
@@ -18,18 +25,26 @@ class EventController:
         start_time  : datetime = datetime.strptime(start, "%Y-%m-%dT%H:%M")
         end_time    : datetime = datetime.strptime(end, "%Y-%m-%dT%H:%M")
 
-        event_id = organizer.create_event( 
-            title       = title,
-            start       = start_time,
-            end         = end_time,
-            category    = category,
-            description = description,
-            location    = location,
-            capacity    = capacity,
-            event_type  = event_type,
-            registration_fee = registration_fee,
-            calendar_id = CalendarController.create_calendar(title, organizer.get_email())
-        )
+        with UnitOfWork():
+            event_id = organizer.create_event( 
+                title       = title,
+                start       = start_time,
+                end         = end_time,
+                category    = category,
+                description = description,
+                location    = location,
+                capacity    = capacity,
+                event_type  = event_type,
+                registration_fee = registration_fee
+            )
+            EventSearch.index([event_id])
+
+            # Provisioned by the calendar workers, calendar_id is filled in once Google answers.
+            # Queued in the same transaction, so there is no event without its task and no task
+            # for an event that was rolled back.
+            CalendarController.enqueue_create_calendar(event_id, organizer.get_email())
+
+        CacheController.invalidate_event(event_id)
 
         return event_id
     
@@ -42,10 +57,8 @@ class EventController:
         if not event:
             raise Event.EventError.NotFound()
         
-        if event not in attendee.get_events():
-            ...
-        
         event.remove_registration( attendee )
+        CacheController.invalidate_event( event_id )
 
     def register_to_event( user_id : int, event_id : int, client_secret : str = None) -> bool | dict[str]:
 
@@ -57,31 +70,93 @@ class EventController:
         if not event:
             raise Event.EventError.NotFound()
         
-        if event in attendee.get_events():
-            raise Attendee.AttendeeError.AlreadyRegisteredToEvent()
-        
         if client_secret:
-            payment_succeeded : bool = PaymentController.confirm_registration( user_id, event_id, client_secret )
+            payment_intent : PaymentIntent = PaymentController.confirm_registration( user_id, event_id, client_secret )
 
-            if payment_succeeded:
-                event.add_registration(attendee)
+            if payment_intent.status == PaymentIntent.SUCCEEDED:
+                # Usually already done by the Stripe webhook
+                EventController.complete_paid_registration(payment_intent)
                 return { 'client_secret' : None }
+
+            if payment_intent.is_refunded():
+                raise Event.EventError.Full()
             
             return { 'client_secret' : client_secret }
 
-        if event.get_capacity() <= len(event.get_attendees()):
+        if Registration.find(attendee_id = user_id, event_id = event_id):
+            raise Attendee.AttendeeError.AlreadyRegisteredToEvent()
+
+        # Early exit only, add_registration and PaymentIntent.hold_seat enforce the capacity
+        # atomically. Seats held by open checkouts are taken, unless one is the caller's.
+        if event.get_capacity() <= event.get_registered_count() + event.get_held_count() and not PaymentIntent.find_open(user_id, event_id):
             raise Event.EventError.Full()
+
+        # SCHEDULE_CONFLICTS is 'warn' (register and report them) or 'reject'
+        conflicts : list[dict] = EventController.__get_conflicts(user_id, event)
+        if conflicts and Controller.get_setting('SCHEDULE_CONFLICTS', 'warn') == 'reject':
+            raise Attendee.AttendeeError.ScheduleConflict()
         
         if event.get_fee() > 0:
             client_secret : str = PaymentController.create_payment_intent(event.get_fee(), event_id, user_id)
 
-            return { 'client_secret' : client_secret }
+            return { 'client_secret' : client_secret, 'conflicts' : conflicts }
 
         event.add_registration(attendee)
+        CacheController.invalidate_event(event_id)
         
-        return { 'client_secret' : None }
+        return { 'client_secret' : None, 'conflicts' : conflicts }
+
+    def __get_conflicts( user_id : int, event : Event ) -> list[dict]:
+        return [
+            {
+                'event_id'  : conflict.get_id(),
+                'title'     : conflict.get_title(),
+                'start'     : conflict.get_start().strftime("%Y-%m-%d %H:%M"),
+                'end'       : conflict.get_end().strftime("%Y-%m-%d %H:%M")
+            }
+            for conflict in Event.find_conflicts(user_id, event.get_start(), event.get_end(), exclude_event_id=event.get_id())
+        ]
+
+    def complete_paid_registration( payment_intent : PaymentIntent ) -> None:
+        """
+        Register an attendee whose payment succeeded, on the seat held for the checkout.
+        Safe to call more than once.
+        :raises Event.EventError.Full: No seat was left, the payment is refunded
+        """
+        user_id     : int       = payment_intent.attendee_id
+        event_id    : int       = payment_intent.event_id
+
+        attendee    : Attendee  = Attendee.find(user_id)
+        event       : Event     = Event.find(event_id)
+
+        if not attendee:
+            raise User.UserError.NotFound()
+        if not event:
+            raise Event.EventError.NotFound()
+
+        if Registration.find(attendee_id = user_id, event_id = event_id):
+            with UnitOfWork():
+                payment_intent.release_seat()
+            return
+
+        try:
+            # In the transaction of the registration, a rollback keeps the seat held
+            event.add_registration(attendee, held = payment_intent.take_seat())
+        except Attendee.AttendeeError.AlreadyRegisteredToEvent:
+            with UnitOfWork():
+                payment_intent.release_seat()
+            return
+        except Event.EventError.Full:
+            # Only without a held seat, e.g. a payment retried after it failed and the seat went to someone else
+            PaymentController.refund_payment_intent(payment_intent)
+            raise
+
+        CacheController.invalidate_event(event_id)
 
     def get_event( event_id : int ):
+        return CacheController.get_or_load( CacheController.event_key(event_id), lambda: EventController.__load_event(event_id) )
+
+    def __load_event( event_id : int ) -> dict:
         event : Event = Event.find( event_id = event_id)
 
         if not event:
@@ -90,16 +165,143 @@ class EventController:
         return event.get_data()
     
     def get_available_events():
+        return CacheController.get_or_load( CacheController.catalog_key('all'), EventController.__load_available_events )
+
+    def __load_available_events() -> list[dict]:
         
-        event_data  : list          = []
         events      : list[Event]   = Event.find()
 
-        for event in events:
-            event_data.append(event.get_data())
-
-        return event_data
+        return Event.get_bulk_data(events)
     
 
+    def __encode_cursor( event : Event ) -> str:
+        key     : str   = json.dumps([event.get_start().isoformat(), event.get_id()])
+        return base64.urlsafe_b64encode(key.encode('utf-8')).decode('utf-8')
+
+    def __decode_cursor( cursor : str ) -> tuple[datetime, int]:
+        try:
+            start, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            return datetime.fromisoformat(start), int(event_id)
+        except Exception:
+            raise Event.EventError.InvalidCursor()
+
+    def get_events_page( limit : int = None, cursor : str = None, category : str = None, event_type : str = None, location : str = None, start_from : str = None, start_to : str = None, min_fee : float = None, max_fee : float = None, sponsored : bool = None ) -> dict:
+
+        if not limit or limit <= 0:
+            limit = Controller.event_page_size
+        limit = min(limit, Controller.event_page_size_max)
+
+        after : tuple[datetime, int] = EventController.__decode_cursor(cursor) if cursor else None
+
+        page_key : str = CacheController.catalog_key('page', json.dumps([limit, cursor, category, event_type, location, start_from, start_to, min_fee, max_fee, sponsored]))
+
+        return CacheController.get_or_load( page_key, lambda: EventController.__load_events_page(limit, after, category, event_type, location, start_from, start_to, min_fee, max_fee, sponsored) )
+
+    def __load_events_page( limit : int, after : tuple[datetime, int], category : str, event_type : str, location : str, start_from : str, start_to : str, min_fee : float, max_fee : float, sponsored : bool ) -> dict:
+
+        # One extra row tells us whether there is a next page
+        events : list[Event] = Event.find_page(
+            limit       = limit + 1,
+            after       = after,
+            category    = category,
+            event_type  = event_type,
+            location    = location,
+            start_from  = datetime.fromisoformat(start_from) if start_from else None,
+            start_to    = datetime.fromisoformat(start_to) if start_to else None,
+            min_fee     = min_fee,
+            max_fee     = max_fee,
+            sponsored   = sponsored
+        )
+
+        next_cursor : str = None
+        if len(events) > limit:
+            events      = events[:limit]
+            next_cursor = EventController.__encode_cursor(events[-1])
+
+        return {
+            'events'        : Event.get_bulk_data(events),
+            'next_cursor'   : next_cursor
+        }
+
+    def get_events_in_range( start_from : str, start_to : str ) -> list[dict]:
+        """
+        Every event that is on at some point between start_from (included) and start_to
+        (excluded), for calendar views. The window is at most EVENT_RANGE_MAX_DAYS long.
+        """
+        try:
+            window_start    : datetime = datetime.fromisoformat(start_from)
+            window_end      : datetime = datetime.fromisoformat(start_to)
+        except (TypeError, ValueError):
+            raise Event.EventError.InvalidRange()
+
+        max_days : int = int(Controller.get_setting('EVENT_RANGE_MAX_DAYS', 366))
+        if window_end <= window_start or (window_end - window_start).days > max_days:
+            raise Event.EventError.InvalidRange()
+
+        range_key : str = CacheController.catalog_key('range', window_start.isoformat(), window_end.isoformat())
+
+        return CacheController.get_or_load( range_key, lambda: EventController.__load_events_in_range(window_start, window_end) )
+
+    def __load_events_in_range( window_start : datetime, window_end : datetime ) -> list[dict]:
+        # Wrapped in a list, the cache does not keep None and an empty catalog has no longest event
+        longest : float = CacheController.get_or_load( CacheController.catalog_key('longest_event'), lambda: [Event.find_longest_duration()] )[0]
+
+        return Event.get_bulk_data(Event.find_overlapping(window_start, window_end, longest))
+
+    def search_events( query : str, limit : int = None, cursor : str = None ) -> dict:
+        """
+        Full-text search over the catalog, best matches first, see EventSearch.
+        Pages with next_cursor like get_events_page.
+        """
+        if not EventSearch.terms(query):
+            raise Event.EventError.InvalidSearch()
+
+        if not limit or limit <= 0:
+            limit = Controller.event_page_size
+        limit = min(limit, Controller.event_page_size_max)
+
+        after : tuple[float, int] = EventController.__decode_search_cursor(cursor) if cursor else None
+
+        search_key : str = CacheController.catalog_key('search', json.dumps([query, limit, cursor]))
+
+        return CacheController.get_or_load( search_key, lambda: EventController.__load_search(query, limit, after) )
+
+    def __encode_search_cursor( score : float, event_id : int ) -> str:
+        key     : str   = json.dumps([score, event_id])
+        return base64.urlsafe_b64encode(key.encode('utf-8')).decode('utf-8')
+
+    def __decode_search_cursor( cursor : str ) -> tuple[float, int]:
+        try:
+            score, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            return float(score), int(event_id)
+        except Exception:
+            raise Event.EventError.InvalidCursor()
+
+    def __load_search( query : str, limit : int, after : tuple[float, int] ) -> dict:
+
+        # One extra row tells us whether there is a next page
+        matches : list[tuple[int, float]] = EventSearch.search(query, limit + 1, after)
+
+        next_cursor : str = None
+        if len(matches) > limit:
+            matches     = matches[:limit]
+            next_cursor = EventController.__encode_search_cursor(matches[-1][1], matches[-1][0])
+
+        event_ids   : list[int]         = [event_id for event_id, _ in matches]
+        events      : dict[int, Event]  = { event.id : event for event in db.session.query(Event).filter(Event.id.in_(event_ids)).all() } if event_ids else {}
+        highlights  : dict[int, dict]   = EventSearch.highlight(query, event_ids)
+
+        # An event deleted since the search ran is simply left out
+        found       : list[tuple[int, float]] = [(event_id, score) for event_id, score in matches if event_id in events]
+
+        return {
+            'events'        : [
+                { **data, 'score' : score, 'highlights' : highlights.get(event_id, {}) }
+                for (event_id, score), data in zip(found, Event.get_bulk_data([events[event_id] for event_id, _ in found]))
+            ],
+            'next_cursor'   : next_cursor
+        }
+
     def is_registered_to_event( user_id : int, event_id : int) -> bool:
 
         attendee    : Attendee  = Attendee.find(user_id)
@@ -111,53 +313,83 @@ class EventController:
         if not attendee:
             raise User.UserError.NotFound()
         
-        registered_events : list[Event] = attendee.get_events()
-
-        if event in registered_events:
-            return True
-        return False
+        # A single lookup on the registrations primary key
+        return Registration.find(attendee_id=user_id, event_id=event_id) is not None
+
+    def get_event_statuses( user_id : int, event_ids : list[int | str] ) -> dict[int, dict[str, bool]]:
+        """
+        The caller's registration and sponsorship status for every event a page shows, in one
+        query instead of a check_registration or check_sponsorship call per event. At most
+        EVENT_STATUS_MAX_IDS events per call; unknown events are left out.
+        """
+        try:
+            event_ids = list(dict.fromkeys(int(event_id) for event_id in event_ids or []))
+        except ValueError:
+            raise Event.EventError.InvalidEventIds()
+
+        if not event_ids or len(event_ids) > int(Controller.get_setting('EVENT_STATUS_MAX_IDS', 500)):
+            raise Event.EventError.InvalidEventIds()
+
+        return Event.find_statuses(user_id, event_ids)
     
 
     def get_registered_events( user_id : int ) -> list[Event]:
 
-        events_data : list      = []
         attendee    : Attendee  = User.find(user_id=user_id)
 
         if not attendee:
             raise User.UserError.NotFound()
         
-        registered_events : list[Event] = attendee.get_events()
+        registered_events : list[Event] = Event.find_all_by_attendee(attendee.get_id())
 
-        for event in registered_events:
-            events_data.append(event.get_data())
-
-        return events_data
+        return Event.get_bulk_data(registered_events)
     
     def delete_event( event_id : int ):
-        Event.remove( event_id )
-
-    def edit_event (event_id : int, title : str, start : str, end : str, category : str, description : str, location : str, capacity : int, event_type : str, registration_fee : float):
+        with UnitOfWork():
+            EventSearch.remove([event_id])
+            Event.remove( event_id )
+        CacheController.invalidate_event( event_id )
+
+    def edit_event( event_id : int, title : str = None, start : str = None, end : str = None, category : str = None, description : str = None, location : str = None, capacity : int = None, event_type : str = None, registration_fee : float = None ) -> list[str]:
+        """
+        Partial update: fields left as None are kept, and only the values that actually differ
+        are written, all in one transaction.
+        :return: The names of the fields that changed
+        """
         event : Event = Event.find(event_id=event_id)
 
         if not event:
             raise Event.EventError.NotFound()
         
-        start_time  : datetime = datetime.strptime(start, "%Y-%m-%dT%H:%M")
-        end_time    : datetime = datetime.strptime(end, "%Y-%m-%dT%H:%M")
-        
-        event.set_title(title)
-        event.set_start(start_time)
-        event.set_end(end_time)
-        event.set_category(category)
-        event.set_description(description)
-        event.set_location(location)
-        event.set_capacity(capacity)
-        event.set_event_type(event_type)
-        event.set_fee(registration_fee)
+        start_time  : datetime = datetime.strptime(start, "%Y-%m-%dT%H:%M") if start else None
+        end_time    : datetime = datetime.strptime(end, "%Y-%m-%dT%H:%M") if end else None
+
+        fields : dict[str, tuple] = {
+            'title'             : (title,               event.get_title,        event.set_title         ),
+            'start'             : (start_time,          event.get_start,        event.set_start         ),
+            'end'               : (end_time,            event.get_end,          event.set_end           ),
+            'category'          : (category,            event.get_category,     event.set_category      ),
+            'description'       : (description,         event.get_description,  event.set_description   ),
+            'location'          : (location,            event.get_location,     event.set_location      ),
+            'capacity'          : (capacity,            event.get_capacity,     event.set_capacity      ),
+            'event_type'        : (event_type,          event.get_event_type,   event.set_event_type    ),
+            'registration_fee'  : (registration_fee,    event.get_fee,          event.set_fee           )
+        }
+
+        with UnitOfWork():
+            changed : list[str] = UnitOfWork.apply(fields)
+            if set(changed) & set(EventSearch.WEIGHTS):
+                EventSearch.index([event_id])
+
+        if changed:
+            CacheController.invalidate_event(event_id)
+
+        return changed
 
     def get_analytics( event_id : int, group_by: str = 'day' ):
-        analytics = Registration.get_analytics(event_id, group_by)
-        return analytics
+        if group_by not in RegistrationDailyStats.GROUPS:
+            group_by = 'day'
+        return RegistrationDailyStats.find(event_id, group_by)
     
     def get_calendar( event_id : int):
         event       : Event     = Event.find(event_id)
@@ -165,4 +397,55 @@ class EventController:
         if not event:
             raise Event.EventError.NotFound()
         
-        return event.get_calendar()
\ No newline at end of file
+        return event.get_calendar()
+
+    def export_roster( user_id : int, event_id : int, format : str = 'csv', columns : list[str] = None, registered_since : str = None ) -> Iterator[str]:
+        """
+        The attendee list of an event, streamed as CSV or newline-delimited JSON. Everything is
+        checked before the first chunk, so errors still get a proper status code.
+        :param registered_since: ISO date or time, for pulling only the new registrations
+        """
+        event : Event = Event.find(event_id)
+        if not event:
+            raise Event.EventError.NotFound()
+
+        user : User = User.find(user_id=user_id)
+        if event.get_organizer() != user_id and not (user and user.get_type() == 'admin'):
+            raise Event.EventError.NotOrganizer()
+
+        if format not in EventController.ROSTER_FORMATS:
+            raise Event.EventError.InvalidExport('invalid_format')
+
+        columns = columns or list(Registration.ROSTER_COLUMNS)
+        if any(column not in Registration.ROSTER_COLUMNS for column in columns):
+            raise Event.EventError.InvalidExport('invalid_column')
+
+        try:
+            since : datetime = datetime.fromisoformat(registered_since) if registered_since else None
+        except ValueError:
+            raise Event.EventError.InvalidExport('invalid_registered_since')
+
+        chunks : Iterator[list[tuple]] = Registration.stream_roster(event_id, columns, since, int(Controller.get_setting('ROSTER_CHUNK_SIZE', 1000)))
+        if format == 'csv':
+            return EventController.__roster_csv(columns, chunks)
+        return EventController.__roster_ndjson(columns, chunks)
+
+    def __roster_csv( columns : list[str], chunks : Iterator[list[tuple]] ) -> Iterator[str]:
+        buffer : io.StringIO = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield buffer.getvalue()
+
+    def __roster_ndjson( columns : list[str], chunks : Iterator[list[tuple]] ) -> Iterator[str]:
+        for rows in chunks:
+            yield ''.join(
+                json.dumps({ column : value.isoformat() if isinstance(value, datetime) else value for column, value in zip(columns, row) }) + '\n'
+                for row in rows
+            )
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from threading import Lock
+
+import itertools
+
+
+class FakeCalendarService:
+    """
+    Local stand-in for the googleapiclient Calendar v3 service.
+    Supports the calls the controllers make (calendars().insert, acl().insert and batch
+    requests) and keeps everything in memory. 'requests' counts HTTP round trips, and
+    'failures' makes the next N round trips raise, to exercise retries.
+    """
+
+    class HttpError(Exception):
+        pass
+
+    class __Request:
+        def __init__(self, service : FakeCalendarService, action):
+            self.__service  = service
+            self.__action   = action
+
+        def execute(self):
+            return self.__service._execute(self.__action)
+
+        def _run(self):
+            return self.__action()
+
+    class __Collection:
+        def __init__(self, service : FakeCalendarService, name : str):
+            self.__service  = service
+            self.__name     = name
+
+        def insert(self, body : dict, calendarId : str = None):
+            if self.__name == 'calendars':
+                return self.__service._request(lambda: self.__service._insert_calendar(body))
+            return self.__service._request(lambda: self.__service._insert_acl(calendarId, body))
+
+    class __BatchRequest:
+        def __init__(self, service : FakeCalendarService, callback):
+            self.__service  = service
+            self.__callback = callback
+            self.__requests : list = []
+
+        def add(self, request, request_id : str = None, callback = None):
+            self.__requests.append((request_id or str(len(self.__requests) + 1), request, callback or self.__callback))
+
+        def execute(self):
+            # The whole batch is one HTTP round trip, each item still succeeds or fails on its own
+            self.__service._execute(lambda: None)
+            for request_id, request, callback in self.__requests:
+                try:
+                    response, exception = request._run(), None
+                except Exception as e:
+                    response, exception = None, e
+                if callback:
+                    callback(request_id, response, exception)
+
+    def __init__(self, failures : int = 0):
+        self.calendars_by_id    : dict[str, dict]       = {}
+        self.acl_rules          : dict[str, list[dict]] = {}
+        self.requests           : int                   = 0
+        self.failures           : int                   = failures
+        self.__ids                                      = itertools.count(1)
+        self.__lock             : Lock                  = Lock()
+
+    def calendars(self):
+        return FakeCalendarService.__Collection(self, 'calendars')
+
+    def acl(self):
+        return FakeCalendarService.__Collection(self, 'acl')
+
+    def new_batch_http_request(self, callback = None):
+        return FakeCalendarService.__BatchRequest(self, callback)
+
+    def _request(self, action):
+        return FakeCalendarService.__Request(self, action)
+
+    def _execute(self, action):
+        with self.__lock:
+            self.requests += 1
+            if self.failures > 0:
+                self.failures -= 1
+                raise FakeCalendarService.HttpError('backend_error')
+            return action()
+
+    def _insert_calendar(self, body : dict) -> dict:
+        calendar_id : str = f'fake-{next(self.__ids)}@group.calendar.google.com'
+        self.calendars_by_id[calendar_id] = dict(body, id=calendar_id)
+        self.acl_rules[calendar_id] = []
+        return self.calendars_by_id[calendar_id]
+
+    def _insert_acl(self, calendar_id : str, body : dict) -> dict:
+        if calendar_id not in self.calendars_by_id:
+            raise FakeCalendarService.HttpError('calendar_not_found')
+
+        # Google keys ACL rules by scope, inserting the same scope again replaces the rule
+        rule_id : str = f"{body['scope']['type']}:{body['scope'].get('value', '')}"
+        rules   : list = [rule for rule in self.acl_rules[calendar_id] if rule['id'] != rule_id]
+        rules.append(dict(body, id=rule_id))
+        self.acl_rules[calendar_id] = rules
+        return rules[-1]
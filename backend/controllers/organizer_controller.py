@@ -1,4 +1,5 @@
-from models import Organizer, Event, SponsorshipRequest, db, Stakeholder
+from models import Organizer, Event, SponsorshipRequest, db, Stakeholder, RegistrationDailyStats
+from controllers import CacheController, PaymentController
 
 from datetime import datetime
 
@@ -31,6 +32,117 @@ class OrganizerController:
 
 
         return [event.get_data()]
+
+    def get_analytics( user_id : int, group_by : str = 'day' ) -> dict:
+        """
+        Analytics of every event of the organizer, from one query on the daily rollup and
+        array operations over all of its rows, so hundreds of events cost the same few passes.
+        Time to sellout counts the days from the first registration to the day the net
+        registrations reached the capacity.
+        """
+        # Imported here so that numpy stays out of the app's startup
+        import numpy as np
+
+        if group_by not in RegistrationDailyStats.GROUPS:
+            group_by = 'day'
+
+        events : list[Event] = Event.find_all_by_organizer(user_id)
+        rows : list[tuple] = RegistrationDailyStats.find_by_organizer(user_id)
+
+        position        : dict[int, int]    = { event.id : i for i, event in enumerate(events) }
+        rows                                = [ row for row in rows if row[0] in position ]
+        capacity        : np.ndarray        = np.array([ event.get_capacity() for event in events ], dtype=np.int64)
+        registered      : np.ndarray        = np.array([ event.get_registered_count() for event in events ], dtype=np.int64)
+
+        event_ids, days, registrations, cancellations, revenue = zip(*rows) if rows else ((), (), (), (), ())
+        event_index     : np.ndarray        = np.array([ position[event_id] for event_id in event_ids ], dtype=np.int64)
+        days            : np.ndarray        = np.array(days, dtype='datetime64[D]')
+        registrations   : np.ndarray        = np.array(registrations, dtype=np.int64)
+        cancellations   : np.ndarray        = np.array(cancellations, dtype=np.int64)
+        revenue         : np.ndarray        = np.array(revenue, dtype=np.float64) * PaymentController.TAX_FACTOR
+
+        # Rows come ordered by event then day, so every event is one contiguous run
+        n               : int               = len(rows)
+        event_start     : np.ndarray        = np.flatnonzero(np.diff(event_index, prepend=-1))
+        run_length      : np.ndarray        = np.diff(np.append(event_start, n))
+
+        # Cumulative net registrations, restarted at the first row of every event
+        net             : np.ndarray        = registrations - cancellations
+        cumulative      : np.ndarray        = np.cumsum(net)
+        cumulative     -= np.repeat(cumulative[event_start] - net[event_start], run_length)
+
+        # First row where the event is full, n for the events that never were
+        count           : int               = len(events)
+        sold_out_row    : np.ndarray        = np.minimum.reduceat(np.where(cumulative >= capacity[event_index], np.arange(n), n), event_start)
+        sold_out        : np.ndarray        = sold_out_row < n
+        sold_out_events : np.ndarray        = event_index[event_start][sold_out]
+        sellout_on      : np.ndarray        = np.full(count, np.datetime64('NaT'), dtype='datetime64[D]')
+        sellout_on[sold_out_events]         = days[sold_out_row[sold_out]]
+        sellout_after   : np.ndarray        = np.full(count, -1, dtype=np.int64)
+        sellout_after[sold_out_events]      = (days[sold_out_row[sold_out]] - days[event_start[sold_out]]).astype(np.int64)
+
+        # Buckets of the requested size; weeks start on Monday, and 1970-01-01 was a Thursday
+        if group_by == 'week':
+            buckets : np.ndarray = days - (days.astype(np.int64) + 3) % 7
+        elif group_by == 'month':
+            buckets : np.ndarray = days.astype('datetime64[M]').astype('datetime64[D]')
+        else:
+            buckets : np.ndarray = days
+
+        bucket_key      : np.ndarray        = buckets.astype(np.int64)
+        bucket_start    : np.ndarray        = np.flatnonzero(np.diff(event_index, prepend=-1) | np.diff(bucket_key, prepend=-1))
+        bucket_end      : np.ndarray        = np.flatnonzero(np.diff(event_index, append=-1) | np.diff(bucket_key, append=-1))
+        bucket_event    : np.ndarray        = event_index[bucket_start]
+        bucket_dates    : list[str]         = np.datetime_as_string(buckets[bucket_start]).tolist()
+        bucket_registrations : list[int]    = np.add.reduceat(registrations, bucket_start).tolist()
+        bucket_cancellations : list[int]    = np.add.reduceat(cancellations, bucket_start).tolist()
+        bucket_revenue  : list[float]       = np.round(np.add.reduceat(revenue, bucket_start), 2).tolist()
+        bucket_cumulative : list[int]       = cumulative[bucket_end].tolist()
+
+        # Per event totals, with zeros for the events nobody registered to
+        total_registrations : np.ndarray    = np.bincount(event_index, weights=registrations, minlength=count).astype(np.int64)
+        total_cancellations : np.ndarray    = np.bincount(event_index, weights=cancellations, minlength=count).astype(np.int64)
+        total_revenue   : np.ndarray        = np.round(np.bincount(event_index, weights=revenue, minlength=count), 2)
+        fill_rate       : np.ndarray        = np.round(np.divide(registered, capacity, out=np.zeros(count), where=capacity > 0), 4)
+
+        bounds : list[int] = np.searchsorted(bucket_event, np.arange(count + 1)).tolist()
+
+        return {
+            'group_by'  : group_by,
+            'events'    : [
+                {
+                    'event_id'              : event.id,
+                    'title'                 : event.get_title(),
+                    'start'                 : event.get_start().isoformat(),
+                    'capacity'              : int(capacity[i]),
+                    'registered'            : int(registered[i]),
+                    'fill_rate'             : float(fill_rate[i]),
+                    'registrations'         : int(total_registrations[i]),
+                    'cancellations'         : int(total_cancellations[i]),
+                    'gross_revenue'         : float(total_revenue[i]),
+                    'sold_out_on'           : str(sellout_on[i]) if sellout_after[i] >= 0 else None,
+                    'days_to_sellout'       : int(sellout_after[i]) if sellout_after[i] >= 0 else None,
+                    'registrations_over_time' : {
+                        'date'          : bucket_dates[bounds[i]:bounds[i + 1]],
+                        'registrations' : bucket_registrations[bounds[i]:bounds[i + 1]],
+                        'cancellations' : bucket_cancellations[bounds[i]:bounds[i + 1]],
+                        'cumulative'    : bucket_cumulative[bounds[i]:bounds[i + 1]],
+                        'gross_revenue' : bucket_revenue[bounds[i]:bounds[i + 1]]
+                    }
+                }
+                for i, event in enumerate(events)
+            ],
+            'totals'    : {
+                'events'        : count,
+                'capacity'      : int(capacity.sum()),
+                'registered'    : int(registered.sum()),
+                'fill_rate'     : round(float(registered.sum() / capacity.sum()), 4) if capacity.sum() else 0.0,
+                'registrations' : int(total_registrations.sum()),
+                'cancellations' : int(total_cancellations.sum()),
+                'gross_revenue' : round(float(total_revenue.sum()), 2),
+                'sold_out'      : int(sold_out.sum())
+            }
+        }
     
 
     @staticmethod
@@ -55,5 +167,6 @@ class OrganizerController:
     
         db.session.add(new_request)
         db.session.commit()
+        CacheController.invalidate_event(event_id)
 
         return "Sponsorship request sent successfully!"
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from collections    import deque
+from threading      import BoundedSemaphore, Lock, local
+from typing         import Callable
+
+import time
+
+
+class CircuitBreaker:
+    """
+    Opens after 'failure_threshold' consecutive failures and fails fast for 'reset_timeout'
+    seconds, then lets a single trial call through (half open) to decide whether to close.
+    """
+
+    CLOSED      : str = "closed"
+    OPEN        : str = "open"
+    HALF_OPEN   : str = "half_open"
+
+    def __init__(self, failure_threshold : int = 5, reset_timeout : float = 30):
+        self.failure_threshold  : int   = failure_threshold
+        self.reset_timeout      : float = reset_timeout
+        self.__state            : str   = CircuitBreaker.CLOSED
+        self.__failures         : int   = 0
+        self.__opened_at        : float = 0
+        self.__trial_running    : bool  = False
+        self.__lock             : Lock  = Lock()
+
+    def get_state(self) -> str:
+        with self.__lock:
+            if self.__state == CircuitBreaker.OPEN and time.monotonic() - self.__opened_at >= self.reset_timeout:
+                return CircuitBreaker.HALF_OPEN
+            return self.__state
+
+    def allow(self) -> bool:
+        with self.__lock:
+            if self.__state == CircuitBreaker.CLOSED:
+                return True
+
+            if time.monotonic() - self.__opened_at < self.reset_timeout or self.__trial_running:
+                return False
+
+            self.__state            = CircuitBreaker.HALF_OPEN
+            self.__trial_running    = True
+            return True
+
+    def record_success(self) -> None:
+        with self.__lock:
+            self.__state            = CircuitBreaker.CLOSED
+            self.__failures         = 0
+            self.__trial_running    = False
+
+    def record_failure(self) -> None:
+        with self.__lock:
+            self.__failures        += 1
+            self.__trial_running    = False
+
+            if self.__state == CircuitBreaker.HALF_OPEN or self.__failures >= self.failure_threshold:
+                self.__state        = CircuitBreaker.OPEN
+                self.__opened_at    = time.monotonic()
+
+
+class OutboundClient:
+    """
+    Guards every call to one external provider: at most 'max_concurrency' calls in flight
+    (callers wait up to 'acquire_timeout' for a slot), a circuit breaker, and latency metrics.
+    The transport itself (connection pool, per-call timeout) belongs to the provider library,
+    see Controller.__init_outbound.
+    """
+
+    def __init__(self, provider : str, timeout : float = 10, max_concurrency : int = 10, acquire_timeout : float = 1, breaker : CircuitBreaker = None):
+        self.provider           : str               = provider
+        self.timeout            : float             = timeout
+        self.acquire_timeout    : float             = acquire_timeout
+        self.max_concurrency    : int               = max_concurrency
+        self.breaker            : CircuitBreaker    = breaker or CircuitBreaker()
+        self.__slots            : BoundedSemaphore  = BoundedSemaphore(max_concurrency)
+        self.__latencies        : deque             = deque(maxlen=1000)
+        self.__counters         : dict[str, int]    = {'calls' : 0, 'failures' : 0, 'rejected' : 0}
+        self.__lock             : Lock              = Lock()
+
+    def __count(self, name : str) -> None:
+        with self.__lock:
+            self.__counters[name] += 1
+
+    def call(self, function : Callable, *args, is_failure : Callable[[object], bool] = None, **kwargs):
+        """
+        Run function(*args, **kwargs) under the guard. Exceptions count as failures, and so
+        does any result for which is_failure returns True (e.g. an HTTP 5xx).
+        :raises OutboundController.OutboundError.Unavailable: When the breaker is open
+        :raises OutboundController.OutboundError.Busy: When no slot frees up within acquire_timeout
+        """
+        if not self.breaker.allow():
+            self.__count('rejected')
+            raise OutboundController.OutboundError.Unavailable(self.provider)
+
+        if not self.__slots.acquire(timeout=self.acquire_timeout):
+            self.__count('rejected')
+            # A trial call that never ran must not leave the breaker half open forever
+            if self.breaker.get_state() == CircuitBreaker.HALF_OPEN:
+                self.breaker.record_failure()
+            raise OutboundController.OutboundError.Busy(self.provider)
+
+        start : float = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            self.__count('failures')
+            raise
+        finally:
+            self.__slots.release()
+            with self.__lock:
+                self.__counters['calls'] += 1
+                self.__latencies.append((time.perf_counter() - start) * 1000)
+
+        if is_failure and is_failure(result):
+            self.breaker.record_failure()
+            self.__count('failures')
+        else:
+            self.breaker.record_success()
+
+        return result
+
+    def get_metrics(self) -> dict:
+        with self.__lock:
+            latencies   : list[float]       = sorted(self.__latencies)
+            counters    : dict[str, int]    = dict(self.__counters)
+
+        def percentile(p : float) -> float:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+        return {
+            **counters,
+            'breaker'           : self.breaker.get_state(),
+            'latency_ms_p50'    : percentile(0.50),
+            'latency_ms_p95'    : percentile(0.95),
+            'latency_ms_p99'    : percentile(0.99)
+        }
+
+
+def stripe_http_client(outbound : OutboundClient):
+    """
+    A stripe HTTP client whose requests go through 'outbound'. Sessions are kept per thread
+    by stripe.RequestsClient, so connections are reused with keep-alive.
+    """
+    import stripe
+
+    class GuardedStripeClient(stripe.RequestsClient):
+        def request(self, method, url, headers, post_data=None):
+            return outbound.call(super().request, method, url, headers, post_data, is_failure=lambda response: response[1] >= 500)
+
+    return GuardedStripeClient(timeout=outbound.timeout)
+
+
+class GoogleHttp:
+    """
+    httplib2 transport for googleapiclient whose requests go through 'outbound'.
+    httplib2.Http is not thread safe, so each thread (request threads, calendar workers)
+    gets its own authorized connection, kept alive between calls.
+    """
+
+    def __init__(self, outbound : OutboundClient, credentials):
+        self.outbound       : OutboundClient = outbound
+        self.credentials                     = credentials
+        self.__local        : local          = local()
+
+    def __http(self):
+        if getattr(self.__local, 'http', None) is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            self.__local.http = AuthorizedHttp(self.credentials, http=httplib2.Http(timeout=self.outbound.timeout))
+        return self.__local.http
+
+    def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+        return self.outbound.call(self.__http().request, uri, method, body, headers, *args, is_failure=lambda result: result[0].status >= 500, **kwargs)
+
+    def close(self):
+        if getattr(self.__local, 'http', None) is not None:
+            self.__local.http.close()
+            self.__local.http = None
+
+
+class OutboundController:
+
+    class OutboundError(Exception):
+
+        class Unavailable(Exception):
+            HTTP_code = 503
+            def __init__(self, provider : str):
+                super().__init__(f"{provider}_unavailable")
+
+        class Busy(Exception):
+            HTTP_code = 503
+            def __init__(self, provider : str):
+                super().__init__(f"{provider}_busy")
+
+    clients : dict[str, OutboundClient] = {}
+
+    def register( client : OutboundClient ) -> OutboundClient:
+        OutboundController.clients[client.provider] = client
+        return client
+
+    def get_metrics() -> dict[str, dict]:
+        return { provider : client.get_metrics() for provider, client in OutboundController.clients.items() }
@@ -1,10 +1,19 @@
 
+from __future__             import annotations
+
 from .controller            import Controller
-from models                 import Attendee
-import stripe
+from models                 import Attendee, Event, PaymentIntent, StripeWebhookEvent, UnitOfWork
+from datetime               import datetime, timedelta
+from threading              import Thread, Event as ThreadEvent
+from flask                  import current_app
 
 class PaymentController:
 
+    # GST and QST, charged on top of the registration fee
+    TAX_FACTOR          : float         = 1.14975
+
+    __stop              : ThreadEvent   = ThreadEvent()
+
     class PaymentError(Exception):
         class InvalidClientSecret(Exception):
             def __init__(self, message : str = 'invalid_client_secret'):
@@ -18,24 +27,60 @@ class PaymentController:
             def __init__(self, message : str = 'invalid_event'):
                 super().__init__(message)
 
+        class InvalidSignature(Exception):
+            HTTP_code = 400
+            def __init__(self, message : str = 'invalid_signature'):
+                super().__init__(message)
+
     def get_public_key() -> str:
         return Controller.stripe_public_key
     
 
-    def create_stripe_customer ( first_name : str, last_name : str, email : str ):
-        stripe_customer : stripe.Customer = stripe.Customer.create( email = email, name = f'{first_name} {last_name}')
+    def create_stripe_customer ( first_name : str, last_name : str, email : str, idempotency_key : str = None ):
+        stripe = Controller.get_stripe()
+        stripe_customer : stripe.Customer = stripe.Customer.create( email = email, name = f'{first_name} {last_name}', idempotency_key = idempotency_key )
         if not stripe_customer:
             ...
 
         return stripe_customer.id
+
+    def get_stripe_customer( attendee : Attendee ) -> str:
+        stripe_customer_id : str = attendee.get_customer_id()
+        if stripe_customer_id:
+            return stripe_customer_id
+
+        # Concurrent first payments send the same idempotency key, so Stripe hands back one
+        # customer; claim_customer_id keeps the database consistent if they still differ.
+        stripe_customer_id = PaymentController.create_stripe_customer(
+            first_name      = attendee.get_first_name(),
+            last_name       = attendee.get_last_name(),
+            email           = attendee.get_email(),
+            idempotency_key = f'customer-{attendee.get_id()}'
+        )
+        return attendee.claim_customer_id(stripe_customer_id)
     
     def create_payment_intent( amount : float, event_id : int, user_id : int ) -> str:
+        stripe = Controller.get_stripe()
+
+        formatted_amount    : int       = int(amount * PaymentController.TAX_FACTOR * 100)
+
+        # Double clicks, reloads and retries pay the intent they already have
+        open_intent : PaymentIntent = PaymentIntent.find_open(user_id, event_id)
+        if open_intent:
+            if open_intent.amount == formatted_amount:
+                # A failed payment gave its seat back, the retry needs one again
+                with UnitOfWork():
+                    open_intent.hold_seat()
+                return open_intent.client_secret
+
+            # The fee changed since, the old amount must not be payable anymore
+            PaymentController.cancel_payment_intent(open_intent)
         
         attendee            : Attendee  = Attendee.find(user_id)
-        stripe_customer_id  : str       = attendee.get_customer_id()
+        stripe_customer_id  : str       = PaymentController.get_stripe_customer(attendee)
         
-
-        formatted_amount    : int       = int(amount * 1.14975 * 100)
+        # Concurrent first clicks share the key, so Stripe creates a single intent for them
+        idempotency_key     : str       = f'payment-intent-{user_id}-{event_id}-{formatted_amount}-{PaymentIntent.count(user_id, event_id)}'
         
         payment_intent : stripe.PaymentIntent = stripe.PaymentIntent.create(
             amount                  = formatted_amount,
@@ -45,31 +90,194 @@ class PaymentController:
             metadata                = {
                 "user_id"   : user_id,
                 "event_id"  : event_id
-            }
+            },
+            idempotency_key         = idempotency_key
         )
 
+        local_intent : PaymentIntent = PaymentIntent.add(PaymentController.__to_local(payment_intent))
+
+        # The seat stays held until the payment succeeds, fails or the sweeper cancels the
+        # checkout, so nobody pays for a seat that is gone by the time the payment lands
+        try:
+            with UnitOfWork():
+                local_intent.hold_seat()
+        except Event.EventError.Full:
+            PaymentController.cancel_payment_intent(local_intent)
+            raise
+
         return payment_intent.client_secret
+
+    def cancel_payment_intent( payment_intent : PaymentIntent ) -> None:
+        stripe = Controller.get_stripe()
+
+        try:
+            stripe.PaymentIntent.cancel(payment_intent.id)
+            status : str = PaymentIntent.CANCELED
+        except stripe.InvalidRequestError:
+            # Already succeeded or canceled on Stripe's side, take its word for it
+            status = stripe.PaymentIntent.retrieve(payment_intent.id).status
+
+        with UnitOfWork():
+            payment_intent.set_status(status)
+            # A payment that went through keeps its seat for the registration
+            if status != PaymentIntent.SUCCEEDED:
+                payment_intent.release_seat()
+
+    def sweep_stale_payment_intents( max_age : timedelta = None, limit : int = 100 ) -> int:
+        """
+        Cancel intents that were never paid, so abandoned checkouts do not stay payable.
+        :return: The number of intents swept
+        """
+        stripe = Controller.get_stripe()
+        stale : list[PaymentIntent] = PaymentIntent.find_stale(datetime.now() - (Controller.payment_intent_ttl if max_age is None else max_age), limit)
+
+        for payment_intent in stale:
+            try:
+                PaymentController.cancel_payment_intent(payment_intent)
+            except stripe.StripeError:
+                # Left open, the next sweep tries again
+                current_app.logger.exception(f'Failed to cancel payment intent {payment_intent.id}')
+
+        return len(stale)
+
+    def refund_payment_intent( payment_intent : PaymentIntent ) -> None:
+        """
+        Give back a payment that succeeded after the event filled up, and the seat it held.
+        When Stripe cannot be reached the intent is left REFUND_REQUIRED for the sweeper to
+        try again; the idempotency key makes sure the buyer is refunded only once.
+        """
+        stripe = Controller.get_stripe()
+
+        try:
+            stripe.Refund.create(payment_intent = payment_intent.id, idempotency_key = f'refund-{payment_intent.id}')
+            status : str = PaymentIntent.REFUNDED
+        except stripe.StripeError as e:
+            if e.code == 'charge_already_refunded':
+                # Refunded by hand from the dashboard in the meantime
+                status = PaymentIntent.REFUNDED
+            else:
+                # The buyer is owed the money until a retry goes through
+                status = PaymentIntent.REFUND_REQUIRED
+                current_app.logger.exception(f'Failed to refund payment intent {payment_intent.id}, left {PaymentIntent.REFUND_REQUIRED}')
+
+        with UnitOfWork():
+            payment_intent.set_status(status)
+            payment_intent.release_seat()
+
+    def retry_refunds( limit : int = 100 ) -> int:
+        """
+        Try again the refunds Stripe could not be asked for, see refund_payment_intent.
+        :return: The number of refunds retried
+        """
+        refund_required : list[PaymentIntent] = PaymentIntent.find_refund_required(limit)
+
+        for payment_intent in refund_required:
+            PaymentController.refund_payment_intent(payment_intent)
+
+        return len(refund_required)
+
+    def __sweep( app, interval : float ) -> None:
+        while not PaymentController.__stop.wait(interval):
+            try:
+                with app.app_context():
+                    PaymentController.sweep_stale_payment_intents()
+                    PaymentController.retry_refunds()
+            except Exception:
+                app.logger.exception('Payment intent sweeper error')
+
+    def start_sweeper( app, interval : float ) -> None:
+        PaymentController.__stop.clear()
+        Thread(target=PaymentController.__sweep, args=(app, interval), daemon=True).start()
+
+    def stop_sweeper() -> None:
+        PaymentController.__stop.set()
+
+    def __to_local( payment_intent : stripe.PaymentIntent ) -> PaymentIntent:
+        return PaymentIntent(
+            id              = payment_intent.id,
+            attendee_id     = int(payment_intent.metadata['user_id']),
+            event_id        = int(payment_intent.metadata['event_id']),
+            amount          = payment_intent.amount,
+            client_secret   = payment_intent.client_secret,
+            status          = payment_intent.status
+        )
     
-    def confirm_registration( user_id : int, event_id : int,  client_secret : str):
+    def confirm_registration( user_id : int, event_id : int,  client_secret : str) -> PaymentIntent:
+        """
+        The attendee's payment for the event, up to date.
+        """
+        stripe = Controller.get_stripe()
+
         try:
             payment_intent_id : str = client_secret.split('_secret_')[0]
         except:
             raise PaymentController.PaymentError.InvalidClientSecret()
 
-        payment_intent  : stripe.PaymentIntent  = stripe.PaymentIntent.retrieve(payment_intent_id)
-        metadata        : stripe.StripeObject   = payment_intent.metadata
+        payment_intent : PaymentIntent = PaymentIntent.find(payment_intent_id)
+
+        # With the webhook configured the local row is the source of truth, Stripe is only
+        # asked about intents we have never seen or when there is no webhook to tell us.
+        if not payment_intent or (not payment_intent.is_final() and not Controller.stripe_webhook_secret):
+            payment_intent = PaymentIntent.add(PaymentController.__to_local(stripe.PaymentIntent.retrieve(payment_intent_id)))
 
-        print(payment_intent)
-        if user_id != int(metadata['user_id']):
+        if user_id != payment_intent.attendee_id:
             raise PaymentController.PaymentError.InvalidUser()
 
-        if event_id != int(metadata['event_id']):
+        if event_id != payment_intent.event_id:
             raise PaymentController.PaymentError.InvalidEvent()
-        
-        status : str = payment_intent.status
-        print(status)
 
-        if status == 'succeeded':
-            return True
+        return payment_intent
+
+    def handle_webhook( payload : bytes, signature : str ) -> None:
+        """
+        Verify a Stripe webhook delivery, record the payment outcome and register the attendee
+        once the payment succeeded. Deliveries are deduplicated on the Stripe event id, and the
+        id is only recorded once handling succeeded so that Stripe retries failed deliveries.
+        :param payload: The raw request body, exactly as Stripe sent it
+        :param signature: The Stripe-Signature header
+        """
+        from controllers import EventController
+
+        stripe = Controller.get_stripe()
+
+        try:
+            stripe_event : stripe.Event = stripe.Webhook.construct_event(payload, signature, Controller.stripe_webhook_secret)
+        except (ValueError, stripe.SignatureVerificationError):
+            raise PaymentController.PaymentError.InvalidSignature()
+
+        if StripeWebhookEvent.is_processed(stripe_event.id):
+            return
+
+        if stripe_event.type in ('payment_intent.succeeded', 'payment_intent.payment_failed'):
+            stripe_payment_intent   : stripe.PaymentIntent  = stripe_event.data.object
+            payment_intent          : PaymentIntent         = PaymentIntent.find(stripe_payment_intent.id) or PaymentController.__to_local(stripe_payment_intent)
+
+            if payment_intent.is_refunded():
+                # Already given back, the refund is not undone by a late delivery
+                pass
+
+            elif not Attendee.find(payment_intent.attendee_id) or not Event.find(payment_intent.event_id):
+                # The attendee or the event was deleted during the checkout, so there is nobody to
+                # register. A failed refund fails the delivery and Stripe sends it again.
+                if stripe_event.type == 'payment_intent.succeeded':
+                    stripe.Refund.create(payment_intent = payment_intent.id, idempotency_key = f'refund-{payment_intent.id}')
+
+            elif stripe_event.type == 'payment_intent.payment_failed':
+                payment_intent.status   = PaymentIntent.FAILED
+                payment_intent          = PaymentIntent.add(payment_intent)
+
+                # Registering again holds a new seat for the retry
+                with UnitOfWork():
+                    payment_intent.release_seat()
+
+            else:
+                payment_intent.status   = PaymentIntent.SUCCEEDED
+                payment_intent          = PaymentIntent.add(payment_intent)
+
+                try:
+                    EventController.complete_paid_registration(payment_intent)
+                except Event.EventError.Full:
+                    # Refunded by complete_paid_registration, retrying would not free a seat
+                    pass
 
-        return False
+        StripeWebhookEvent.mark_processed(stripe_event.id, stripe_event.type)
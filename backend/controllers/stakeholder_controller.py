@@ -1,7 +1,12 @@
 from models.request_sponserships import SponsorshipRequest
 from models.users.organizer import Organizer
-from models import Event, Stakeholder, User, db 
-from controllers import CalendarController
+from models import Event, Stakeholder, User, db, UnitOfWork
+from controllers import Controller, CalendarController, CacheController
+
+from datetime import datetime
+
+import base64
+import json
 
 class StakeholderController:
 
@@ -22,9 +27,11 @@ class StakeholderController:
         if event.get_sponsor():
             raise Event.EventError.AlreadySponsored()
 
-        # Set the sponsor (stakeholder) to the event
-        event.set_sponsor(stakeholder.get_id())
-        CalendarController.share_calendar(event.get_calendar(),stakeholder.get_email())
+        # Set the sponsor (stakeholder) to the event, and queue the calendar share with it
+        with UnitOfWork():
+            event.set_sponsor(stakeholder.get_id())
+            CalendarController.enqueue_share_calendar(event.get_id(), stakeholder.get_email())
+        CacheController.invalidate_event(event_id)
 
         return {"status": "sponsored", "event_id": event_id}
 
@@ -41,7 +48,9 @@ class StakeholderController:
         if event.get_sponsor() != stakeholder.get_id():
             raise Event.EventError.NotSponsoredByUser()
 
-        event.remove_sponsor()
+        with UnitOfWork():
+            event.remove_sponsor()
+        CacheController.invalidate_event(event_id)
 
         return {"status": "sponsorship cancelled", "event_id": event_id}
 
@@ -60,46 +69,117 @@ class StakeholderController:
         stakeholders = Stakeholder.query.all()
         return stakeholders
     
-    def get_sponsored_events(stakeholder_id: int):  
+    def get_sponsored_events(stakeholder_id: int, limit: int = None, cursor: str = None, when: str = None) -> dict:
+        """
+        Events sponsored by the stakeholder and totals over all of them (events, upcoming,
+        past, registrations reached). Every event is returned unless a limit or cursor is given.
+        :param when: 'upcoming', 'past' or None for both
+        """
         stakeholder = Stakeholder.find(stakeholder_id)
         if not stakeholder:
             raise User.UserError.NotFound()
-    
-
-        all_events = Event.find()
-        sponsored_events = [event for event in all_events if event.get_sponsor() == stakeholder_id]
-
-        events_data = []
-        for event in sponsored_events:
-            events_data.append(event.get_data())
-    
-        return events_data
-    
 
-    def get_sponsorship_requests(stakeholder_id: int):
+        if when not in (None, 'upcoming', 'past'):
+            raise Exception("Unknown sponsored events filter")
+
+        now : datetime = datetime.now()
+        paged : bool = bool(limit or cursor)
+
+        if paged:
+            if not limit or limit <= 0:
+                limit = Controller.event_page_size
+            limit = min(limit, Controller.event_page_size_max)
+
+        after : tuple[datetime, int] = StakeholderController.__decode_event_cursor(cursor) if cursor else None
+
+        # One extra row tells us whether there is a next page
+        events : list[Event] = Event.find_sponsored(stakeholder_id, limit + 1 if paged else None, after, when, now)
+
+        next_cursor : str = None
+        if paged and len(events) > limit:
+            events      = events[:limit]
+            next_cursor = StakeholderController.__encode_event_cursor(events[-1])
+
+        return {
+            "events"        : Event.get_bulk_data(events),
+            "next_cursor"   : next_cursor,
+            "totals"        : Event.get_sponsor_totals(stakeholder_id, now)
+        }
+
+    def __encode_event_cursor( event : Event ) -> str:
+        key : str = json.dumps([event.get_start().isoformat(), event.get_id()])
+        return base64.urlsafe_b64encode(key.encode('utf-8')).decode('utf-8')
+
+    def __decode_event_cursor( cursor : str ) -> tuple[datetime, int]:
+        try:
+            start, event_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            return datetime.fromisoformat(start), int(event_id)
+        except Exception:
+            raise Event.EventError.InvalidCursor()
+
+    def get_sponsorship_requests(stakeholder_id: int, status: str = None, limit: int = None, cursor: str = None) -> dict:
+        """
+        The stakeholder's sponsorship requests, pending ones unless asked otherwise, newest
+        first, from a single joined query per page.
+        :param cursor: next_cursor of the previous page
+        """
         stakeholder = Stakeholder.find(stakeholder_id)
         if not stakeholder:
             raise User.UserError.NotFound()
-    
-    
-        requests = SponsorshipRequest.query.filter_by(
-        stakeholder_id=stakeholder_id,
-        status="pending"
-        ).all()
-    
+
+        status = (status or SponsorshipRequest.PENDING).upper()
+        if status not in SponsorshipRequest.STATUSES:
+            raise Exception("Unknown sponsorship request status")
+
+        if not limit or limit <= 0:
+            limit = Controller.event_page_size
+        limit = min(limit, Controller.event_page_size_max)
+
+        before_id : int = StakeholderController.__decode_cursor(cursor) if cursor else None
+
+        # One extra row tells us whether there is a next page
+        rows = SponsorshipRequest.find_inbox(stakeholder_id, status, limit + 1, before_id)
+
+        next_cursor : str = None
+        if len(rows) > limit:
+            rows        = rows[:limit]
+            next_cursor = StakeholderController.__encode_cursor(rows[-1].id)
+
         requests_data = []
-        for request in requests:
-            event = Event.find(request.event_id)
-            organizer = Organizer.find(event.get_organizer())
-        
+        for row in rows:
+            organizer_name : str = f"{row.first_name} {row.last_name}"
             requests_data.append({
-                "id": request.id,
-                "event": event.get_data(),
-                "organizer_name": f"{organizer.get_first_name()} {organizer.get_last_name()}",
-                # "requested_at": str(request.created_at)
+                "id": row.id,
+                "status": row.status,
+                "event": {
+                    "id"                : row.event_id,
+                    "title"             : row.title,
+                    "description"       : row.description,
+                    "category"          : row.category,
+                    "location"          : row.location,
+                    "start"             : str(row.start),
+                    "end"               : str(row.end),
+                    "capacity"          : row.capacity,
+                    "registrations"     : row.registered_count,
+                    "event_type"        : row.event_type,
+                    "organizer_name"    : organizer_name,
+                    "organization_name" : row.organization_name,
+                    "fee"               : row.registration_fee
+                },
+                "organizer_name": organizer_name,
             })
-    
-        return requests_data
+
+        return {"requests": requests_data, "next_cursor": next_cursor}
+
+    def __encode_cursor( request_id : int ) -> str:
+        return base64.urlsafe_b64encode(json.dumps([request_id]).encode('utf-8')).decode('utf-8')
+
+    def __decode_cursor( cursor : str ) -> int:
+        try:
+            request_id, = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            return int(request_id)
+        except Exception:
+            raise Event.EventError.InvalidCursor()
 
     def accept_sponsorship_request(stakeholder_id: int, request_id: int, event_id: int):
         stakeholder = Stakeholder.find(stakeholder_id)
@@ -114,11 +194,10 @@ class StakeholderController:
         if not event:
             raise Event.EventError.NotFound()
     
-        request.status = "ACCEPTED"
-    
-        event.set_sponsor(stakeholder_id)
-    
-        db.session.commit()
+        with UnitOfWork():
+            request.status = SponsorshipRequest.ACCEPTED
+            event.set_sponsor(stakeholder_id)
+        CacheController.invalidate_event(event_id)
     
         return {"status": "success", "message": "Sponsorship request accepted"}
 
@@ -131,8 +210,8 @@ class StakeholderController:
         if not request or request.stakeholder_id != stakeholder_id:
             raise Exception("Request not found or not authorized")
     
-        request.status = "REJECTED"
-    
-        db.session.commit()
+        with UnitOfWork():
+            request.status = SponsorshipRequest.REJECTED
+        CacheController.invalidate_event(request.event_id)
     
         return {"status": "success", "message": "Sponsorship request rejected"}
\ No newline at end of file
@@ -1,5 +1,14 @@
-from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity
-from models import User, Organizer
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, get_jwt
+from flask import g
+from models import User, Organizer, Event, EventSearch, UnitOfWork, PaymentIntent
+from controllers import Controller, CacheController
+from datetime import datetime
+from typing import Iterator
+
+import base64
+import csv
+import io
+import json
 
 
 class UserController:
@@ -11,30 +20,158 @@ class UserController:
         if user:
             user_id = user.get_id()
             user_type = user.get_type()  # Grab the user_type from the User object
-            token = create_access_token(identity=f'{user_id}')
+            token = create_access_token(identity=f'{user_id}', additional_claims={'user_type' : user_type})
             
             return token, user_type
     
     
     def authentication() -> User:
-        user_id = int(get_jwt_identity())
-        return User.find(user_id)
+        # Cached for the rest of the request so the user is loaded at most once
+        if 'current_user' not in g:
+            g.current_user = User.find(int(get_jwt_identity()))
+        return g.current_user
+
+    def get_identity() -> tuple[int, str]:
+        user_id     : int = int(get_jwt_identity())
+        user_type   : str = get_jwt().get('user_type')
+
+        # Tokens issued before the user_type claim existed still need a lookup
+        if user_type is None:
+            user : User = UserController.authentication()
+            if not user:
+                return None, None
+            user_type = user.get_type()
+
+        return user_id, user_type
     
-    def get_users():
-        users       : list[User] = User.find()
-        users_data  : list[dict] = []
+    USER_TYPES          : tuple[str]        = ('admin', 'attendee', 'organizer', 'stakeholder')
+    DIRECTORY_FORMATS   : dict[str, str]    = { 'csv' : 'text/csv', 'ndjson' : 'application/x-ndjson' }
 
-        for user in users:
-            users_data.append(user.get_data())
-            
-        return users_data
+    def get_users( user_type : str = None, email_prefix : str = None, created_since : str = None, created_until : str = None, sort : str = None, order : str = None, limit : int = None, cursor : str = None ) -> list[dict] | dict:
+        """
+        The admin user directory, filtered and sorted. Every matching user is returned as a list
+        unless a limit or cursor is given; pages come with the next cursor and the total count,
+        estimated past USER_COUNT_EXACT_LIMIT on databases where counting is slow.
+        :param created_since: ISO date or time of the earliest signup
+        :param created_until: ISO date or time, signups before it
+        :param order: 'asc' or 'desc'
+        """
+        filters     : dict  = UserController.__directory_filters(user_type, email_prefix, created_since, created_until)
+        sort, descending    = UserController.__directory_sort(sort, order)
+        paged       : bool  = bool(limit or cursor)
+
+        if not paged:
+            return [user.get_data() for user in User.find_directory(filters, sort, descending)]
+
+        if not limit or limit <= 0:
+            limit = Controller.event_page_size
+        limit = min(limit, Controller.event_page_size_max)
+
+        after : tuple = UserController.__decode_cursor(cursor, sort) if cursor else None
+
+        # One extra row tells us whether there is a next page
+        users : list[User] = User.find_directory(filters, sort, descending, limit + 1, after)
+
+        next_cursor : str = None
+        if len(users) > limit:
+            users       = users[:limit]
+            next_cursor = UserController.__encode_cursor(sort, users[-1])
+
+        total, total_exact = User.count_directory(filters, int(Controller.get_setting('USER_COUNT_EXACT_LIMIT', 10_000)))
+
+        return {
+            'users'         : [user.get_data() for user in users],
+            'next_cursor'   : next_cursor,
+            'total'         : total,
+            'total_exact'   : total_exact
+        }
+
+    def export_users( format : str = 'csv', columns : list[str] = None, user_type : str = None, email_prefix : str = None, created_since : str = None, created_until : str = None, sort : str = None, order : str = None ) -> Iterator[str]:
+        """
+        The directory with the same filters and sort, streamed as CSV or newline-delimited JSON.
+        Everything is checked before the first chunk, so errors still get a proper status code.
+        """
+        filters     : dict  = UserController.__directory_filters(user_type, email_prefix, created_since, created_until)
+        sort, descending    = UserController.__directory_sort(sort, order)
+
+        if format not in UserController.DIRECTORY_FORMATS:
+            raise User.UserError.InvalidDirectory('invalid_format')
+
+        columns = columns or list(User.DIRECTORY_COLUMNS)
+        if any(column not in User.DIRECTORY_COLUMNS for column in columns):
+            raise User.UserError.InvalidDirectory('invalid_column')
+
+        chunks : Iterator[list[tuple]] = User.stream_directory(filters, columns, sort, descending, int(Controller.get_setting('USER_EXPORT_CHUNK_SIZE', 1000)))
+        if format == 'csv':
+            return UserController.__export_csv(columns, chunks)
+        return UserController.__export_ndjson(columns, chunks)
+
+    def __directory_filters( user_type : str, email_prefix : str, created_since : str, created_until : str ) -> dict:
+        if user_type and user_type not in UserController.USER_TYPES:
+            raise User.UserError.InvalidDirectory('invalid_user_type')
+
+        filters : dict = { 'user_type' : user_type, 'email_prefix' : email_prefix }
+        for name, value in (('created_since', created_since), ('created_until', created_until)):
+            try:
+                filters[name] = datetime.fromisoformat(value) if value else None
+            except ValueError:
+                raise User.UserError.InvalidDirectory(f'invalid_{name}')
+
+        return filters
+
+    def __directory_sort( sort : str, order : str ) -> tuple[str, bool]:
+        sort = sort or 'id'
+        if sort not in User.DIRECTORY_SORTS:
+            raise User.UserError.InvalidDirectory('invalid_sort')
+        if order not in (None, 'asc', 'desc'):
+            raise User.UserError.InvalidDirectory('invalid_order')
+
+        return sort, order == 'desc'
+
+    def __encode_cursor( sort : str, user : User ) -> str:
+        value = user.get_data()[sort]
+        key : str = json.dumps([sort, value, user.get_id()])
+        return base64.urlsafe_b64encode(key.encode('utf-8')).decode('utf-8')
+
+    def __decode_cursor( cursor : str, sort : str ) -> tuple:
+        try:
+            cursor_sort, value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+            # A cursor only makes sense for the sort it was made with
+            if cursor_sort != sort:
+                raise ValueError()
+            return datetime.fromisoformat(value) if sort == 'created_at' else value, int(user_id)
+        except Exception:
+            raise User.UserError.InvalidDirectory('invalid_cursor')
+
+    def __export_csv( columns : list[str], chunks : Iterator[list[tuple]] ) -> Iterator[str]:
+        buffer : io.StringIO = io.StringIO()
+        writer = csv.writer(buffer)
+
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        yield buffer.getvalue()
+
+    def __export_ndjson( columns : list[str], chunks : Iterator[list[tuple]] ) -> Iterator[str]:
+        for rows in chunks:
+            yield ''.join(
+                json.dumps({ column : value.isoformat() if isinstance(value, datetime) else value for column, value in zip(columns, row) }) + '\n'
+                for row in rows
+            )
 
     def get_user(user_id):
         user : User = User.find( user_id = user_id)
         return user.get_data()
     
     def delete_user( user_id : int ):
+        Event.release_registrations(user_id)
+        PaymentIntent.remove_all(attendee_id=user_id)
         User.remove(user_id)
+        CacheController.invalidate_all()
 
     def change_password( user_id : int, password : str):
         user : User = User.find(user_id=user_id)
@@ -42,7 +179,8 @@ class UserController:
         if not user:
             raise User.UserError.NotFound()
         
-        user.set_password(password)
+        with UnitOfWork():
+            user.set_password(password)
     
     def get_profile(user_id : int):
         user : User = User.find(user_id=user_id)
@@ -52,22 +190,34 @@ class UserController:
         
         return user.get_data()
 
-    def edit_profile(user_id : int, email : str, first_name : str, last_name : str, phone_number : str = None, organization_name : str = None):
+    def edit_profile(user_id : int, email : str = None, first_name : str = None, last_name : str = None, phone_number : str = None, organization_name : str = None) -> list[str]:
+        """
+        Partial update in one transaction, see UnitOfWork.apply.
+        :return: The names of the fields that changed
+        """
+        user : User = User.find(user_id=user_id)
+        if not user:
+            raise User.UserError.NotFound()
 
-        if phone_number and organization_name:
-            user : Organizer = Organizer.find(user_id=user_id)
-            if not user:
-                User.UserError.NotFound()
+        fields : dict[str, tuple] = {
+            'email'         : (email,       user.get_email,         user.set_email      ),
+            'first_name'    : (first_name,  user.get_first_name,    user.set_first_name ),
+            'last_name'     : (last_name,   user.get_last_name,     user.set_last_name  )
+        }
 
-            user.set_organization_name(organization_name)
-            user.set_phone_number(phone_number)
-        else:
-            user : User = User.find(user_id=user_id)
-            if not user:
-                User.UserError.NotFound()
+        if isinstance(user, Organizer):
+            # Blank organizer fields have always meant "leave as is"
+            fields['organization_name'] = (organization_name or None,   user.get_organization_name, user.set_organization_name  )
+            fields['phone_number']      = (phone_number or None,        user.get_phone_number,      user.set_phone_number       )
 
-        
-        user.set_email(email)
-        user.set_first_name(first_name)
-        user.set_last_name(last_name)
+        with UnitOfWork():
+            changed : list[str] = UnitOfWork.apply(fields)
+            if 'organization_name' in changed:
+                EventSearch.index([event.get_id() for event in Event.find_all_by_organizer(user_id)])
+
+        # Organizer and sponsor names are part of every event they appear in
+        if changed:
+            CacheController.invalidate_all()
+
+        return changed
         
@@ -1,294 +1,389 @@
-from app import app
-from models import db, Registration
-from controllers import AttendeeController, OrganizerController, EventController
-from datetime import datetime, timedelta
-
-with app.app_context():
-    db.create_all()
-
-    # --- Create Attendees ---
-    a1 = AttendeeController.create_attendee('alex.johnson@gmail.com', 'password123', 'Alex', 'Johnson')
-    a2 = AttendeeController.create_attendee('sarah.parker@gmail.com', 'password123', 'Sarah', 'Parker')
-    
-    # --- Datetime Formatter (Using the format the controller expects) ---
-    def format_datetime(dt: datetime, hour: int, minute: int = 0) -> str:
-        return dt.replace(hour=hour, minute=minute).strftime('%Y-%m-%dT%H:%M')
-
-    today = datetime.today()
-    yesterday = today - timedelta(days=1)
-    tomorrow = today + timedelta(days=1)
-    next_week = today + timedelta(days=7)
-    two_weeks = today + timedelta(days=14)
-    month_ahead = today + timedelta(days=30)
-
-    # --- Technology Events ---
-    tech_organizer1 = OrganizerController.create_organizer(
-        'techcorp1@example.com',
-        'password123',
-        'Michael',
-        'Chen',
-        'TechCorp Solutions',
-        '(514) 555-1001'
-    )
-    
-    EventController.create_event(
-        tech_organizer1,
-        "Web3 Development Summit",
-        format_datetime(tomorrow, 9),
-        format_datetime(tomorrow, 17),
-        "Technology",
-        "Join leading web developers and blockchain specialists to explore the future of decentralized applications. This full-day summit includes workshops on smart contracts, NFT platforms, and decentralized finance applications.",
-        "Montreal Convention Center",
-        200,
-        "In-Person",
-        25.00
-    )
-    
-    tech_organizer2 = OrganizerController.create_organizer(
-        'techcorp2@example.com',
-        'password123',
-        'James',
-        'Wilson',
-        'Cyber Security Inc',
-        '(514) 555-1002'
-    )
-    
-    EventController.create_event(
-        tech_organizer2,
-        "Cybersecurity Best Practices Workshop",
-        format_datetime(yesterday, 13),
-        format_datetime(yesterday, 16, 30),
-        "Technology",
-        "A hands-on workshop covering the latest cybersecurity threats and defensive strategies for businesses. Learn how to protect your organization from ransomware, phishing, and supply chain attacks.",
-        "Online",
-        150,
-        "Online",
-        0.00
-    )
-    
-    # --- Finance Events ---
-    finance_organizer1 = OrganizerController.create_organizer(
-        'financegroup1@example.com',
-        'password123',
-        'Jessica',
-        'Williams',
-        'Global Finance Group',
-        '(514) 555-2001'
-    )
-    
-    EventController.create_event(
-        finance_organizer1,
-        "Investment Strategies for 2025",
-        format_datetime(today, 10),
-        format_datetime(today, 12),
-        "Finance",
-        "Financial experts discuss market trends and investment opportunities for the coming year. Topics include sustainable investing, cryptocurrency portfolio allocation, and global market outlook.",
-        "Toronto Financial District",
-        75,
-        "In-Person",
-        50.00
-    )
-    
-    finance_organizer2 = OrganizerController.create_organizer(
-        'financegroup2@example.com',
-        'password123',
-        'Thomas',
-        'Miller',
-        'Personal Finance Advisors',
-        '(514) 555-2002'
-    )
-    
-    EventController.create_event(
-        finance_organizer2,
-        "Personal Finance Masterclass",
-        format_datetime(next_week, 18),
-        format_datetime(next_week, 20),
-        "Finance",
-        "Learn effective strategies for budgeting, debt management, and retirement planning. This masterclass is designed for individuals looking to take control of their financial future.",
-        "Online",
-        300,
-        "Online",
-        15.00
-    )
-    
-    # --- Business Events ---
-    business_organizer1 = OrganizerController.create_organizer(
-        'bizstrategy1@example.com',
-        'password123',
-        'Robert',
-        'Smith',
-        'Business Strategy Partners',
-        '(514) 555-3001'
-    )
-    
-    EventController.create_event(
-        business_organizer1,
-        "Startup Scaling Strategies",
-        format_datetime(today, 14),
-        format_datetime(today, 17),
-        "Business",
-        "Successful entrepreneurs share their experiences and strategies for scaling startups from seed to series B. Learn about team building, product-market fit, and fundraising in today's competitive environment.",
-        "Vancouver Startup Hub",
-        100,
-        "In-Person",
-        35.00
-    )
-    
-    business_organizer2 = OrganizerController.create_organizer(
-        'bizstrategy2@example.com',
-        'password123',
-        'Daniel',
-        'Taylor',
-        'Supply Chain Consultants',
-        '(514) 555-3002'
-    )
-    
-    EventController.create_event(
-        business_organizer2,
-        "Supply Chain Resilience Forum",
-        format_datetime(two_weeks, 9),
-        format_datetime(two_weeks, 16),
-        "Business",
-        "Industry leaders discuss strategies for building resilient supply chains in a post-pandemic world. Sessions cover risk management, supplier diversification, and digital transformation.",
-        "Halifax Business Center",
-        120,
-        "Hybrid",
-        45.00
-    )
-    
-    # --- Marketing Events ---
-    marketing_organizer1 = OrganizerController.create_organizer(
-        'marketpro1@example.com',
-        'password123',
-        'Emily',
-        'Davis',
-        'MarketPro Agency',
-        '(514) 555-4001'
-    )
-    
-    EventController.create_event(
-        marketing_organizer1,
-        "Digital Marketing Trends 2025",
-        format_datetime(tomorrow, 13),
-        format_datetime(tomorrow, 15, 30),
-        "Marketing",
-        "Explore the latest trends in digital marketing including AI-driven content creation, privacy-first advertising, and emerging social platforms. Case studies from successful campaigns will be presented.",
-        "Montreal Digital Hub",
-        150,
-        "In-Person",
-        0.00
-    )
-    
-    marketing_organizer2 = OrganizerController.create_organizer(
-        'marketpro2@example.com',
-        'password123',
-        'Sophia',
-        'Garcia',
-        'Content Strategy Group',
-        '(514) 555-4002'
-    )
-    
-    EventController.create_event(
-        marketing_organizer2,
-        "Content Strategy Masterclass",
-        format_datetime(month_ahead, 10),
-        format_datetime(month_ahead, 16),
-        "Marketing",
-        "A comprehensive workshop on developing and implementing effective content strategies across multiple channels. Learn about audience research, content calendars, and performance measurement.",
-        "Online",
-        200,
-        "Online",
-        80.00
-    )
-    
-    # --- AI & Tech Events ---
-    ai_tech_organizer1 = OrganizerController.create_organizer(
-        'aiinnovate1@example.com',
-        'password123',
-        'David',
-        'Kim',
-        'AI Innovations Lab',
-        '(514) 555-5001'
-    )
-    
-    EventController.create_event(
-        ai_tech_organizer1,
-        "AI in Healthcare Symposium",
-        format_datetime(next_week, 9),
-        format_datetime(next_week, 17),
-        "AI & Tech",
-        "Medical professionals and AI researchers discuss the latest applications of artificial intelligence in healthcare. Topics include diagnostic algorithms, personalized medicine, and ethical considerations.",
-        "Ottawa Medical Center",
-        180,
-        "Hybrid",
-        60.00
-    )
-    
-    ai_tech_organizer2 = OrganizerController.create_organizer(
-        'aiinnovate2@example.com',
-        'password123',
-        'Jennifer',
-        'Lee',
-        'ML Education Institute',
-        '(514) 555-5002'
-    )
-    
-    EventController.create_event(
-        ai_tech_organizer2,
-        "Machine Learning Bootcamp",
-        format_datetime(yesterday, 9),
-        format_datetime(yesterday, 17),
-        "AI & Tech",
-        "An intensive bootcamp covering the fundamentals of machine learning. Participants will work through real-world problems using Python, TensorFlow, and scikit-learn.",
-        "Online",
-        100,
-        "Online",
-        120.00
-    )
-    
-    # --- Tech & Business Events ---
-    tech_biz_organizer1 = OrganizerController.create_organizer(
-        'techbiz1@example.com',
-        'password123',
-        'Olivia',
-        'Brown',
-        'Tech & Business Accelerator',
-        '(514) 555-6001'
-    )
-    
-    EventController.create_event(
-        tech_biz_organizer1,
-        "Digital Transformation Conference",
-        format_datetime(today, 8, 30),
-        format_datetime(today, 16, 30),
-        "Tech & Business",
-        "Industry leaders share case studies of successful digital transformation initiatives. Learn about change management, technology integration, and measuring business outcomes.",
-        "Calgary Business Tower",
-        250,
-        "In-Person",
-        75.00
-    )
-    
-    tech_biz_organizer2 = OrganizerController.create_organizer(
-        'techbiz2@example.com',
-        'password123',
-        'William',
-        'Johnson',
-        'Future Workplace Institute',
-        '(514) 555-6002'
-    )
-    
-    EventController.create_event(
-        tech_biz_organizer2,
-        "Future of Work Summit",
-        format_datetime(two_weeks, 10),
-        format_datetime(two_weeks, 18),
-        "Tech & Business",
-        "Explore how technology is reshaping the workplace. Sessions cover remote collaboration tools, AI automation, and building inclusive digital workplaces.",
-        "Edmonton Convention Center",
-        200,
-        "Hybrid",
-        0.00
-    )
-
-    print("Seed data created successfully!")
\ No newline at end of file
+"""
+Creates the tables and fills them with a synthetic, deterministic dataset.
+
+    python create_db.py                         # a small dataset for local development
+    python create_db.py --scale 1               # ~100k users, 20k events, 2M registrations
+    python create_db.py --scale 0.1 --seed 7 --drop
+
+The same --seed, --scale and --anchor always give the same rows. Rows are written with bulk
+INSERTs (COPY on PostgreSQL with psycopg2), with one precomputed bcrypt hash shared by every
+user and stubbed Stripe and Google ids, so nothing is sent to an external service.
+Every user logs in with the password 'password123'.
+"""
+from __future__ import annotations
+
+from datetime   import datetime, timedelta
+from itertools  import islice
+from typing     import Iterable, Iterator
+
+import argparse
+import bcrypt
+import csv
+import io
+import math
+import random
+import time
+
+from app    import create_app
+from models import db, User, Admin, Attendee, Organizer, Stakeholder, Event, Registration, RegistrationDailyStats, EventSearch, SponsorshipRequest, PasswordHasher
+
+
+# Row counts at --scale 1. Every organizer owns exactly one event.
+VOLUMES : dict[str, int] = {
+    'stakeholders'          : 2_000,
+    'attendees'             : 78_000,
+    'events'                : 20_000,
+    'registrations'         : 2_000_000,
+    'sponsorship_requests'  : 30_000
+}
+
+PASSWORD        : str = 'password123'
+BCRYPT_ALPHABET : str = './ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+FIRST_NAMES : list[str] = ['Alex', 'Sarah', 'Michael', 'James', 'Jessica', 'Thomas', 'Robert', 'Emily', 'David', 'Jennifer', 'Olivia', 'William', 'Rym', 'Baraa', 'Yasmeen', 'Maxim', 'Jananaa', 'Noah', 'Chloe', 'Karim', 'Mei', 'Lucas', 'Amira', 'Ethan']
+LAST_NAMES  : list[str] = ['Johnson', 'Parker', 'Chen', 'Wilson', 'Williams', 'Miller', 'Smith', 'Garcia', 'Kim', 'Lee', 'Brown', 'Tremblay', 'Gagnon', 'Roy', 'Nguyen', 'Patel', 'Singh', 'Cohen', 'Haddad', 'Martin']
+
+CATEGORIES  : dict[str, list[str]] = {
+    'Technology'        : ['Web3 Development Summit', 'Cybersecurity Best Practices Workshop', 'Cloud Native Day', 'Open Source Sprint'],
+    'Finance'           : ['Investment Strategies', 'Personal Finance Masterclass', 'Fintech Meetup', 'Accounting for Founders'],
+    'Business'          : ['Startup Scaling Strategies', 'Supply Chain Resilience Forum', 'Leadership Roundtable', 'Pitch Night'],
+    'Marketing'         : ['Digital Marketing Trends', 'Content Strategy Masterclass', 'Brand Storytelling Lab', 'Growth Analytics Clinic'],
+    'AI & Tech'         : ['AI in Healthcare Symposium', 'Machine Learning Bootcamp', 'LLM Engineering Workshop', 'Computer Vision Day'],
+    'Tech & Business'   : ['Digital Transformation Conference', 'Future of Work Summit', 'Product Management Forum', 'Data Strategy Day']
+}
+LOCATIONS   : list[str] = ['Montreal Convention Center', 'Toronto Financial District', 'Vancouver Startup Hub', 'Ottawa Medical Center', 'Calgary Business Tower', 'Edmonton Convention Center', 'Halifax Business Center', 'Montreal Digital Hub', 'Quebec City Congress Center', 'Winnipeg Innovation Hub']
+EVENT_TYPES : list[str] = ['In-Person', 'Online', 'Hybrid']
+FEES        : list[float] = [10.00, 15.00, 25.00, 40.00, 50.00, 60.00, 75.00, 120.00]
+
+# Events mostly start on weekdays, in the morning, after lunch or after work
+WEEKDAY_WEIGHTS : list[float] = [1.0, 1.0, 1.0, 1.0, 0.9, 0.5, 0.3]
+START_HOURS     : list[int]   = [8, 9, 10, 11, 13, 14, 15, 17, 18, 19]
+HOUR_WEIGHTS    : list[float] = [2, 5, 4, 2, 3, 4, 2, 2, 4, 2]
+DURATIONS       : list[float] = [1, 1.5, 2, 3, 4, 8]
+DURATION_WEIGHTS: list[float] = [3, 3, 4, 2, 2, 1]
+
+ORGANIZER_PHONE_NUMBER      : str = Organizer._Organizer__phone_number.key
+ORGANIZER_ORGANIZATION_NAME : str = Organizer._Organizer__organization_name.key
+ORGANIZER_EVENT_ID          : str = Organizer._Organizer__event_id.key
+
+
+def get_volumes( scale : float ) -> dict[str, int]:
+    volumes : dict[str, int] = { name : max(1, round(count * scale)) for name, count in VOLUMES.items() }
+    volumes['registrations'] = min(volumes['registrations'], volumes['events'] * volumes['attendees'])
+    return volumes
+
+
+def batched( rows : Iterable[dict], size : int ) -> Iterator[list[dict]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def copy_rows( table, batch : list[dict] ) -> bool:
+    """
+    COPY a batch into PostgreSQL. Returns False when the driver has no COPY support.
+    """
+    cursor = db.session.connection().connection.cursor()
+    if not hasattr(cursor, 'copy_expert'):
+        return False
+
+    columns : list[str] = list(batch[0].keys())
+    buffer  : io.StringIO = io.StringIO()
+    # An unquoted empty field is NULL in COPY's csv format
+    csv.writer(buffer).writerows([['' if row[column] is None else row[column] for column in columns] for row in batch])
+    buffer.seek(0)
+
+    quoted_columns : str = ', '.join(f'"{column}"' for column in columns)
+    cursor.copy_expert(f'COPY {table.name} ({quoted_columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+    return True
+
+
+def load( table, rows : Iterable[dict], batch_size : int ) -> int:
+    use_copy : bool = db.engine.dialect.name == 'postgresql'
+    loaded   : int  = 0
+
+    for batch in batched(rows, batch_size):
+        if not (use_copy and copy_rows(table, batch)):
+            use_copy = False
+            db.session.execute(db.insert(table), batch)
+        loaded += len(batch)
+
+    db.session.commit()
+    return loaded
+
+
+def spread( total : int, weights : list[float], cap : int ) -> list[int]:
+    """
+    Split 'total' in proportion to 'weights' with no share above 'cap'. What the capped
+    shares cannot take goes to the others, so small scales keep their registrations.
+    """
+    shares  : list[int] = [0] * len(weights)
+    open_   : list[int] = list(range(len(weights)))
+
+    while total > 0 and open_:
+        weight_sum  : float     = sum(weights[index] for index in open_)
+        given       : int       = 0
+        for index in open_:
+            share : int = min(cap - shares[index], round(total * weights[index] / weight_sum), total - given)
+            shares[index]  += share
+            given          += share
+
+        open_ = [index for index in open_ if shares[index] < cap]
+        if given == 0:
+            break
+        total -= given
+
+    return shares
+
+
+def random_start( rng : random.Random, anchor : datetime ) -> datetime:
+    # A year of past events for analytics, six months of upcoming ones for browsing
+    while True:
+        day : datetime = anchor + timedelta(days=rng.randint(-365, 180))
+        if rng.random() < WEEKDAY_WEIGHTS[day.weekday()]:
+            break
+
+    hour : int = rng.choices(START_HOURS, HOUR_WEIGHTS)[0]
+    return day.replace(hour=hour, minute=rng.choice([0, 0, 30]))
+
+
+def hash_password( rng : random.Random ) -> str:
+    # bcrypt salts are 22 characters of bcrypt's base64, and the last one only carries 2 bits.
+    # Drawing it from rng instead of os.urandom keeps the whole dataset reproducible.
+    salt : str = ''.join(rng.choice(BCRYPT_ALPHABET) for _ in range(21)) + rng.choice('.Oeu')
+    return bcrypt.hashpw(PASSWORD.encode('utf-8'), f'$2b${PasswordHasher.rounds:02d}${salt}'.encode('utf-8')).decode('utf-8')
+
+
+def plan_users( rng : random.Random, volumes : dict[str, int], hashed_password : str, anchor : datetime ) -> dict[str, list[dict]]:
+    """
+    Users get consecutive ids: the admin, then stakeholders, organizers and attendees. They
+    signed up in id order, between three years and fifteen months before the anchor, so
+    before any registration.
+    """
+    rows    : dict[str, list[dict]] = { 'users' : [], 'admins' : [], 'stakeholders' : [], 'organizers' : [], 'attendees' : [] }
+    user_id : int = 0
+
+    total           : int       = 1 + volumes['stakeholders'] + volumes['events'] + volumes['attendees']
+    first_signup    : datetime  = anchor - timedelta(days=3 * 365)
+    signup_step     : timedelta = timedelta(days=3 * 365 - 456) / total
+
+    def add_user( user_type : str, email : str = None ) -> int:
+        nonlocal user_id
+        user_id += 1
+        first_name  : str = rng.choice(FIRST_NAMES)
+        last_name   : str = rng.choice(LAST_NAMES)
+        rows['users'].append({
+            'id'            : user_id,
+            'email'         : email or f'{first_name}.{last_name}.{user_id}@example.com'.lower(),
+            'password'      : hashed_password,
+            'first_name'    : first_name,
+            'last_name'     : last_name,
+            'user_type'     : user_type,
+            'created_at'    : first_signup + signup_step * user_id
+        })
+        return user_id
+
+    rows['admins'].append({ 'id' : add_user('admin', 'admin@example.com') })
+
+    for _ in range(volumes['stakeholders']):
+        rows['stakeholders'].append({ 'id' : add_user('stakeholder') })
+
+    for _ in range(volumes['events']):
+        organizer_id : int = add_user('organizer')
+        rows['organizers'].append({
+            'id'                        : organizer_id,
+            ORGANIZER_PHONE_NUMBER      : f'(514) 555-{organizer_id % 10_000:04d}',
+            ORGANIZER_ORGANIZATION_NAME : f'{rng.choice(LAST_NAMES)} {rng.choice(["Labs", "Group", "Institute", "Partners", "Collective"])}',
+            ORGANIZER_EVENT_ID          : None
+        })
+
+    for _ in range(volumes['attendees']):
+        attendee_id : int = add_user('attendee')
+        # Attendees who paid for an event once have a Stripe customer
+        rows['attendees'].append({
+            'id'                    : attendee_id,
+            'stripe_customer_id'    : f'cus_synthetic_{attendee_id:08d}' if rng.random() < 0.35 else None
+        })
+
+    return rows
+
+
+def plan_events( rng : random.Random, volumes : dict[str, int], organizer_ids : list[int], attendee_count : int, anchor : datetime ) -> list[dict]:
+    """
+    Popularity is lognormal, so a few events draw most of the registrations,
+    and about one event in seven is sold out.
+    """
+    popularity      : list[float]   = [rng.lognormvariate(0, 1) for _ in organizer_ids]
+    registrations   : list[int]     = spread(volumes['registrations'], popularity, attendee_count)
+    events          : list[dict]    = []
+
+    for index, organizer_id in enumerate(organizer_ids):
+        event_id        : int       = index + 1
+        category        : str       = rng.choice(list(CATEGORIES))
+        start           : datetime  = random_start(rng, anchor)
+        registered      : int       = registrations[index]
+
+        if rng.random() < 0.15:
+            capacity : int = max(registered, 10)
+        else:
+            capacity : int = max(10, math.ceil(registered / rng.uniform(0.3, 0.95)))
+
+        events.append({
+            'id'                : event_id,
+            'title'             : f'{rng.choice(CATEGORIES[category])} {start.year}',
+            'start'             : start,
+            'end'               : start + timedelta(hours=rng.choices(DURATIONS, DURATION_WEIGHTS)[0]),
+            'category'          : category,
+            'description'       : f'A {category.lower()} event for students and professionals.',
+            'location'          : rng.choice(LOCATIONS),
+            'capacity'          : capacity,
+            'registered_count'  : registered,
+            'event_type'        : rng.choice(EVENT_TYPES),
+            'registration_fee'  : 0.00 if rng.random() < 0.4 else rng.choice(FEES),
+            'organizer_id'      : organizer_id,
+            'sponsor_id'        : None,
+            'calendar_id'       : f'synthetic-{event_id}@group.calendar.google.com'
+        })
+
+    return events
+
+
+def plan_sponsorship_requests( rng : random.Random, volumes : dict[str, int], events : list[dict], stakeholder_ids : list[int], anchor : datetime ) -> list[dict]:
+    """
+    At most one request per event is accepted, and it makes that stakeholder the sponsor.
+    Requests for past events have all been answered.
+    """
+    requests    : list[dict]            = []
+    seen        : set[tuple[int, int]]  = set()
+    target      : int                   = min(volumes['sponsorship_requests'], len(events) * len(stakeholder_ids))
+
+    while len(requests) < target:
+        event       : dict  = rng.choice(events)
+        stakeholder : int   = rng.choice(stakeholder_ids)
+        if (event['id'], stakeholder) in seen:
+            continue
+        seen.add((event['id'], stakeholder))
+
+        status : str = rng.choices(SponsorshipRequest.STATUSES, [0 if event['start'] < anchor else 4, 3, 4])[0]
+        if status == SponsorshipRequest.ACCEPTED:
+            if event['sponsor_id']:
+                status = SponsorshipRequest.REJECTED
+            else:
+                event['sponsor_id'] = stakeholder
+
+        requests.append({
+            'id'                : len(requests) + 1,
+            'event_id'          : event['id'],
+            'stakeholder_id'    : stakeholder,
+            'status'            : status
+        })
+
+    return requests
+
+
+def generate_registrations( rng : random.Random, events : list[dict], attendee_ids : range, anchor : datetime ) -> Iterator[dict]:
+    """
+    Streamed, since there can be millions. Most people register in the two weeks before an
+    event; nobody registers after the anchor.
+    """
+    for event in events:
+        for attendee_id in rng.sample(attendee_ids, event['registered_count']):
+            registration_time : datetime = event['start'] - timedelta(days=min(rng.expovariate(1 / 10), 90), seconds=rng.randint(0, 86_400))
+            if registration_time > anchor:
+                registration_time = anchor - timedelta(seconds=rng.randint(0, 14 * 86_400))
+
+            yield {
+                'attendee_id'       : attendee_id,
+                'event_id'          : event['id'],
+                'registration_time' : registration_time
+            }
+
+
+def reset_sequences() -> None:
+    # Ids were given explicitly, so PostgreSQL's sequences still start at 1
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in ('users', 'events', 'sponsorship_requests'):
+        db.session.execute(db.text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE((SELECT MAX(id) FROM {table}), 1))"))
+    db.session.commit()
+
+
+def generate( scale : float = 0.001, seed : int = 343, anchor : datetime = None, batch_size : int = 10_000 ) -> dict[str, int]:
+    """
+    Fill empty tables with the synthetic dataset. Needs an app context.
+    :return: The number of rows written per table
+    """
+    rng     : random.Random     = random.Random(seed)
+    anchor  : datetime          = anchor or datetime.combine(datetime.today(), datetime.min.time())
+    volumes : dict[str, int]    = get_volumes(scale)
+
+    # One real hash, so that every generated user can log in
+    hashed_password : str = hash_password(rng)
+
+    users           : dict[str, list[dict]] = plan_users(rng, volumes, hashed_password, anchor)
+    stakeholder_ids : list[int]             = [row['id'] for row in users['stakeholders']]
+    organizer_ids   : list[int]             = [row['id'] for row in users['organizers']]
+    attendee_ids    : range                 = range(users['attendees'][0]['id'], users['attendees'][-1]['id'] + 1)
+
+    events          : list[dict]            = plan_events(rng, volumes, organizer_ids, len(attendee_ids), anchor)
+    requests        : list[dict]            = plan_sponsorship_requests(rng, volumes, events, stakeholder_ids, anchor)
+
+    for organizer, event in zip(users['organizers'], events):
+        organizer[ORGANIZER_EVENT_ID] = event['id']
+
+    # organizers.event_id and events.organizer_id point at each other, so organizers go
+    # in without their event and get it once the events exist
+    event_ids : dict[int, int] = { row['id'] : row[ORGANIZER_EVENT_ID] for row in users['organizers'] }
+    for row in users['organizers']:
+        row[ORGANIZER_EVENT_ID] = None
+
+    counts : dict[str, int] = {}
+    counts['users']         = load(User.__table__,          users['users'],         batch_size)
+    counts['admins']        = load(Admin.__table__,         users['admins'],        batch_size)
+    counts['stakeholders']  = load(Stakeholder.__table__,   users['stakeholders'],  batch_size)
+    counts['organizers']    = load(Organizer.__table__,     users['organizers'],    batch_size)
+    counts['attendees']     = load(Attendee.__table__,      users['attendees'],     batch_size)
+    counts['events']        = load(Event.__table__,         events,                 batch_size)
+
+    organizers = Organizer.__table__
+    for batch in batched(event_ids.items(), batch_size):
+        db.session.execute(
+            db.update(organizers).where(organizers.c.id == db.bindparam('organizer_id')).values({ ORGANIZER_EVENT_ID : db.bindparam('event_id') }),
+            [{ 'organizer_id' : organizer_id, 'event_id' : event_id } for organizer_id, event_id in batch]
+        )
+    db.session.commit()
+
+    counts['sponsorship_requests']  = load(SponsorshipRequest.__table__,    requests,                                                   batch_size)
+    counts['registrations']         = load(Registration.__table__,          generate_registrations(rng, events, attendee_ids, anchor),  batch_size)
+    counts['registration_daily_stats'] = RegistrationDailyStats.backfill()
+    counts['event_search']          = EventSearch.rebuild()
+
+    reset_sequences()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale',      type=float, default=0.001,  help='1 is ~100k users, 20k events and 2M registrations')
+    parser.add_argument('--seed',       type=int,   default=343)
+    parser.add_argument('--anchor',     type=datetime.fromisoformat, default=None, help="'Today' for the generated timeline, YYYY-MM-DD. Defaults to the real today")
+    parser.add_argument('--batch-size', type=int,   default=10_000)
+    parser.add_argument('--drop',       action='store_true',        help='Drop and recreate every table first')
+    args = parser.parse_args()
+
+    app = create_app()
+
+    with app.app_context():
+        if args.drop:
+            db.drop_all()
+        db.create_all()
+
+        if db.session.query(User.id).first():
+            raise SystemExit('The database already has users, run with --drop to start over')
+
+        start   : float             = time.perf_counter()
+        counts  : dict[str, int]    = generate(args.scale, args.seed, args.anchor, args.batch_size)
+
+        for table, count in counts.items():
+            print(f'{table:<26}{count:>12,}')
+        print(f'Seed data created in {time.perf_counter() - start:.1f}s')
@@ -1,10 +1,17 @@
 from flask_sqlalchemy import SQLAlchemy
 db = SQLAlchemy()
+from .unit_of_work      import UnitOfWork
 from .event             import Event
+from .users.password_hasher import PasswordHasher
 from .users.user        import User
 from .users.admin       import Admin
 from .users.attendee    import Attendee
 from .users.organizer   import Organizer
 from .users.stakeholder import Stakeholder
 from .request_sponserships import SponsorshipRequest 
-from .registration      import Registration
\ No newline at end of file
+from .registration      import Registration
+from .registration_daily_stats import RegistrationDailyStats
+from .event_search      import EventSearch
+from .calendar_task     import CalendarTask
+from .payment_intent    import PaymentIntent
+from .stripe_webhook_event import StripeWebhookEvent
\ No newline at end of file
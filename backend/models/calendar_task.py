@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from models import db
+from datetime import datetime, timedelta
+
+
+class CalendarTask(db.Model):
+    """
+    Outbox row for a Google Calendar call that has to happen after a database change.
+    Rows are written next to the change and executed later by the calendar workers.
+    """
+
+    CREATE_CALENDAR : str = "CREATE_CALENDAR"
+    SHARE_CALENDAR  : str = "SHARE_CALENDAR"
+
+    PENDING         : str = "PENDING"
+    DONE            : str = "DONE"
+    FAILED          : str = "FAILED"
+
+    __tablename__ = 'calendar_outbox'
+    __table_args__ = (
+        db.Index('ix_calendar_outbox_status_next_attempt_at', 'status', 'next_attempt_at'),
+    )
+
+    id                  = db.Column(db.Integer,     primary_key=True, autoincrement=True)
+    idempotency_key     = db.Column(db.String,      unique=True, nullable=False)
+    kind                = db.Column(db.String,      nullable=False)
+    event_id            = db.Column(db.Integer,     db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    email               = db.Column(db.String,      nullable=True)
+    status              = db.Column(db.String,      nullable=False, default=PENDING)
+    attempts            = db.Column(db.Integer,     nullable=False, default=0)
+    next_attempt_at     = db.Column(db.DateTime,    nullable=False, default=datetime.now)
+    last_error          = db.Column(db.String,      nullable=True)
+    created_at          = db.Column(db.DateTime,    nullable=False, default=datetime.now)
+
+    def __init__(self, kind : str, event_id : int, email : str = None):
+        self.kind               = kind
+        self.event_id           = event_id
+        self.email              = email
+        self.status             = CalendarTask.PENDING
+        self.attempts           = 0
+        self.next_attempt_at    = datetime.now()
+        self.idempotency_key    = f'{kind}:{event_id}:{email or ""}'
+
+    @staticmethod
+    def enqueue(kind : str, event_id : int, email : str = None) -> CalendarTask:
+        """
+        Add a task unless the same one is already queued. Does not commit.
+        """
+        task = CalendarTask(kind, event_id, email)
+        existing = db.session.query(CalendarTask).filter(CalendarTask.idempotency_key == task.idempotency_key).first()
+
+        if existing:
+            if existing.status == CalendarTask.FAILED:
+                existing.status             = CalendarTask.PENDING
+                existing.attempts           = 0
+                existing.next_attempt_at    = datetime.now()
+            return existing
+
+        db.session.add(task)
+        return task
+
+    @staticmethod
+    def find_due(limit : int) -> list[CalendarTask]:
+        return (
+            db.session.query(CalendarTask)
+            .filter(CalendarTask.status == CalendarTask.PENDING)
+            .filter(CalendarTask.next_attempt_at <= datetime.now())
+            .order_by(CalendarTask.next_attempt_at, CalendarTask.id)
+            .limit(limit)
+            .all()
+        )
+
+    def claim(self, lease : timedelta) -> bool:
+        """
+        Take the task for one attempt. Pushing next_attempt_at out by the lease hides it from
+        other workers, and makes it due again by itself if this worker dies mid-attempt.
+        The conditional UPDATE means only one worker can win the claim.
+        """
+        claimed : int = (
+            db.session.query(CalendarTask)
+            .filter(CalendarTask.id == self.id)
+            .filter(CalendarTask.status == CalendarTask.PENDING)
+            .filter(CalendarTask.next_attempt_at == self.next_attempt_at)
+            .update(
+                {
+                    CalendarTask.next_attempt_at    : datetime.now() + lease,
+                    CalendarTask.attempts           : CalendarTask.attempts + 1
+                },
+                synchronize_session=False
+            )
+        )
+        db.session.commit()
+        db.session.refresh(self)
+        return claimed == 1
+
+    def complete(self) -> None:
+        self.status     = CalendarTask.DONE
+        self.last_error = None
+        db.session.commit()
+
+    def fail(self, error : str, retry_at : datetime = None) -> None:
+        """
+        Record a failed attempt. Without retry_at the task is given up on.
+        """
+        self.last_error = error
+        if retry_at:
+            self.next_attempt_at = retry_at
+        else:
+            self.status = CalendarTask.FAILED
+        db.session.commit()
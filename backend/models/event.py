@@ -4,7 +4,10 @@ from models import db
 from .users.attendee import Attendee
 
 from models.registration import Registration
-from datetime import datetime
+from models.registration_daily_stats import RegistrationDailyStats
+from models.payment_intent import PaymentIntent
+from datetime import date, datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 
 class Event(db.Model):
 
@@ -20,8 +23,47 @@ class Event(db.Model):
             def __init__(self, message = "event_not_found"):
                 super().__init__(message)
 
+        class InvalidCursor(Exception):
+            HTTP_code : str = 400
+            def __init__(self, message = "invalid_cursor"):
+                super().__init__(message)
+
+        class NotOrganizer(Exception):
+            HTTP_code : str = 403
+            def __init__(self, message = "not_event_organizer"):
+                super().__init__(message)
+
+        class InvalidExport(Exception):
+            HTTP_code : str = 400
+            def __init__(self, message = "invalid_export"):
+                super().__init__(message)
+
+        class InvalidSearch(Exception):
+            HTTP_code : str = 400
+            def __init__(self, message = "invalid_search"):
+                super().__init__(message)
+
+        class InvalidRange(Exception):
+            HTTP_code : str = 400
+            def __init__(self, message = "invalid_range"):
+                super().__init__(message)
+
+        class InvalidEventIds(Exception):
+            HTTP_code : str = 400
+            def __init__(self, message = "invalid_event_ids"):
+                super().__init__(message)
+
     
     __tablename__ = 'events'
+    __table_args__ = (
+        db.Index('ix_events_start_id',              'start', 'id'),
+        db.Index('ix_events_category_start_id',     'category', 'start', 'id'),
+        db.Index('ix_events_event_type_start_id',   'event_type', 'start', 'id'),
+        db.Index('ix_events_sponsor_id_start_id',   'sponsor_id', 'start', 'id'),
+        db.Index('ix_events_fee_start_id',          'registration_fee', 'start', 'id'),
+        db.Index('ix_events_organizer_id',          'organizer_id'),
+        db.Index('ix_events_start_end',             'start', 'end'),
+    )
 
     id                  = db.Column(db.Integer,     primary_key=True, autoincrement=True)
     __title             = db.Column('title', db.String,      nullable=False)
@@ -32,6 +74,9 @@ class Event(db.Model):
     __location          = db.Column('location', db.String,      nullable=False)
 
     __capacity          = db.Column('capacity', db.Integer,     nullable=False, default = 100)
+    __registered_count  = db.Column('registered_count', db.Integer, nullable=False, default = 0, server_default = '0')
+    # Seats held by checkouts that are not paid yet, taken like registered ones
+    __held_count        = db.Column('held_count', db.Integer, nullable=False, default = 0, server_default = '0')
     __event_type        = db.Column('event_type', db.String,      nullable=False, default = "In-person")
     __registration_fee  = db.Column('registration_fee', db.Float,       nullable=False, default = 0.00)
 
@@ -57,6 +102,8 @@ class Event(db.Model):
         self.__organizer_id     = organizer_id
         self.__sponsor_id       = sponsor_id
         self.__capacity         = capacity
+        self.__registered_count = 0
+        self.__held_count       = 0
         self.__event_type       = event_type
         self.__registration_fee = registration_fee
         self.__calendar_id      = calendar_id
@@ -65,8 +112,199 @@ class Event(db.Model):
 
     @staticmethod
     def find_all_by_organizer(organizer_id: int) -> list[Event]:
-        return db.session.query(Event).filter(Event.__organizer_id == organizer_id).all()
+        return db.session.query(Event).filter(Event.__organizer_id == organizer_id).order_by(Event.id).all()
+
+
+    @staticmethod
+    def find_all_by_attendee(attendee_id: int) -> list[Event]:
+        return (
+            db.session.query(Event)
+            .join(Registration, Registration.event_id == Event.id)
+            .filter(Registration.attendee_id == attendee_id)
+            .all()
+        )
+
+    @staticmethod
+    def find_page(
+        limit       : int,
+        after       : tuple[datetime, int] = None,
+        category    : str = None,
+        event_type  : str = None,
+        location    : str = None,
+        start_from  : datetime = None,
+        start_to    : datetime = None,
+        min_fee     : float = None,
+        max_fee     : float = None,
+        sponsored   : bool = None
+    ) -> list[Event]:
+        """
+        Get one page of events ordered by (start, id), optionally filtered.
+        Pages are keyset based: 'after' is the (start, id) of the last event of the previous
+        page, so pages stay stable when events are inserted between two requests.
+        :param limit: The maximum number of events to return
+        :param after: The (start, id) key to continue after, None for the first page
+        :return: At most limit events
+        """
+        query = db.session.query(Event)
+
+        if category:
+            query = query.filter(Event.__category == category)
+        if event_type:
+            query = query.filter(Event.__event_type == event_type)
+        if location:
+            query = query.filter(Event.__location == location)
+        if start_from:
+            query = query.filter(Event.__start >= start_from)
+        if start_to:
+            query = query.filter(Event.__start < start_to)
+        if min_fee is not None:
+            query = query.filter(Event.__registration_fee >= min_fee)
+        if max_fee is not None:
+            query = query.filter(Event.__registration_fee <= max_fee)
+        if sponsored:
+            query = query.filter(Event.__sponsor_id.isnot(None))
+
+        if after:
+            after_start, after_id = after
+            query = query.filter(
+                db.or_(
+                    Event.__start > after_start,
+                    db.and_(Event.__start == after_start, Event.id > after_id)
+                )
+            )
+
+        return query.order_by(Event.__start, Event.id).limit(limit).all()
 
+    @staticmethod
+    def find_sponsored( sponsor_id : int, limit : int = None, after : tuple[datetime, int] = None, when : str = None, now : datetime = None ) -> list[Event]:
+        """
+        Events sponsored by a stakeholder, through the (sponsor_id, start, id) index.
+        Upcoming events come soonest first, past events most recent first, and all of them
+        in start order. Pages are keyset based like find_page.
+        :param when: 'upcoming', 'past' or None for both
+        :param after: The (start, id) key of the last event of the previous page
+        """
+        now     = now or datetime.now()
+        query   = db.session.query(Event).filter(Event.__sponsor_id == sponsor_id)
+
+        if when == 'upcoming':
+            query = query.filter(Event.__start >= now)
+        elif when == 'past':
+            query = query.filter(Event.__start < now)
+
+        descending : bool = when == 'past'
+
+        if after:
+            after_start, after_id = after
+            if descending:
+                query = query.filter(db.or_(Event.__start < after_start, db.and_(Event.__start == after_start, Event.id < after_id)))
+            else:
+                query = query.filter(db.or_(Event.__start > after_start, db.and_(Event.__start == after_start, Event.id > after_id)))
+
+        if descending:
+            query = query.order_by(Event.__start.desc(), Event.id.desc())
+        else:
+            query = query.order_by(Event.__start, Event.id)
+
+        if limit:
+            query = query.limit(limit)
+
+        return query.all()
+
+    @staticmethod
+    def get_sponsor_totals( sponsor_id : int, now : datetime = None ) -> dict:
+        """
+        Counts over every event a stakeholder sponsors, in one aggregate over the sponsor_id index.
+        """
+        now = now or datetime.now()
+
+        events, upcoming, registrations, capacity = db.session.query(
+            db.func.count(Event.id),
+            db.func.sum(db.case((Event.__start >= now, 1), else_=0)),
+            db.func.sum(Event.__registered_count),
+            db.func.sum(Event.__capacity)
+        ).filter(Event.__sponsor_id == sponsor_id).one()
+
+        return {
+            'events'        : events,
+            'upcoming'      : int(upcoming or 0),
+            'past'          : events - int(upcoming or 0),
+            'registrations' : int(registrations or 0),
+            'capacity'      : int(capacity or 0)
+        }
+
+    @staticmethod
+    def find_longest_duration() -> float | None:
+        """
+        Length in days of the longest event, None when there are no events or the database
+        cannot subtract dates. Bounds how far back find_overlapping has to look.
+        """
+        dialect : str = db.session.get_bind().dialect.name
+
+        if dialect == 'sqlite':
+            duration = db.func.julianday(Event.__end) - db.func.julianday(Event.__start)
+        elif dialect == 'postgresql':
+            duration = db.func.extract('epoch', Event.__end - Event.__start) / 86400
+        else:
+            return None
+
+        longest = db.session.query(db.func.max(duration)).scalar()
+        return float(longest) if longest is not None else None
+
+    @staticmethod
+    def find_overlapping( start : datetime, end : datetime, longest : float = None ) -> list[Event]:
+        """
+        Events that are on at some point of [start, end), ordered by (start, id).
+        Nothing that starts more than the longest event before 'start' can still be on, so with
+        'longest' the scan of the (start, end) index is bounded on both sides.
+        :param longest: See find_longest_duration, None scans every event that starts before 'end'
+        """
+        query = db.session.query(Event).filter(Event.__start < end).filter(Event.__end > start)
+
+        if longest is not None:
+            query = query.filter(Event.__start >= start - timedelta(days=longest))
+
+        return query.order_by(Event.__start, Event.id).all()
+
+    @staticmethod
+    def find_conflicts( attendee_id : int, start : datetime, end : datetime, exclude_event_id : int = None ) -> list[Event]:
+        """
+        Events the attendee is registered to that overlap [start, end). Walks the attendee's
+        registrations through the registrations primary key, then the events by id.
+        """
+        query = (
+            db.session.query(Event)
+            .join(Registration, Registration.event_id == Event.id)
+            .filter(Registration.attendee_id == attendee_id)
+            .filter(Event.__start < end)
+            .filter(Event.__end > start)
+        )
+        if exclude_event_id is not None:
+            query = query.filter(Event.id != exclude_event_id)
+
+        return query.order_by(Event.__start, Event.id).all()
+
+    @staticmethod
+    def find_statuses( user_id : int, event_ids : list[int] ) -> dict[int, dict[str, bool]]:
+        """
+        Whether the user is registered to and sponsors each of these events, in one query: the
+        events by primary key, each outer joined to the user's row through the registrations
+        (attendee_id, event_id) key. Ids of events that do not exist are left out.
+        """
+        events          = Event.__table__
+        registrations   = Registration.__table__
+
+        rows = db.session.execute(
+            db.select(events.c.id, events.c.sponsor_id, registrations.c.attendee_id)
+            .select_from(events)
+            .outerjoin(registrations, db.and_(registrations.c.event_id == events.c.id, registrations.c.attendee_id == user_id))
+            .where(events.c.id.in_(event_ids))
+        )
+
+        return {
+            event_id : { 'is_registered' : attendee_id is not None, 'is_sponsoring' : sponsor_id == user_id }
+            for event_id, sponsor_id, attendee_id in rows
+        }
 
     @staticmethod
     def find(event_id: int = -1, user_id: int = -1) -> list[Event] | Event | None:
@@ -83,6 +321,40 @@ class Event(db.Model):
         return query.first()
 
     
+    @staticmethod
+    def release_registrations(attendee_id : int) -> None:
+        """
+        Give back the seats held by an attendee, e.g. before the attendee is deleted.
+        Does not commit, so it runs in the same transaction as the deletion.
+        """
+        registered_event_ids = db.select(Registration.__table__.c.event_id).where(Registration.__table__.c.attendee_id == attendee_id)
+
+        db.session.execute(
+            db.update(Event.__table__)
+            .where(Event.__table__.c.id.in_(registered_event_ids))
+            .values(registered_count = Event.__table__.c.registered_count - 1)
+        )
+
+        today : date = datetime.now().date()
+        RegistrationDailyStats.record([
+            { 'event_id' : event_id, 'day' : today, 'cancellations' : 1 }
+            for event_id in db.session.execute(registered_event_ids).scalars()
+        ])
+
+    @staticmethod
+    def backfill_registered_counts() -> None:
+        """
+        Recompute registered_count for every event from the registrations table.
+        """
+        registration_count = (
+            db.select(db.func.count())
+            .where(Registration.__table__.c.event_id == Event.__table__.c.id)
+            .scalar_subquery()
+        )
+
+        db.session.execute(db.update(Event.__table__).values(registered_count = registration_count))
+        db.session.commit()
+
     @staticmethod
     def add(event : Event) -> None:
         db.session.add(event)
@@ -95,41 +367,94 @@ class Event(db.Model):
         if not event:
             raise Event.EventError.NotFound()
         
-        db.session.remove(event)
-        db.session.commit()
+        PaymentIntent.remove_all(event_id=event_id)
+        db.session.delete(event)
 
-    def get_data(self) -> dict:
+    @staticmethod
+    def get_bulk_data(events: list[Event]) -> list[dict]:
+        """
+        Serialize many events with a constant number of queries.
+        Produces the same dictionaries as get_data(), but organizers, sponsors and the latest
+        sponsorship request of each event are each fetched once for the whole list instead of
+        once per event.
+        :param events: The events to serialize
+        :return: A list of event dictionaries, in the same order as events
+        """
         from models.users.organizer import Organizer
         from models.users.stakeholder import Stakeholder
         from models import SponsorshipRequest
-    
-        organizer : Organizer = Organizer.find(user_id=self.__organizer_id)
-    
+
+        if not events:
+            return []
+
+        organizer_ids   : set[int]  = {event.__organizer_id for event in events}
+
+        organizers : dict[int, Organizer] = {
+            organizer.id : organizer
+            for organizer in db.session.query(Organizer).filter(Organizer.id.in_(organizer_ids)).all()
+        }
+
+        # Most recent sponsorship request of every event that has no sponsor yet
+        unsponsored_ids : list[int] = [event.id for event in events if not event.__sponsor_id]
+        latest_requests : dict[int, SponsorshipRequest] = {}
+
+        if unsponsored_ids:
+            latest_ids = (
+                db.session.query(db.func.max(SponsorshipRequest.id))
+                .filter(SponsorshipRequest.event_id.in_(unsponsored_ids))
+                .group_by(SponsorshipRequest.event_id)
+            )
+            latest_requests = {
+                request.event_id : request
+                for request in db.session.query(SponsorshipRequest).filter(SponsorshipRequest.id.in_(latest_ids)).all()
+            }
+
+        stakeholder_ids : set[int] = {event.__sponsor_id for event in events if event.__sponsor_id}
+        stakeholder_ids.update(request.stakeholder_id for request in latest_requests.values())
+
+        stakeholders : dict[int, Stakeholder] = {}
+        if stakeholder_ids:
+            stakeholders = {
+                stakeholder.id : stakeholder
+                for stakeholder in db.session.query(Stakeholder).filter(Stakeholder.id.in_(stakeholder_ids)).all()
+            }
+
+        return [
+            event.__serialize(
+                organizer       = organizers.get(event.__organizer_id),
+                stakeholders    = stakeholders,
+                request         = latest_requests.get(event.id)
+            )
+            for event in events
+        ]
+
+    def get_data(self) -> dict:
+        return Event.get_bulk_data([self])[0]
+
+    def __serialize(self, organizer, stakeholders : dict, request) -> dict:
+
         sponsorship_status = "N/A"
         sponsor_name = "None"
-    
+
         if self.__sponsor_id:
             sponsorship_status = "ACCEPTED"
-            stakeholder = Stakeholder.find(self.__sponsor_id)
+            stakeholder = stakeholders.get(self.__sponsor_id)
             if stakeholder:
                 sponsor_name = f"{stakeholder.get_first_name()} {stakeholder.get_last_name()}"
             else:
                 sponsor_name = str(self.__sponsor_id)
-        else:
-            # Check the sponsorship_requests table for the most recent request for this event
-            request = SponsorshipRequest.query.filter_by(event_id=self.id).order_by(SponsorshipRequest.id.desc()).first()
-            if request:
-                if request.status == "REJECTED":
-                    sponsorship_status = "REJECTED"
-                    stakeholder = Stakeholder.find(request.stakeholder_id)
-                    if stakeholder:
-                        sponsor_name = f"{stakeholder.get_first_name()} {stakeholder.get_last_name()} (Rejected)"
-                elif request.status == "PENDING":
-                    sponsorship_status = "PENDING"
-                    stakeholder = Stakeholder.find(request.stakeholder_id)
-                    if stakeholder:
-                        sponsor_name = f"{stakeholder.get_first_name()} {stakeholder.get_last_name()} (Pending)"
-    
+        elif request:
+            if request.status == "REJECTED":
+                sponsorship_status = "REJECTED"
+                stakeholder = stakeholders.get(request.stakeholder_id)
+                if stakeholder:
+                    sponsor_name = f"{stakeholder.get_first_name()} {stakeholder.get_last_name()} (Rejected)"
+            elif request.status == "PENDING":
+                sponsorship_status = "PENDING"
+                stakeholder = stakeholders.get(request.stakeholder_id)
+                if stakeholder:
+                    sponsor_name = f"{stakeholder.get_first_name()} {stakeholder.get_last_name()} (Pending)"
+
         data : dict = {
             'id'                : self.id,
             'title'             : self.__title,
@@ -138,8 +463,8 @@ class Event(db.Model):
             'location'          : self.__location,
             'start'             : str(self.__start),
             'end'               : str(self.__end),
-                'capacity'          : self.__capacity,
-            'registrations'     : len(self.registrations),
+            'capacity'          : self.__capacity,
+            'registrations'     : self.__registered_count,
             'event_type'        : self.__event_type,
             'organizer_name'    : f'{organizer.get_first_name()} {organizer.get_last_name()}',
             'organization_name' : organizer.get_organization_name(),
@@ -174,6 +499,12 @@ class Event(db.Model):
     def get_capacity(self) -> int:
         return self.__capacity
 
+    def get_registered_count(self) -> int:
+        return self.__registered_count
+
+    def get_held_count(self) -> int:
+        return self.__held_count
+
     def get_registrations(self) -> list:
         return self.registrations
     def get_attendees(self) -> list:
@@ -195,61 +526,117 @@ class Event(db.Model):
 
     def set_title(self, title: str) -> None:
         self.__title = title
-        db.session.commit()
 
     def set_start(self, start: datetime) -> None:
         self.__start = start
-        db.session.commit()
 
     def set_end(self, end: datetime) -> None:
         self.__end = end
-        db.session.commit()
 
     def set_category(self, category: str) -> None:
         self.__category = category
-        db.session.commit()
 
     def set_description(self, description: str) -> None:
         self.__description = description
-        db.session.commit()
 
     def set_location(self, location: str) -> None:
         self.__location = location
-        db.session.commit()
 
     def set_capacity(self, capacity: int) -> None:
         self.__capacity = capacity
-        db.session.commit()
 
     def set_event_type(self, event_type: str) -> None:
         self.__event_type = event_type
-        db.session.commit()
         
-    def add_registration(self, attendee : Attendee):
-        registration = Registration(attendee=attendee, event=self)
-        self.registrations.append(registration)
-        db.session.commit()
+    @staticmethod
+    def hold_seat(event_id : int) -> None:
+        """
+        Hold a seat for a checkout, see PaymentIntent.hold_seat. Does not commit.
+        :raises Event.EventError.Full: No seat is left
+        """
+        events = Event.__table__
+        claimed : int = db.session.execute(
+            db.update(events)
+            .where(events.c.id == event_id)
+            .where(events.c.registered_count + events.c.held_count < events.c.capacity)
+            .values(held_count = events.c.held_count + 1)
+        ).rowcount
+
+        if not claimed:
+            raise Event.EventError.Full()
+
+    @staticmethod
+    def release_seat(event_id : int) -> None:
+        """
+        Give back a seat held for a checkout. Does not commit.
+        """
+        events = Event.__table__
+        db.session.execute(
+            db.update(events)
+            .where(events.c.id == event_id)
+            .where(events.c.held_count > 0)
+            .values(held_count = events.c.held_count - 1)
+        )
+
+    def add_registration(self, attendee : Attendee, held : bool = False):
+        """
+        :param held: The seat was held for the attendee's checkout, it becomes theirs
+        """
+        # Claim a seat and insert the registration in one transaction; the conditional
+        # UPDATE is what prevents overselling when many attendees register at once.
+        events = Event.__table__
+        if held:
+            claim = db.update(events).where(events.c.held_count > 0).values(held_count = events.c.held_count - 1, registered_count = events.c.registered_count + 1)
+        else:
+            claim = db.update(events).where(events.c.registered_count + events.c.held_count < events.c.capacity).values(registered_count = events.c.registered_count + 1)
+
+        claimed : int = db.session.execute(claim.where(events.c.id == self.id)).rowcount
+
+        if not claimed:
+            db.session.rollback()
+            raise Event.EventError.Full()
+
+        registration_time : datetime = datetime.now()
+        db.session.add(Registration(attendee_id = attendee.id, event_id = self.id, registration_time = registration_time))
+        RegistrationDailyStats.record([{ 'event_id' : self.id, 'day' : registration_time.date(), 'registrations' : 1, 'revenue' : self.__registration_fee }])
+
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise Attendee.AttendeeError.AlreadyRegisteredToEvent()
+
+        db.session.expire(self, ['_Event__registered_count', '_Event__held_count'])
 
     def remove_registration(self, attendee : Attendee):
-        registration = Registration.find(attendee_id = attendee.id, event_id = self.id)
-        self.registrations.remove(registration)
+        removed : int = db.session.execute(
+            db.delete(Registration.__table__)
+            .where(Registration.__table__.c.attendee_id == attendee.id)
+            .where(Registration.__table__.c.event_id == self.id)
+        ).rowcount
+
+        if removed:
+            db.session.execute(
+                db.update(Event.__table__)
+                .where(Event.__table__.c.id == self.id)
+                .values(registered_count = Event.__table__.c.registered_count - removed)
+            )
+            RegistrationDailyStats.record([{ 'event_id' : self.id, 'day' : datetime.now().date(), 'cancellations' : removed }])
+
         db.session.commit()
+        db.session.expire(self, ['_Event__registered_count', 'registrations'])
 
     def set_fee(self, fee : float):
         self.__registration_fee = fee
-        db.session.commit()
 
     def remove_sponsor(self):
         self.__sponsor_id = None
-        db.session.commit()
 
     def set_sponsor(self, sponsor_id: int):
         self.__sponsor_id = sponsor_id
-        db.session.commit()
 
     def set_calendar(self, calendar_id : str):
         self.__calendar_id = calendar_id
-        db.session.commit()
 
     def get_calendar(self):
         return self.__calendar_id
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from models import db
+from sqlalchemy import DDL, event as sqlalchemy_event
+
+import re
+
+
+class EventSearch:
+    """
+    Full-text index over the title, description, category and location of events and the
+    organization name of their organizer. SQLite keeps it in an FTS5 table whose rowid is the
+    event id, PostgreSQL in a weighted tsvector with a GIN index. Neither can be declared as a
+    model, so the tables are created next to the others by db.create_all().
+    The index is not maintained by triggers: the controllers call index() and remove() in the
+    transaction that changes the event, so a rollback takes the index change with it.
+    """
+
+    __tablename__ = 'event_search'
+
+    # Relative weight of a match in each column, in SQLite's bm25() order
+    WEIGHTS     : dict[str, float] = { 'title' : 10.0, 'description' : 1.0, 'category' : 4.0, 'location' : 4.0, 'organization_name' : 6.0 }
+    HIGHLIGHT   : tuple[str, str]  = ('<mark>', '</mark>')
+
+    @staticmethod
+    def terms( query : str ) -> list[str]:
+        """
+        The words of a search box query. Anything else is dropped, so no operator of either
+        database's query syntax gets through.
+        """
+        return re.findall(r'\w+', (query or '').lower())
+
+    @staticmethod
+    def __dialect() -> str:
+        return db.session.get_bind().dialect.name
+
+    @staticmethod
+    def __match( terms : list[str] ) -> str:
+        # Every term must match, the last one as a prefix
+        if EventSearch.__dialect() == 'sqlite':
+            return ' '.join(f'"{term}"' for term in terms) + '*'
+        return ' & '.join(terms) + ':*'
+
+    @staticmethod
+    def __documents( event_ids : list[int] = None ):
+        """
+        The text of every event, or of some, with the columns in WEIGHTS order
+        """
+        from models.event import Event
+        from models.users.organizer import Organizer
+
+        events      = Event.__table__
+        organizers  = Organizer.__table__
+
+        select = (
+            db.select(
+                events.c.id,
+                events.c.title,
+                events.c.description,
+                events.c.category,
+                events.c.location,
+                db.func.coalesce(organizers.c[Organizer._Organizer__organization_name.key], '')
+            )
+            .select_from(events)
+            .outerjoin(organizers, organizers.c.id == events.c.organizer_id)
+        )
+        if event_ids is not None:
+            select = select.where(events.c.id.in_(event_ids))
+
+        return select
+
+    @staticmethod
+    def index( event_ids : list[int] ) -> None:
+        """
+        (Re)write the entries of these events from their current rows. Does not commit.
+        """
+        if not event_ids:
+            return
+
+        # The rows are read back with a plain SELECT, which does not autoflush pending changes
+        db.session.flush()
+        EventSearch.remove(event_ids)
+        EventSearch.__insert(event_ids)
+
+    @staticmethod
+    def remove( event_ids : list[int] ) -> None:
+        """
+        Drop the entries of these events. Does not commit.
+        """
+        if not event_ids:
+            return
+
+        key : str = 'rowid' if EventSearch.__dialect() == 'sqlite' else 'event_id'
+        table = db.table(EventSearch.__tablename__, db.column(key))
+        db.session.execute(db.delete(table).where(table.c[key].in_(event_ids)))
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Rebuild the whole index from the events table, for databases filled in bulk or
+        created before the index existed.
+        :return: The number of events indexed
+        """
+        db.session.execute(db.text(f'DELETE FROM {EventSearch.__tablename__}'))
+        written : int = EventSearch.__insert(None)
+        db.session.commit()
+
+        return written
+
+    @staticmethod
+    def __insert( event_ids : list[int] ) -> int:
+        documents = EventSearch.__documents(event_ids)
+
+        if EventSearch.__dialect() == 'sqlite':
+            table = db.table(EventSearch.__tablename__, db.column('rowid'), *[db.column(name) for name in EventSearch.WEIGHTS])
+            return db.session.execute(table.insert().from_select(['rowid', *EventSearch.WEIGHTS], documents)).rowcount
+
+        # setweight takes A to D, the PostgreSQL ranks of the bm25 weights above
+        documents = documents.subquery()
+        id, title, description, category, location, organization_name = documents.c
+        vector = lambda column, weight: db.func.setweight(db.func.to_tsvector('simple', column), db.literal_column(f"'{weight}'"))
+        table = db.table(EventSearch.__tablename__, db.column('event_id'), db.column('document'))
+        return db.session.execute(
+            table.insert().from_select(
+                ['event_id', 'document'],
+                db.select(
+                    id,
+                    vector(title, 'A').op('||')(vector(organization_name, 'B'))
+                    .op('||')(vector(category + ' ' + location, 'C'))
+                    .op('||')(vector(description, 'D'))
+                )
+            )
+        ).rowcount
+
+    @staticmethod
+    def search( query : str, limit : int, after : tuple[float, int] = None ) -> list[tuple[int, float]]:
+        """
+        Events matching every word of the query, best first. The last word also matches as a
+        prefix, so results show up while the word is being typed.
+        :param after: (score, event_id) of the last result of the previous page
+        :return: (event_id, score) rows, higher scores are better matches
+        """
+        terms : list[str] = EventSearch.terms(query)
+        if not terms:
+            return []
+
+        if EventSearch.__dialect() == 'sqlite':
+            weights : str = ', '.join(str(weight) for weight in EventSearch.WEIGHTS.values())
+            ranked : str = f'SELECT rowid AS event_id, -bm25({EventSearch.__tablename__}, {weights}) AS score FROM {EventSearch.__tablename__} WHERE {EventSearch.__tablename__} MATCH :match'
+        else:
+            ranked : str = f"SELECT event_id, ts_rank_cd(document, to_tsquery('simple', :match)) AS score FROM {EventSearch.__tablename__} WHERE document @@ to_tsquery('simple', :match)"
+
+        parameters : dict = { 'match' : EventSearch.__match(terms), 'limit' : limit }
+        keyset : str = ''
+        if after:
+            keyset = 'WHERE score < :score OR (score = :score AND event_id > :event_id)'
+            parameters['score'], parameters['event_id'] = after
+
+        return [
+            (event_id, float(score))
+            for event_id, score in db.session.execute(
+                db.text(f'SELECT event_id, score FROM ({ranked}) AS ranked {keyset} ORDER BY score DESC, event_id LIMIT :limit'),
+                parameters
+            )
+        ]
+
+    @staticmethod
+    def highlight( query : str, event_ids : list[int] ) -> dict[int, dict[str, str]]:
+        """
+        The title with every match marked and the part of the description around the matches,
+        for one page of results.
+        """
+        terms : list[str] = EventSearch.terms(query)
+        if not terms or not event_ids:
+            return {}
+
+        start, stop = EventSearch.HIGHLIGHT
+        parameters  : dict = { 'match' : EventSearch.__match(terms), 'start' : start, 'stop' : stop, 'event_ids' : list(event_ids) }
+        event_ids_parameter = db.bindparam('event_ids', expanding=True)
+
+        if EventSearch.__dialect() == 'sqlite':
+            rows = db.session.execute(db.text(
+                f"SELECT rowid, highlight({EventSearch.__tablename__}, 0, :start, :stop), snippet({EventSearch.__tablename__}, 1, :start, :stop, '…', 24) "
+                f"FROM {EventSearch.__tablename__} WHERE {EventSearch.__tablename__} MATCH :match AND rowid IN :event_ids"
+            ).bindparams(event_ids_parameter), parameters)
+        else:
+            parameters['title']     = f'StartSel={start}, StopSel={stop}, HighlightAll=true'
+            parameters['snippet']   = f'StartSel={start}, StopSel={stop}, MaxWords=24, MinWords=8'
+            rows = db.session.execute(db.text(
+                "SELECT id, ts_headline('simple', title, to_tsquery('simple', :match), :title), ts_headline('simple', description, to_tsquery('simple', :match), :snippet) "
+                "FROM events WHERE id IN :event_ids"
+            ).bindparams(event_ids_parameter), parameters)
+
+        return { event_id : { 'title' : title, 'description' : description } for event_id, title, description in rows }
+
+
+sqlalchemy_event.listen(db.metadata, 'after_create', DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {EventSearch.__tablename__} USING fts5("
+    f"{', '.join(EventSearch.WEIGHTS)}, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+).execute_if(dialect='sqlite'))
+
+sqlalchemy_event.listen(db.metadata, 'after_create', DDL(
+    f"CREATE TABLE IF NOT EXISTS {EventSearch.__tablename__} (event_id INTEGER PRIMARY KEY REFERENCES events (id) ON DELETE CASCADE, document TSVECTOR NOT NULL);"
+    f"CREATE INDEX IF NOT EXISTS ix_{EventSearch.__tablename__}_document ON {EventSearch.__tablename__} USING GIN (document)"
+).execute_if(dialect='postgresql'))
+
+sqlalchemy_event.listen(db.metadata, 'before_drop', DDL(
+    f'DROP TABLE IF EXISTS {EventSearch.__tablename__}'
+).execute_if(dialect=('sqlite', 'postgresql')))
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from models import db
+from datetime import datetime
+
+
+class PaymentIntent(db.Model):
+    """
+    Local copy of a Stripe PaymentIntent, kept up to date by the Stripe webhook so that
+    registration can be confirmed without calling Stripe.
+    """
+
+    SUCCEEDED   : str = "succeeded"
+    FAILED      : str = "failed"
+    CANCELED    : str = "canceled"
+    # Paid, but the event was full by then: the payment is given back, see PaymentController.refund_payment_intent
+    REFUND_REQUIRED : str = "refund_required"
+    REFUNDED        : str = "refunded"
+
+    # The intents that can no longer be paid
+    CLOSED      : tuple[str] = (SUCCEEDED, CANCELED, REFUND_REQUIRED, REFUNDED)
+
+    __tablename__ = 'payment_intents'
+    __table_args__ = (
+        db.Index('ix_payment_intents_attendee_id_event_id', 'attendee_id', 'event_id'),
+        db.Index('ix_payment_intents_status_created_at', 'status', 'created_at'),
+    )
+
+    id              = db.Column(db.String,      primary_key=True)
+    attendee_id     = db.Column(db.Integer,     db.ForeignKey('attendees.id', ondelete='CASCADE'), nullable=False)
+    event_id        = db.Column(db.Integer,     db.ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    amount          = db.Column(db.Integer,     nullable=False)
+    client_secret   = db.Column(db.String,      nullable=False)
+    status          = db.Column(db.String,      nullable=False)
+    created_at      = db.Column(db.DateTime,    nullable=False, default=datetime.now)
+    updated_at      = db.Column(db.DateTime,    nullable=False, default=datetime.now, onupdate=datetime.now)
+    # Whether a seat of the event is held for this checkout, see Event.hold_seat.
+    # Left out of __init__ so that merging a fresh copy from Stripe never resets it.
+    seat_held       = db.Column(db.Boolean,     nullable=False, default=False, server_default=db.false())
+
+    def __init__(self, id : str, attendee_id : int, event_id : int, amount : int, client_secret : str, status : str):
+        self.id             = id
+        self.attendee_id    = attendee_id
+        self.event_id       = event_id
+        self.amount         = amount
+        self.client_secret  = client_secret
+        self.status         = status
+
+    @staticmethod
+    def find(payment_intent_id : str) -> PaymentIntent | None:
+        return db.session.get(PaymentIntent, payment_intent_id)
+
+    @staticmethod
+    def find_open(attendee_id : int, event_id : int) -> PaymentIntent | None:
+        """
+        The most recent intent of an attendee for an event that can still be paid.
+        A failed payment leaves the intent payable, Stripe lets the same intent be retried.
+        """
+        return (
+            db.session.query(PaymentIntent)
+            .filter(PaymentIntent.attendee_id == attendee_id)
+            .filter(PaymentIntent.event_id == event_id)
+            .filter(PaymentIntent.status.notin_(PaymentIntent.CLOSED))
+            .order_by(PaymentIntent.created_at.desc())
+            .first()
+        )
+
+    @staticmethod
+    def count(attendee_id : int, event_id : int) -> int:
+        return (
+            db.session.query(PaymentIntent)
+            .filter(PaymentIntent.attendee_id == attendee_id)
+            .filter(PaymentIntent.event_id == event_id)
+            .count()
+        )
+
+    @staticmethod
+    def find_stale(created_before : datetime, limit : int) -> list[PaymentIntent]:
+        return (
+            db.session.query(PaymentIntent)
+            .filter(PaymentIntent.status.notin_(PaymentIntent.CLOSED))
+            .filter(PaymentIntent.created_at < created_before)
+            .order_by(PaymentIntent.created_at)
+            .limit(limit)
+            .all()
+        )
+
+    @staticmethod
+    def add(payment_intent : PaymentIntent) -> PaymentIntent:
+        payment_intent = db.session.merge(payment_intent)
+        db.session.commit()
+        return payment_intent
+
+    @staticmethod
+    def remove_all(attendee_id : int = None, event_id : int = None) -> None:
+        """
+        Delete the intents of an attendee or of an event and give back the seats they hold, before
+        the attendee or the event is deleted. Does not commit, so it runs in the same transaction.
+        """
+        from models.event import Event
+
+        intents = PaymentIntent.__table__
+        events  = Event.__table__
+        owned   = intents.c.attendee_id == attendee_id if attendee_id is not None else intents.c.event_id == event_id
+
+        held_seats = db.select(db.func.count()).where(intents.c.event_id == events.c.id).where(intents.c.seat_held).where(owned).scalar_subquery()
+        db.session.execute(
+            db.update(events)
+            .where(events.c.id.in_(db.select(intents.c.event_id).where(intents.c.seat_held).where(owned)))
+            .values(held_count = events.c.held_count - held_seats)
+        )
+        db.session.execute(db.delete(intents).where(owned))
+
+    @staticmethod
+    def backfill_seat_holds() -> int:
+        """
+        Hold a seat for every intent awaiting payment and recount the seats held per event, for
+        databases created before checkouts held seats. Failed payments hold none until retried.
+        :return: The number of intents now holding a seat
+        """
+        from models.event import Event
+
+        intents = PaymentIntent.__table__
+        events  = Event.__table__
+        pending = intents.c.status.notin_(PaymentIntent.CLOSED + (PaymentIntent.FAILED,))
+
+        held : int = db.session.execute(db.update(intents).where(pending).values(seat_held = True)).rowcount
+        db.session.execute(db.update(events).values(held_count =
+            db.select(db.func.count()).where(intents.c.event_id == events.c.id).where(intents.c.seat_held).scalar_subquery()
+        ))
+        db.session.commit()
+
+        return held
+
+    def __flip_seat(self, held : bool) -> bool:
+        # Conditional, so two requests racing on the same intent cannot both count its seat
+        flipped : int = db.session.execute(
+            db.update(PaymentIntent.__table__)
+            .where(PaymentIntent.__table__.c.id == self.id)
+            .where(PaymentIntent.__table__.c.seat_held == (not held))
+            .values(seat_held = held)
+        ).rowcount
+        db.session.expire(self, ['seat_held'])
+        return flipped == 1
+
+    def hold_seat(self) -> None:
+        """
+        Hold a seat of the event until the payment succeeds, fails or is canceled.
+        Does nothing if the intent already holds one. Does not commit.
+        :raises Event.EventError.Full: No seat is left, the transaction must be rolled back
+        """
+        from models.event import Event
+
+        if self.__flip_seat(True):
+            Event.hold_seat(self.event_id)
+
+    def release_seat(self) -> None:
+        """
+        Give the held seat back, if any. Does not commit.
+        """
+        from models.event import Event
+
+        if self.__flip_seat(False):
+            Event.release_seat(self.event_id)
+
+    def take_seat(self) -> bool:
+        """
+        Stop holding the seat because it is about to become a registration, see
+        Event.add_registration. Does not commit.
+        :return: Whether the intent held a seat
+        """
+        return self.__flip_seat(False)
+
+    @staticmethod
+    def find_refund_required(limit : int) -> list[PaymentIntent]:
+        return (
+            db.session.query(PaymentIntent)
+            .filter(PaymentIntent.status == PaymentIntent.REFUND_REQUIRED)
+            .order_by(PaymentIntent.updated_at)
+            .limit(limit)
+            .all()
+        )
+
+    def is_final(self) -> bool:
+        return self.status in PaymentIntent.CLOSED
+
+    def is_refunded(self) -> bool:
+        return self.status in (PaymentIntent.REFUND_REQUIRED, PaymentIntent.REFUNDED)
+
+    def set_status(self, status : str) -> None:
+        self.status = status
@@ -1,8 +1,12 @@
 from models import db
 from datetime import datetime
+from typing import Iterator
 
 class Registration(db.Model):
     __tablename__ = 'registrations'
+    __table_args__ = (
+        db.Index('ix_registrations_event_id_registration_time', 'event_id', 'registration_time'),
+    )
 
     attendee_id = db.Column(db.Integer, db.ForeignKey('attendees.id'), primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), primary_key=True)
@@ -16,45 +20,49 @@ class Registration(db.Model):
         query = db.session.query(Registration)
 
         if attendee_id > 0:
-            query.filter(Registration.attendee_id == attendee_id)
+            query = query.filter(Registration.attendee_id == attendee_id)
         if event_id > 0:
-            query.filter(Registration.event_id == event_id)
+            query = query.filter(Registration.event_id == event_id)
 
         if (attendee_id > 0) and (event_id > 0):
             return query.first()
         
         return query.all()
 
+    ROSTER_COLUMNS : tuple[str] = ('attendee_id', 'first_name', 'last_name', 'email', 'registration_time')
 
-    def get_analytics(event_id: int, group_by: str = "day") -> list[dict]:
+    @staticmethod
+    def stream_roster( event_id : int, columns : list[str], registered_since : datetime = None, chunk_size : int = 1000 ) -> Iterator[list[tuple]]:
         """
-        Get the number of registrations for a specific event, grouped by a time period.
-        :param session: SQLAlchemy session
-        :param event_id: The ID of the event
-        :param group_by: The time period to group by ('day', 'week', 'month')
-        :return: A list of dictionaries containing the date and registration count
+        The attendees of an event in registration order, as plain rows read through a server-side
+        cursor, chunk_size at a time, so no ORM object is built and memory does not grow with the event.
+        :param columns: Names out of ROSTER_COLUMNS
+        :param registered_since: Only the registrations made at or after this time
         """
+        from models.users.user import User
 
+        users   = User.__table__
+        table   = Registration.__table__
+        select_columns : dict = {
+            'attendee_id'       : table.c.attendee_id,
+            'first_name'        : users.c.first_name,
+            'last_name'         : users.c.last_name,
+            'email'             : users.c.email,
+            'registration_time' : table.c.registration_time
+        }
 
-        # Define group function based on the 'group_by' parameter
-        if group_by == "week":
-            group_func = db.func.date_trunc('week', Registration.registration_time)
-        elif group_by == "month":
-            group_func = db.func.date_trunc('month', Registration.registration_time)
-        else:
-            group_func = db.func.date(Registration.registration_time)  # Default is day
-
-        # Query to group registrations by time period
-        registration_data = (
-            db.session.query(group_func, db.func.count().label("registrations"))
-            .filter(Registration.event_id == event_id)
-            .group_by(group_func)
-            .order_by(group_func)
-            .all()
+        select = (
+            db.select(*[select_columns[column] for column in columns])
+            .join(users, users.c.id == table.c.attendee_id)
+            .where(table.c.event_id == event_id)
+            .order_by(table.c.registration_time, table.c.attendee_id)
         )
+        if registered_since is not None:
+            select = select.where(table.c.registration_time >= registered_since)
 
-        # Format the result
-        return [
-            {"date": str(date), "registrations": registrations}
-            for date, registrations in registration_data
-        ]
\ No newline at end of file
+        result = db.session.execute(select.execution_options(yield_per=chunk_size))
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
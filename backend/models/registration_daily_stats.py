@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from models import db
+from datetime import date, timedelta
+
+
+class RegistrationDailyStats(db.Model):
+    """
+    Registrations, cancellations and revenue per event and day. Rows are bumped in the same
+    transaction as the registration change, so analytics read a few buckets instead of
+    scanning every registration. Weeks and months are summed from the days.
+    Cancellations are counted on the day they happen and do not take back revenue, the app
+    does not refund.
+    """
+
+    __tablename__ = 'registration_daily_stats'
+
+    event_id        = db.Column(db.Integer, db.ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    day             = db.Column(db.Date,    primary_key=True)
+    registrations   = db.Column(db.Integer, nullable=False, default=0)
+    cancellations   = db.Column(db.Integer, nullable=False, default=0)
+    revenue         = db.Column(db.Float,   nullable=False, default=0.00)
+
+    GROUPS : tuple[str] = ('day', 'week', 'month')
+
+    @staticmethod
+    def record(rows : list[dict]) -> None:
+        """
+        Add to the counters of (event_id, day) buckets, creating the ones that do not exist.
+        Each row has event_id and day, and any of registrations, cancellations and revenue.
+        Does not commit, so it lands in the transaction of the registration change.
+        """
+        if not rows:
+            return
+
+        rows = [{ 'registrations' : 0, 'cancellations' : 0, 'revenue' : 0.00, **row } for row in rows]
+        table = RegistrationDailyStats.__table__
+        dialect : str = db.session.get_bind().dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+
+            statement = insert(table)
+            db.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements = [table.c.event_id, table.c.day],
+                    set_ = {
+                        'registrations' : table.c.registrations + statement.excluded.registrations,
+                        'cancellations' : table.c.cancellations + statement.excluded.cancellations,
+                        'revenue'       : table.c.revenue       + statement.excluded.revenue
+                    }
+                ),
+                rows
+            )
+            return
+
+        # Other databases: bump the bucket, create it when nothing was bumped
+        for row in rows:
+            updated : int = db.session.execute(
+                db.update(table)
+                .where(table.c.event_id == row['event_id'])
+                .where(table.c.day == row['day'])
+                .values(
+                    registrations = table.c.registrations + row['registrations'],
+                    cancellations = table.c.cancellations + row['cancellations'],
+                    revenue       = table.c.revenue       + row['revenue']
+                )
+            ).rowcount
+            if not updated:
+                db.session.execute(db.insert(table), [row])
+
+    @staticmethod
+    def find(event_id : int, group_by : str = 'day') -> list[dict]:
+        """
+        The buckets of an event, oldest first. Weeks start on Monday.
+        :param group_by: 'day', 'week' or 'month'
+        """
+        days : list[RegistrationDailyStats] = (
+            db.session.query(RegistrationDailyStats)
+            .filter(RegistrationDailyStats.event_id == event_id)
+            .order_by(RegistrationDailyStats.day)
+            .all()
+        )
+
+        buckets : dict[date, dict] = {}
+        for stats in days:
+            if group_by == 'week':
+                bucket : date = stats.day - timedelta(days=stats.day.weekday())
+            elif group_by == 'month':
+                bucket : date = stats.day.replace(day=1)
+            else:
+                bucket : date = stats.day
+
+            totals : dict = buckets.setdefault(bucket, { 'date' : str(bucket), 'registrations' : 0, 'cancellations' : 0, 'revenue' : 0.00 })
+            totals['registrations'] += stats.registrations
+            totals['cancellations'] += stats.cancellations
+            totals['revenue']       += stats.revenue
+
+        return list(buckets.values())
+
+    @staticmethod
+    def find_by_organizer(organizer_id : int) -> list[tuple]:
+        """
+        The daily buckets of every event of an organizer in one query, ordered by event and day.
+        :return: (event_id, day, registrations, cancellations, revenue) rows
+        """
+        from models.event import Event
+
+        table   = RegistrationDailyStats.__table__
+        events  = Event.__table__
+
+        return db.session.execute(
+            db.select(table.c.event_id, table.c.day, table.c.registrations, table.c.cancellations, table.c.revenue)
+            .join(events, events.c.id == table.c.event_id)
+            .where(events.c.organizer_id == organizer_id)
+            .order_by(table.c.event_id, table.c.day)
+        ).all()
+
+    @staticmethod
+    def backfill(event_id : int = None) -> int:
+        """
+        Rebuild the buckets from the registrations table, for every event or for one.
+        Cancelled registrations are gone from that table, so they cannot be recovered, and
+        revenue is counted at the event's current fee. Uses plain SQL that runs on any database.
+        :return: The number of buckets written
+        """
+        from models.event import Event
+        from models.registration import Registration
+
+        table           = RegistrationDailyStats.__table__
+        registrations   = Registration.__table__
+        events          = Event.__table__
+
+        delete = db.delete(table)
+        if event_id is not None:
+            delete = delete.where(table.c.event_id == event_id)
+        db.session.execute(delete)
+
+        day = db.func.date(registrations.c.registration_time)
+        select = (
+            db.select(
+                registrations.c.event_id,
+                day,
+                db.func.count(),
+                db.literal(0),
+                db.func.count() * db.func.max(events.c.registration_fee)
+            )
+            .join(events, events.c.id == registrations.c.event_id)
+            .group_by(registrations.c.event_id, day)
+        )
+        if event_id is not None:
+            select = select.where(registrations.c.event_id == event_id)
+
+        written : int = db.session.execute(table.insert().from_select(['event_id', 'day', 'registrations', 'cancellations', 'revenue'], select)).rowcount
+        db.session.commit()
+
+        return written
@@ -2,11 +2,19 @@ from models import db
 
 class SponsorshipRequest(db.Model):
     __tablename__ = 'sponsorship_requests'
+    __table_args__ = (
+        db.Index('ix_sponsorship_requests_stakeholder_id_status_id', 'stakeholder_id', 'status', 'id'),
+    )
+
+    PENDING     : str = "PENDING"
+    ACCEPTED    : str = "ACCEPTED"
+    REJECTED    : str = "REJECTED"
+    STATUSES    : tuple[str] = (PENDING, ACCEPTED, REJECTED)
 
     id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey('events.id'), nullable=False)
     stakeholder_id = db.Column(db.Integer, db.ForeignKey('stakeholders.id'), nullable=False)
-    status = db.Column(db.String, nullable=False, default="pending")  # could be "pending", "accepted", "rejected"
+    status = db.Column(db.String, nullable=False, default=PENDING)  # one of STATUSES
 
     # Relationships
     event = db.relationship('Event', backref='sponsorship_requests')
@@ -15,3 +23,70 @@ class SponsorshipRequest(db.Model):
     def __init__(self, event_id, stakeholder_id):
         self.event_id = event_id
         self.stakeholder_id = stakeholder_id
+        self.status = SponsorshipRequest.PENDING
+
+    @staticmethod
+    def find_inbox( stakeholder_id : int, status : str, limit : int, before_id : int = None ) -> list:
+        """
+        One page of the requests sent to a stakeholder, newest first, with the event and its
+        organizer in the same query. Walks the (stakeholder_id, status, id) index backwards,
+        so a page costs the same whether the stakeholder has ten requests or ten thousand.
+        :param before_id: The id of the last request of the previous page, None for the first page
+        :return: Rows with the request, event and organizer columns, see StakeholderController.get_sponsorship_requests
+        """
+        from models.event import Event
+        from models.users.user import User
+        from models.users.organizer import Organizer
+
+        requests    = SponsorshipRequest.__table__
+        events      = Event.__table__
+        users       = User.__table__
+        organizers  = Organizer.__table__
+
+        select = (
+            db.select(
+                requests.c.id,
+                requests.c.status,
+                events.c.id.label('event_id'),
+                events.c.title,
+                events.c.description,
+                events.c.category,
+                events.c.location,
+                events.c.start,
+                events.c.end,
+                events.c.capacity,
+                events.c.registered_count,
+                events.c.event_type,
+                events.c.registration_fee,
+                users.c.first_name,
+                users.c.last_name,
+                organizers.c[Organizer._Organizer__organization_name.key].label('organization_name')
+            )
+            .join(events, events.c.id == requests.c.event_id)
+            .join(organizers, organizers.c.id == events.c.organizer_id)
+            .join(users, users.c.id == organizers.c.id)
+            .where(requests.c.stakeholder_id == stakeholder_id)
+            .where(requests.c.status == status)
+        )
+        if before_id is not None:
+            select = select.where(requests.c.id < before_id)
+
+        return db.session.execute(select.order_by(requests.c.id.desc()).limit(limit)).all()
+
+    @staticmethod
+    def normalize_statuses() -> int:
+        """
+        Upper case every status. Requests used to be created as 'pending' while answers were
+        written as 'ACCEPTED' and 'REJECTED', which hid those requests from the inbox.
+        :return: The number of requests updated
+        """
+        requests = SponsorshipRequest.__table__
+
+        updated : int = db.session.execute(
+            db.update(requests)
+            .where(requests.c.status != db.func.upper(requests.c.status))
+            .values(status = db.func.upper(requests.c.status))
+        ).rowcount
+        db.session.commit()
+
+        return updated
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from models import db
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+
+
+class StripeWebhookEvent(db.Model):
+    """
+    Stripe event ids already handled, Stripe delivers at least once so duplicates are expected.
+    """
+
+    __tablename__ = 'stripe_webhook_events'
+
+    id              = db.Column(db.String,      primary_key=True)
+    type            = db.Column(db.String,      nullable=False)
+    received_at     = db.Column(db.DateTime,    nullable=False, default=datetime.now)
+
+    def __init__(self, id : str, type : str):
+        self.id     = id
+        self.type   = type
+
+    @staticmethod
+    def is_processed(event_id : str) -> bool:
+        return db.session.get(StripeWebhookEvent, event_id) is not None
+
+    @staticmethod
+    def mark_processed(event_id : str, type : str) -> bool:
+        """
+        :return: False if another delivery of the same event got there first
+        """
+        db.session.add(StripeWebhookEvent(event_id, type))
+        try:
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from contextlib import ContextDecorator
+
+from models import db
+
+
+class UnitOfWork(ContextDecorator):
+    """
+    One transaction around a block of model changes: commits once on the way out, rolls
+    back if the block raises. Model setters never commit, so every edit goes through here.
+    Nested units join the outermost one, which is the only one that commits.
+
+        with UnitOfWork():
+            event.set_title(title)
+            event.set_fee(fee)
+
+    Also works as a decorator, @UnitOfWork().
+    """
+
+    __DEPTH : str = 'unit_of_work_depth'
+
+    def __enter__(self) -> UnitOfWork:
+        db.session.info[UnitOfWork.__DEPTH] = db.session.info.get(UnitOfWork.__DEPTH, 0) + 1
+        return self
+
+    def __exit__(self, exception_type, exception, traceback) -> bool:
+        depth : int = db.session.info[UnitOfWork.__DEPTH] - 1
+        db.session.info[UnitOfWork.__DEPTH] = depth
+
+        if exception_type is not None:
+            # Inner units leave the rollback to the outermost one so that it sees the exception too
+            if depth == 0:
+                db.session.rollback()
+            return False
+
+        if depth == 0:
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+        return False
+
+    def apply( fields : dict[str, tuple] ) -> list[str]:
+        """
+        PATCH semantics for a set of setters. 'fields' maps a name to (value, getter, setter);
+        values left as None are skipped, and so are values equal to what is stored, so the
+        UPDATE only carries the columns that changed. Does not commit.
+        :return: The names of the fields that changed
+        """
+        changed : list[str] = []
+
+        for name, (value, getter, setter) in fields.items():
+            if value is not None and value != getter():
+                setter(value)
+                changed.append(name)
+
+        return changed
+
+    def is_active() -> bool:
+        return db.session.info.get(UnitOfWork.__DEPTH, 0) > 0
@@ -13,11 +13,16 @@ class Attendee(User):
         class AlreadyRegisteredToEvent(Exception):
             def __init__(self, message : str = 'already_registered_to_event'):
                 super().__init__(message)
+
+        class ScheduleConflict(Exception):
+            HTTP_code : int = 409
+            def __init__(self, message : str = 'schedule_conflict'):
+                super().__init__(message)
             
     __tablename__ = 'attendees'
 
     id                      = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
-    __stripe_customer_id    = db.Column('stripe_customer_id', db.String)
+    __stripe_customer_id    = db.Column('stripe_customer_id', db.String, unique=True)
 
     registrations = db.relationship('Registration', back_populates='attendee', cascade='all, delete-orphan')
     
@@ -33,6 +38,22 @@ class Attendee(User):
     def set_customer_id(self, stripe_customer_id):
         self.__stripe_customer_id = stripe_customer_id
 
+    def claim_customer_id(self, stripe_customer_id : str) -> str:
+        """
+        Store the Stripe customer only if the attendee has none yet, so that two concurrent
+        first payments agree on a single customer.
+        :return: The customer id the attendee ends up with
+        """
+        db.session.execute(
+            db.update(Attendee.__table__)
+            .where(Attendee.__table__.c.id == self.id)
+            .where(Attendee.__table__.c.stripe_customer_id.is_(None))
+            .values(stripe_customer_id = stripe_customer_id)
+        )
+        db.session.commit()
+        db.session.refresh(self)
+        return self.__stripe_customer_id
+
     def get_events(self):
         return [registration.event for registration in self.registrations]
 
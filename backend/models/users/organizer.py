@@ -84,9 +84,8 @@ class Organizer(User):
         )
 
         db.session.add(new_event)
-        db.session.commit()
+        db.session.flush()
 
         self.__event_id = new_event.get_id()
-        db.session.commit()
 
         return self.__event_id
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+import os
+
+
+def _hash(plain_text_password : bytes, rounds : int) -> bytes:
+    return bcrypt.hashpw(plain_text_password, bcrypt.gensalt(rounds))
+
+def _verify(plain_text_password : bytes, hashed_password : bytes) -> bool:
+    return bcrypt.checkpw(plain_text_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing on a bounded process pool.
+    Request threads only wait on the pool, so a burst of logins is capped at 'workers'
+    CPUs instead of pinning every web worker. With workers = 0 hashing runs inline.
+    """
+
+    rounds      : int                   = 12
+    workers     : int                   = 0
+    __pool      : ProcessPoolExecutor   = None
+    __pool_pid  : int                   = None
+
+    def configure( rounds : int = 12, workers : int = 0 ) -> None:
+        PasswordHasher.rounds   = rounds
+        PasswordHasher.workers  = workers
+        PasswordHasher.shutdown()
+
+    def shutdown() -> None:
+        if PasswordHasher.__pool:
+            PasswordHasher.__pool.shutdown(wait=False)
+        PasswordHasher.__pool       = None
+        PasswordHasher.__pool_pid   = None
+
+    def __run(function, *args):
+        if PasswordHasher.workers <= 0:
+            return function(*args)
+
+        # Pools do not survive a fork, so every preforked web worker creates its own
+        if PasswordHasher.__pool is None or PasswordHasher.__pool_pid != os.getpid():
+            PasswordHasher.__pool       = ProcessPoolExecutor(max_workers=PasswordHasher.workers)
+            PasswordHasher.__pool_pid   = os.getpid()
+
+        return PasswordHasher.__pool.submit(function, *args).result()
+
+    def hash( plain_text_password : str ) -> str:
+        hashed : bytes = PasswordHasher.__run(_hash, plain_text_password.encode('utf-8'), PasswordHasher.rounds)
+        return hashed.decode('utf-8')
+
+    def verify( plain_text_password : str, hashed_password : str ) -> bool:
+        return PasswordHasher.__run(_verify, plain_text_password.encode('utf-8'), hashed_password.encode('utf-8'))
+
+    def get_rounds( hashed_password : str ) -> int:
+        # bcrypt hashes look like $2b$<rounds>$<salt and hash>
+        return int(hashed_password.split('$')[2])
+
+    def needs_rehash( hashed_password : str ) -> bool:
+        return PasswordHasher.get_rounds(hashed_password) != PasswordHasher.rounds
@@ -1,7 +1,11 @@
 from __future__ import annotations
 from models import db
+from .password_hasher import PasswordHasher
+from models.unit_of_work import UnitOfWork
+from datetime import datetime
+from typing import Iterator
 
-import bcrypt
+import json
 
 class User(db.Model):
 
@@ -17,7 +21,25 @@ class User(db.Model):
             def __init__(self, message = "user_already_exists"):
                 super().__init__(message)
 
+        class InvalidDirectory(Exception):
+            HTTP_code = 400
+            def __init__(self, message = "invalid_directory_query"):
+                super().__init__(message)
+
     __tablename__ = 'users'
+    # One index per directory sort, and one more with the user type in front for the filtered directory
+    __table_args__ = (
+        db.Index('ix_users_last_name_id',               'last_name',    'id'),
+        db.Index('ix_users_created_at_id',              'created_at',   'id'),
+        db.Index('ix_users_user_type_id',               'user_type',    'id'),
+        db.Index('ix_users_user_type_email',            'user_type',    'email'),
+        db.Index('ix_users_user_type_last_name_id',     'user_type',    'last_name',    'id'),
+        db.Index('ix_users_user_type_created_at_id',    'user_type',    'created_at',   'id'),
+    )
+
+    # Keys the admin directory can be sorted by and columns its export can hold
+    DIRECTORY_SORTS     : tuple[str] = ('id', 'email', 'last_name', 'created_at')
+    DIRECTORY_COLUMNS   : tuple[str] = ('id', 'email', 'first_name', 'last_name', 'user_type', 'created_at', 'organization_name', 'phone_number')
 
     id              = db.Column(db.Integer, primary_key=True, autoincrement=True)
     __email         = db.Column("email", db.String, unique=True, nullable=False)
@@ -25,6 +47,7 @@ class User(db.Model):
     __last_name     = db.Column("last_name", db.String, nullable=False)
     __first_name    = db.Column("first_name", db.String, nullable=False)
     __user_type     = db.Column("user_type", db.String)
+    __created_at    = db.Column("created_at", db.DateTime, nullable=False, default=datetime.now)
 
     __mapper_args__ = {"polymorphic_identity": "user", "polymorphic_on": __user_type}
 
@@ -40,7 +63,8 @@ class User(db.Model):
             'email'         : self.__email,
             'first_name'    : self.__first_name,
             'last_name'     : self.__last_name,
-            'user_type'     : self.__user_type
+            'user_type'     : self.__user_type,
+            'created_at'    : self.__created_at.isoformat() if self.__created_at else None
         }
         return data
 
@@ -52,7 +76,6 @@ class User(db.Model):
     
     def set_email(self, value: str) -> None:
         self.__email = value
-        db.session.commit()
 
     
     def get_first_name(self) -> str:
@@ -61,7 +84,6 @@ class User(db.Model):
    
     def set_first_name(self, value: str) -> None:
         self.__first_name = value
-        db.session.commit()
 
 
     
@@ -71,20 +93,17 @@ class User(db.Model):
 
     def set_last_name(self, value: str) -> None:
         self.__last_name = value
-        db.session.commit()
 
     def get_password(self) -> str:
         return self.__password
 
     def set_password(self, plain_text__password: str) -> None:
 
-        hashed = bcrypt.hashpw(plain_text__password.encode('utf-8'), bcrypt.gensalt())
-        self.__password = hashed.decode('utf-8')
-        db.session.commit()
+        self.__password = PasswordHasher.hash(plain_text__password)
 
     def check_password(self, plain_text__password: str) -> bool:
        
-        return bcrypt.checkpw(plain_text__password.encode('utf-8'), self.__password.encode('utf-8'))
+        return PasswordHasher.verify(plain_text__password, self.__password)
 
     
     def get_id(self) -> int:
@@ -93,6 +112,141 @@ class User(db.Model):
     def get_type(self) -> str:
         return self.__user_type
 
+    def get_created_at(self) -> datetime:
+        return self.__created_at
+
+    @staticmethod
+    def backfill_created_at() -> int:
+        """
+        Give a signup date to users created before the column existed. The real one is lost,
+        so attendees get their first registration, which they cannot have made before signing
+        up, and everyone else the time of the backfill.
+        :return: The number of users updated
+        """
+        from models.registration import Registration
+
+        users           = User.__table__
+        registrations   = Registration.__table__
+        first_registration = (
+            db.select(db.func.min(registrations.c.registration_time))
+            .where(registrations.c.attendee_id == users.c.id)
+            .scalar_subquery()
+        )
+
+        updated : int = db.session.execute(
+            db.update(users)
+            .where(users.c.created_at.is_(None))
+            .values(created_at = db.func.coalesce(first_registration, datetime.now()))
+        ).rowcount
+        db.session.commit()
+
+        return updated
+
+    @staticmethod
+    def __directory_where( select, filters : dict ):
+        """
+        :param filters: user_type, email_prefix, created_since and created_until (exclusive), all optional
+        """
+        users = User.__table__
+
+        if filters.get('user_type'):
+            select = select.where(users.c.user_type == filters['user_type'])
+        if filters.get('email_prefix'):
+            # A range on the unique email index, where LIKE would scan on databases with case-insensitive LIKE
+            prefix : str = filters['email_prefix']
+            select = select.where(users.c.email >= prefix, users.c.email < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        if filters.get('created_since'):
+            select = select.where(users.c.created_at >= filters['created_since'])
+        if filters.get('created_until'):
+            select = select.where(users.c.created_at < filters['created_until'])
+
+        return select
+
+    @staticmethod
+    def __directory_order( select, sort : str, descending : bool, after : tuple = None ):
+        users   = User.__table__
+        key     = users.c[sort]
+
+        if after:
+            # A row value comparison, which both databases turn into a seek on the index
+            keyset = db.tuple_(key, users.c.id)
+            select = select.where(keyset < db.tuple_(*after) if descending else keyset > db.tuple_(*after))
+
+        if descending:
+            return select.order_by(key.desc(), users.c.id.desc())
+        return select.order_by(key, users.c.id)
+
+    @staticmethod
+    def find_directory( filters : dict, sort : str = 'id', descending : bool = False, limit : int = None, after : tuple = None ) -> list[User]:
+        """
+        One page of the admin directory. Users come back as their subclass with the subclass
+        columns loaded by the same query, instead of one extra load per organizer or attendee.
+        :param after: The (sort key, id) of the last user of the previous page
+        """
+        select = db.select(db.with_polymorphic(User, '*'))
+        select = User.__directory_order(User.__directory_where(select, filters), sort, descending, after)
+        if limit is not None:
+            select = select.limit(limit)
+
+        return db.session.execute(select).scalars().all()
+
+    @staticmethod
+    def stream_directory( filters : dict, columns : list[str], sort : str = 'id', descending : bool = False, chunk_size : int = 1000 ) -> Iterator[list[tuple]]:
+        """
+        The whole directory as plain rows read chunk_size at a time, like Registration.stream_roster.
+        :param columns: Names out of DIRECTORY_COLUMNS
+        """
+        from models.users.organizer import Organizer
+
+        users       = User.__table__
+        organizers  = Organizer.__table__
+        select_columns : dict = {
+            'organization_name' : organizers.c[Organizer._Organizer__organization_name.key],
+            'phone_number'      : organizers.c[Organizer._Organizer__phone_number.key],
+            **{ column : users.c[column] for column in ('id', 'email', 'first_name', 'last_name', 'user_type', 'created_at') }
+        }
+
+        select = db.select(*[select_columns[column] for column in columns]).select_from(users)
+        if 'organization_name' in columns or 'phone_number' in columns:
+            select = select.outerjoin(organizers, organizers.c.id == users.c.id)
+        select = User.__directory_order(User.__directory_where(select, filters), sort, descending)
+
+        result = db.session.execute(select.execution_options(yield_per=chunk_size))
+        try:
+            for rows in result.partitions():
+                yield rows
+        finally:
+            result.close()
+
+    @staticmethod
+    def count_directory( filters : dict, exact_up_to : int ) -> tuple[int, bool]:
+        """
+        The number of users matching the filters. Counting stops after exact_up_to rows; past
+        that, PostgreSQL, where a count reads every matching row, reports the planner's
+        estimate instead. Other databases count exactly.
+        :return: (count, whether it is exact)
+        """
+        users = User.__table__
+        matching = User.__directory_where(db.select(users.c.id), filters)
+
+        counted : int = db.session.scalar(db.select(db.func.count()).select_from(matching.limit(exact_up_to + 1).subquery()))
+        if counted <= exact_up_to:
+            return counted, True
+
+        bind = db.session.get_bind()
+        if bind.dialect.name != 'postgresql':
+            return db.session.scalar(db.select(db.func.count()).select_from(matching.subquery())), True
+
+        # The filters stay bound parameters; the statement is in the driver's paramstyle, so it
+        # goes to the driver as is rather than through text()
+        compiled = matching.compile(dialect=bind.dialect)
+        plan : list = db.session.connection().exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        # Never below what was already counted
+        return max(int(plan[0]['Plan']['Plan Rows']), counted), False
+
     @staticmethod
     def add(user: User) -> int:
 
@@ -113,6 +267,10 @@ class User(db.Model):
 
     @staticmethod
     def find(user_id: int = -1, email: str = None) -> User | list[User] | None:
+
+        # Goes through the session identity map, so repeated lookups in a request are free
+        if user_id > 0 and email is None:
+            return db.session.get(User, user_id)
         
         query = db.session.query(User)
         if user_id > 0:
@@ -131,4 +289,8 @@ class User(db.Model):
         user = User.find(email=email)
         if user:
             if user.check_password(password):
+                # Upgrade hashes made with another cost now that we know the plain text
+                if PasswordHasher.needs_rehash(user.__password):
+                    with UnitOfWork():
+                        user.set_password(password)
                 return user
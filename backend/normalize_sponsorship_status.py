@@ -0,0 +1,16 @@
+from app import create_app
+from models import db, SponsorshipRequest
+
+# Upper cases sponsorship request statuses on databases created while new requests were
+# stored as 'pending', and adds the inbox index.
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        # db.create_all() skips existing tables, so the index is created on its own
+        for index in SponsorshipRequest.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
+
+        updated : int = SponsorshipRequest.normalize_statuses()
+
+        print(f"Sponsorship request statuses normalized successfully! ({updated} requests updated)")
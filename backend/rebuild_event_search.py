@@ -0,0 +1,15 @@
+from app import create_app
+from models import db, EventSearch
+
+# Rebuilds the event_search full-text index from the events table, e.g. after upgrading an
+# existing database or loading events in bulk.
+if __name__ == "__main__":
+    app = create_app()
+
+    with app.app_context():
+        # Creates the index on databases that predate it
+        db.create_all()
+
+        written : int = EventSearch.rebuild()
+
+        print(f"Event search index rebuilt successfully! ({written} events)")
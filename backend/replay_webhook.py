@@ -0,0 +1,83 @@
+"""
+Replay a Stripe webhook against a local server, signed the way Stripe signs it.
+
+    python replay_webhook.py --file event.json
+    python replay_webhook.py --type payment_intent.succeeded --payment-intent pi_123 --user-id 2 --event-id 1 --amount 2874
+
+The signing secret is read from STRIPE_WEBHOOK_SECRET (the whsec_... value) unless --secret is given.
+"""
+import argparse
+import dotenv
+import hashlib
+import hmac
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+
+def sign( payload : str, secret : str, timestamp : int = None ) -> str:
+    timestamp   : int = timestamp or int(time.time())
+    signature   : str = hmac.new(secret.encode('utf-8'), f'{timestamp}.{payload}'.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+def build_event( event_type : str, payment_intent_id : str, user_id : int, event_id : int, amount : int ) -> dict:
+    return {
+        'id'        : f'evt_replay_{uuid.uuid4().hex}',
+        'object'    : 'event',
+        'type'      : event_type,
+        'data'      : {
+            'object' : {
+                'id'            : payment_intent_id,
+                'object'        : 'payment_intent',
+                'amount'        : amount,
+                'client_secret' : f'{payment_intent_id}_secret_replay',
+                'status'        : 'succeeded' if event_type == 'payment_intent.succeeded' else 'requires_payment_method',
+                'metadata'      : { 'user_id' : str(user_id), 'event_id' : str(event_id) }
+            }
+        }
+    }
+
+def send( url : str, payload : str, signature : str ) -> tuple[int, str]:
+    request = urllib.request.Request(url, data=payload.encode('utf-8'), method='POST', headers={
+        'Content-Type'      : 'application/json',
+        'Stripe-Signature'  : signature
+    })
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode('utf-8')
+
+
+if __name__ == '__main__':
+    dotenv.load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url',            default='http://localhost:5003/payment/webhook')
+    parser.add_argument('--secret',         default=os.getenv('STRIPE_WEBHOOK_SECRET'))
+    parser.add_argument('--file',           help='A Stripe event as JSON, e.g. saved from the dashboard')
+    parser.add_argument('--type',           default='payment_intent.succeeded', choices=['payment_intent.succeeded', 'payment_intent.payment_failed'])
+    parser.add_argument('--payment-intent', default=f'pi_replay_{uuid.uuid4().hex[:16]}')
+    parser.add_argument('--user-id',        type=int)
+    parser.add_argument('--event-id',       type=int)
+    parser.add_argument('--amount',         type=int, default=0)
+    parser.add_argument('--times',          type=int, default=1, help='Send the same delivery several times to check idempotency')
+    args = parser.parse_args()
+
+    if not args.secret:
+        parser.error('no signing secret, set STRIPE_WEBHOOK_SECRET or pass --secret')
+
+    if args.file:
+        with open(args.file) as file:
+            payload : str = file.read()
+    else:
+        if args.user_id is None or args.event_id is None:
+            parser.error('--user-id and --event-id are required without --file')
+        payload : str = json.dumps(build_event(args.type, args.payment_intent, args.user_id, args.event_id, args.amount))
+
+    for _ in range(args.times):
+        status, body = send(args.url, payload, sign(payload, args.secret))
+        print(status, body.strip())
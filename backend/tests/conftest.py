@@ -0,0 +1,76 @@
+"""
+Shared fixtures. Every test gets its own SQLite database, an app without background workers,
+the fake Calendar service and benchmarks.fake_stripe standing in for Stripe.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app                        import create_app
+from benchmarks.fake_stripe     import FakeStripe
+from controllers                import AttendeeController, OrganizerController, EventController
+from models                     import db
+
+
+WEBHOOK_SECRET : str = 'whsec_test_secret'
+
+
+@pytest.fixture
+def fake_stripe():
+    with FakeStripe() as fake_stripe:
+        yield fake_stripe
+
+
+@pytest.fixture
+def app(tmp_path, fake_stripe):
+    app = create_app({
+        'DATABASE_URI'          : f'sqlite:///{tmp_path / "test.sqlite3"}',
+        'JWT_SECRET_KEY'        : 'test-secret-key-that-is-long-enough-for-hs256',
+        'STRIPE_SECRET_KEY'     : 'sk_test_fake',
+        'STRIPE_API_BASE'       : fake_stripe.url,
+        'STRIPE_WEBHOOK_SECRET' : WEBHOOK_SECRET,
+        'GOOGLE_CALENDAR_FAKE'  : '1',
+        'BCRYPT_ROUNDS'         : 4
+    })
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_attendee(app):
+    count = itertools.count(1)
+
+    def create_attendee() -> int:
+        number : int = next(count)
+        return AttendeeController.create_attendee(f'attendee{number}@example.com', 'password', 'Attendee', str(number))
+
+    return create_attendee
+
+
+@pytest.fixture
+def create_event(app):
+    count = itertools.count(1)
+
+    def create_event(capacity : int = 10, registration_fee : float = 0.00) -> int:
+        number          : int = next(count)
+        organizer_id    : int = OrganizerController.create_organizer(f'organizer{number}@example.com', 'password', 'Organizer', str(number), 'Organization', '5140000000')
+        return EventController.create_event(
+            organizer_id, f'Event {number}', '2030-01-01T10:00', '2030-01-01T12:00', 'Technology',
+            'Description', 'Montreal', capacity, 'In-person', registration_fee
+        )
+
+    return create_event
@@ -0,0 +1,43 @@
+"""
+Cache hit and miss counts are kept in the backend, so they add up under threads and are shared
+by every worker using the same SqliteCache file.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from controllers    import CacheController
+from controllers.cache_controller import MemoryCache, SqliteCache
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    def configure(backend) -> None:
+        monkeypatch.setattr(CacheController, 'backend', backend)
+    return configure
+
+
+def test_concurrent_reads_are_all_counted(configure):
+    configure(MemoryCache())
+    CacheController.get_or_load('key', lambda: 'value')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: CacheController.get_or_load('key', lambda: 'value'), range(2000)))
+
+    assert CacheController.get_stats() == {'hits' : 2000, 'misses' : 1}
+
+def test_workers_sharing_a_sqlite_cache_share_the_stats(configure, tmp_path):
+    path : str = str(tmp_path / 'cache.sqlite3')
+
+    configure(SqliteCache(path))
+    CacheController.get_or_load('key', lambda: 'value')
+
+    configure(SqliteCache(path))
+    CacheController.get_or_load('key', lambda: 'value')
+
+    assert CacheController.get_stats() == {'hits' : 1, 'misses' : 1}
+
+    CacheController.reset_stats()
+    assert CacheController.get_stats() == {'hits' : 0, 'misses' : 0}
@@ -0,0 +1,142 @@
+"""
+CalendarController.share_calendar_bulk against a local server that speaks the Google batch
+protocol, through the real googleapiclient service and GoogleHttp transport.
+"""
+from __future__ import annotations
+
+from email.parser   import BytesParser
+from email.policy   import HTTP
+from http.server    import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading      import Thread
+
+import json
+import uuid
+
+import pytest
+
+from controllers    import Controller, CalendarController, OutboundController
+from controllers.outbound_controller import GoogleHttp
+
+
+class CalendarBatchServer:
+    """
+    Answers POST /batch/calendar/v3 like Google does: one multipart/mixed response with a part
+    per request. ACL inserts for the emails in 'failing' are answered with a 403.
+    """
+
+    def __init__(self):
+        self.batches    : list[list[dict]]  = []
+        self.failing    : set[str]          = set()
+        self.__server   : ThreadingHTTPServer = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.__server.server_port}/'
+
+    def start(self) -> CalendarBatchServer:
+        batch_server : CalendarBatchServer = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body : bytes = self.rfile.read(int(self.headers['Content-Length']))
+                if self.path != '/batch/calendar/v3':
+                    return self.__answer(404, 'application/json', b'{}')
+
+                boundary, payload = batch_server.answer(self.headers['Content-Type'], body)
+                self.__answer(200, f'multipart/mixed; boundary={boundary}', payload)
+
+            def __answer(self, status : int, content_type : str, payload : bytes):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.__server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.__server.daemon_threads = True
+        Thread(target=self.__server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.__server.shutdown()
+        self.__server.server_close()
+
+    def answer(self, content_type : str, body : bytes) -> tuple[str, bytes]:
+        message = BytesParser(policy=HTTP).parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+
+        requests    : list[dict]    = []
+        boundary    : str           = uuid.uuid4().hex
+        parts       : list[str]     = []
+
+        for part in message.iter_parts():
+            # Each part is a whole HTTP request: request line, headers, blank line, JSON body
+            request_line, _, rest   = part.get_payload(decode=True).decode('utf-8').replace('\r\n', '\n').partition('\n')
+            rule            : dict  = json.loads(rest.split('\n\n', 1)[1])
+            requests.append({ 'request' : request_line.strip(), 'rule' : rule })
+
+            if rule['scope'].get('value') in self.failing:
+                status, response = '403 Forbidden', { 'error' : { 'code' : 403, 'message' : 'Forbidden' } }
+            else:
+                status, response = '200 OK', dict(rule, id=f"{rule['scope']['type']}:{rule['scope'].get('value', '')}")
+
+            content_id : str = part['Content-ID'].strip('<>')
+            parts.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(response)}\r\n'
+            )
+
+        self.batches.append(requests)
+        return boundary, (''.join(parts) + f'--{boundary}--\r\n').encode('utf-8')
+
+
+@pytest.fixture
+def batch_server(app, monkeypatch):
+    from google.auth.credentials           import AnonymousCredentials
+    from googleapiclient.discovery          import build_from_document
+    from googleapiclient.discovery_cache    import get_static_doc
+
+    batch_server : CalendarBatchServer = CalendarBatchServer().start()
+
+    # The shipped discovery document, with every call pointed at the local server
+    document            : dict = json.loads(get_static_doc('calendar', 'v3'))
+    document['rootUrl'] = batch_server.url
+    document['baseUrl'] = f"{batch_server.url}{document['servicePath']}"
+
+    monkeypatch.setattr(Controller, 'service', build_from_document(document, http=GoogleHttp(OutboundController.clients['google'], AnonymousCredentials())))
+    yield batch_server
+    batch_server.stop()
+
+
+def test_acl_inserts_are_sent_in_one_request(batch_server):
+    emails  : list[str]         = [f'stakeholder{number}@example.com' for number in range(20)]
+
+    rules   : dict[str, dict]   = CalendarController.share_calendar_bulk('calendar-1', emails, public=True)
+
+    assert len(batch_server.batches) == 1
+    assert len(batch_server.batches[0]) == 21
+    assert all(request['request'].startswith('POST /calendar/v3/calendars/calendar-1/acl?') for request in batch_server.batches[0])
+    assert set(rules) == set(emails) | {'public'}
+    assert rules['public']['id'] == 'default:'
+
+def test_acl_inserts_are_split_at_the_batch_size(batch_server):
+    emails : list[str] = [f'stakeholder{number}@example.com' for number in range(2 * CalendarController.BATCH_SIZE + 1)]
+
+    CalendarController.share_calendar_bulk('calendar-1', emails)
+
+    assert [len(batch) for batch in batch_server.batches] == [CalendarController.BATCH_SIZE, CalendarController.BATCH_SIZE, 1]
+
+def test_failing_part_raises_acl_failed(batch_server):
+    emails : list[str] = [f'stakeholder{number}@example.com' for number in range(5)]
+    batch_server.failing = {'stakeholder3@example.com'}
+
+    with pytest.raises(CalendarController.CalendarError.AclFailed) as failed:
+        CalendarController.share_calendar_bulk('calendar-1', emails, public=True)
+
+    assert len(batch_server.batches) == 1
+    assert set(failed.value.failures) == {'stakeholder3@example.com'}
+    assert failed.value.failures['stakeholder3@example.com'].resp.status == 403
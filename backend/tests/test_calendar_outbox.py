@@ -0,0 +1,138 @@
+"""
+The calendar outbox: tasks are queued with the change that needs them, and the workers retry
+failed Google calls with backoff without provisioning anything twice.
+"""
+from __future__ import annotations
+
+from datetime       import datetime, timedelta
+
+import logging
+import threading
+
+import pytest
+
+from controllers    import Controller, CalendarController, EventController
+from controllers.fake_calendar_service import FakeCalendarService
+from models         import db, CalendarTask, Event
+
+
+@pytest.fixture
+def calendar_service(app, monkeypatch):
+    service = FakeCalendarService()
+    monkeypatch.setattr(Controller, 'service', service)
+    return service
+
+def task_of(event_id : int) -> CalendarTask:
+    task : CalendarTask = db.session.query(CalendarTask).filter(CalendarTask.event_id == event_id).one()
+    db.session.refresh(task)
+    return task
+
+def make_due(task : CalendarTask) -> None:
+    # Stands in for waiting out the backoff
+    task.next_attempt_at = datetime.now()
+    db.session.commit()
+
+
+def test_event_and_calendar_task_are_created_together(create_event):
+    event_id : int = create_event()
+
+    task : CalendarTask = task_of(event_id)
+    assert task.kind == CalendarTask.CREATE_CALENDAR
+    assert task.status == CalendarTask.PENDING
+
+def test_event_is_rolled_back_when_the_task_cannot_be_queued(create_event, monkeypatch):
+    def enqueue(*args, **kwargs):
+        raise RuntimeError('outbox_unavailable')
+    monkeypatch.setattr(CalendarTask, 'enqueue', enqueue)
+
+    with pytest.raises(RuntimeError):
+        create_event()
+
+    assert db.session.query(Event).count() == 0
+
+def test_failed_attempts_are_retried_with_backoff(create_event, calendar_service):
+    event_id : int = create_event()
+
+    for attempt in (1, 2):
+        calendar_service.failures = 1
+        started : datetime = datetime.now()
+
+        assert CalendarController.process_outbox() == 1
+
+        task    : CalendarTask  = task_of(event_id)
+        delay   : float         = CalendarController.retry_base * 2 ** (attempt - 1)
+        assert task.status == CalendarTask.PENDING
+        assert task.attempts == attempt
+        assert task.last_error == 'backend_error'
+        assert started + timedelta(seconds=delay * 0.5) <= task.next_attempt_at <= datetime.now() + timedelta(seconds=delay)
+
+        # Not due before the backoff is over
+        assert CalendarController.process_outbox() == 0
+        make_due(task)
+
+    assert CalendarController.process_outbox() == 1
+
+    task : CalendarTask = task_of(event_id)
+    assert task.status == CalendarTask.DONE
+    assert Event.find(event_id).get_calendar() in calendar_service.calendars_by_id
+
+def test_task_is_given_up_after_max_attempts(create_event, calendar_service, monkeypatch):
+    monkeypatch.setattr(CalendarController, 'max_attempts', 3)
+    calendar_service.failures = 100
+    event_id : int = create_event()
+
+    for _ in range(3):
+        make_due(task_of(event_id))
+        assert CalendarController.process_outbox() == 1
+
+    task : CalendarTask = task_of(event_id)
+    assert task.status == CalendarTask.FAILED
+    assert task.attempts == 3
+
+    make_due(task)
+    assert CalendarController.process_outbox() == 0
+
+def test_retry_after_acl_failure_reuses_the_calendar(create_event, calendar_service, monkeypatch):
+    event_id : int = create_event()
+
+    with monkeypatch.context() as acl_down:
+        def insert_acl(calendar_id : str, body : dict) -> dict:
+            raise FakeCalendarService.HttpError('backend_error')
+        acl_down.setattr(calendar_service, '_insert_acl', insert_acl)
+
+        assert CalendarController.process_outbox() == 1
+
+    task : CalendarTask = task_of(event_id)
+    assert task.status == CalendarTask.PENDING
+    assert task.last_error == 'calendar_acl_failed'
+    assert len(calendar_service.calendars_by_id) == 1
+
+    make_due(task)
+    assert CalendarController.process_outbox() == 1
+
+    calendar_id : str = Event.find(event_id).get_calendar()
+    assert task_of(event_id).status == CalendarTask.DONE
+    assert list(calendar_service.calendars_by_id) == [calendar_id]
+    assert {rule['id'] for rule in calendar_service.acl_rules[calendar_id]} == {'user:organizer1@example.com', 'default:'}
+
+def test_worker_logs_errors_and_keeps_polling(app, monkeypatch, caplog):
+    polled = threading.Event()
+    def process_outbox(limit : int = None) -> int:
+        polled.set()
+        raise RuntimeError('database_unavailable')
+    monkeypatch.setattr(CalendarController, 'process_outbox', process_outbox)
+    monkeypatch.setattr(CalendarController, 'poll_interval', 0.01)
+
+    with caplog.at_level(logging.ERROR):
+        CalendarController.start_workers(app, 1)
+        try:
+            assert polled.wait(5)
+            polled.clear()
+            # Still alive after the error
+            assert polled.wait(5)
+        finally:
+            CalendarController.stop_workers()
+
+    record : logging.LogRecord = caplog.records[0]
+    assert record.getMessage() == 'Calendar worker error'
+    assert record.exc_info[1].args == ('database_unavailable',)
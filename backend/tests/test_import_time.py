@@ -0,0 +1,29 @@
+"""
+Importing the app must stay cheap: provider libraries load on first use, not at startup, and
+the cold start stays within BUDGET_MS (IMPORT_TIME_BUDGET_MS to override it).
+"""
+import os
+
+import pytest
+
+from benchmarks.import_time import BUDGET_MS, LAZY_MODULES, measure
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    # Like 'python -X importtime -c "import app"' run from backend/
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def test_importing_the_app_loads_no_provider_library(backend):
+    _, imported = measure('app')
+
+    assert 'app' in imported
+    assert sorted(name for name in imported if name.startswith(LAZY_MODULES)) == []
+    assert not {'googleapiclient', 'stripe', 'numpy'} & imported
+
+def test_importing_the_app_stays_within_budget(backend):
+    # The best of a few runs is the least disturbed by the rest of the machine
+    best : float = min(measure('app')[0] for _ in range(3))
+
+    assert best <= BUDGET_MS, f'importing app took {best:.1f}ms, over the {BUDGET_MS:.0f}ms budget'
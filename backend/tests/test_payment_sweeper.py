@@ -0,0 +1,50 @@
+"""
+The payment sweeper: abandoned checkouts are canceled and give their seat back, and what it
+could not do is logged for the next pass.
+"""
+from __future__ import annotations
+
+from datetime       import timedelta
+
+import logging
+
+import stripe
+
+from controllers    import EventController, PaymentController
+from models         import db, Event, PaymentIntent
+
+
+def checkout(attendee_id : int, event_id : int) -> PaymentIntent:
+    client_secret : str = EventController.register_to_event(attendee_id, event_id)['client_secret']
+    return PaymentIntent.find(client_secret.split('_secret_')[0])
+
+def held_count(event_id : int) -> int:
+    event : Event = Event.find(event_id)
+    db.session.refresh(event)
+    return event.get_held_count()
+
+
+def test_stale_checkout_is_canceled_and_gives_its_seat_back(create_attendee, create_event, fake_stripe):
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(create_attendee(), event_id)
+
+    assert PaymentController.sweep_stale_payment_intents(max_age=timedelta(0)) == 1
+
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.CANCELED
+    assert fake_stripe.payment_intents[payment_intent.id]['status'] == 'canceled'
+    assert held_count(event_id) == 0
+
+def test_failed_cancel_is_logged_and_left_for_the_next_sweep(create_attendee, create_event, monkeypatch, caplog):
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(create_attendee(), event_id)
+
+    with monkeypatch.context() as stripe_down, caplog.at_level(logging.ERROR):
+        stripe_down.setattr(stripe.PaymentIntent, 'cancel', lambda *args, **kwargs: (_ for _ in ()).throw(stripe.APIConnectionError('unreachable')))
+        PaymentController.sweep_stale_payment_intents(max_age=timedelta(0))
+
+    assert [record.getMessage() for record in caplog.records] == [f'Failed to cancel payment intent {payment_intent.id}']
+    assert caplog.records[0].exc_info
+    assert held_count(event_id) == 1
+
+    assert PaymentController.sweep_stale_payment_intents(max_age=timedelta(0)) == 1
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.CANCELED
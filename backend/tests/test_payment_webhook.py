@@ -0,0 +1,172 @@
+"""
+The Stripe webhook: signature checks, deduplication of deliveries, and what a payment outcome
+does to the seat held for the checkout.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+
+import pytest
+import stripe
+
+from conftest       import WEBHOOK_SECRET
+from controllers    import EventController, PaymentController, UserController
+from models         import db, Event, PaymentIntent, Registration, StripeWebhookEvent
+from replay_webhook import build_event
+
+
+def checkout(attendee_id : int, event_id : int) -> PaymentIntent:
+    client_secret : str = EventController.register_to_event(attendee_id, event_id)['client_secret']
+    return PaymentIntent.find(client_secret.split('_secret_')[0])
+
+def deliver(client, stripe_event : dict, secret : str = WEBHOOK_SECRET, timestamp : int = None, payload : str = None):
+    signed  : str = json.dumps(stripe_event)
+    header  : str = stripe.WebhookSignature.generate_signature_header(signed, secret, timestamp)
+    return client.post('/payment/webhook', data=payload or signed, headers={'Stripe-Signature' : header})
+
+def payment_event(event_type : str, payment_intent : PaymentIntent) -> dict:
+    return build_event(event_type, payment_intent.id, payment_intent.attendee_id, payment_intent.event_id, payment_intent.amount)
+
+def seats(event_id : int) -> tuple[int, int]:
+    event : Event = Event.find(event_id)
+    db.session.refresh(event)
+    return event.get_registered_count(), event.get_held_count()
+
+
+def test_valid_signature_registers_the_attendee(client, create_attendee, create_event):
+    attendee_id     : int           = create_attendee()
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(attendee_id, event_id)
+    assert seats(event_id) == (0, 1)
+
+    response = deliver(client, payment_event('payment_intent.succeeded', payment_intent))
+
+    assert response.status_code == 200
+    assert Registration.find(attendee_id=attendee_id, event_id=event_id)
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.SUCCEEDED
+    assert seats(event_id) == (1, 0)
+
+def test_tampered_body_is_rejected(client, create_attendee, create_event):
+    attendee_id     : int           = create_attendee()
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(attendee_id, event_id)
+
+    stripe_event    : dict          = payment_event('payment_intent.payment_failed', payment_intent)
+    tampered        : dict          = json.loads(json.dumps(stripe_event))
+    tampered['type'] = 'payment_intent.succeeded'
+
+    response = deliver(client, stripe_event, payload=json.dumps(tampered))
+
+    assert response.status_code == 400
+    assert response.get_json()['code'] == 'invalid_signature'
+    assert not StripeWebhookEvent.is_processed(stripe_event['id'])
+    assert not Registration.find(attendee_id=attendee_id, event_id=event_id)
+
+@pytest.mark.parametrize('secret, age', [
+    ('whsec_not_the_secret',    0),
+    (WEBHOOK_SECRET,            stripe.Webhook.DEFAULT_TOLERANCE + 60)
+], ids=['wrong_secret', 'stale_timestamp'])
+def test_unverified_delivery_is_rejected(client, create_attendee, create_event, secret, age):
+    attendee_id     : int           = create_attendee()
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(attendee_id, event_id)
+
+    stripe_event    : dict          = payment_event('payment_intent.succeeded', payment_intent)
+    response = deliver(client, stripe_event, secret=secret, timestamp=int(time.time()) - age)
+
+    assert response.status_code == 400
+    assert not StripeWebhookEvent.is_processed(stripe_event['id'])
+    assert not Registration.find(attendee_id=attendee_id, event_id=event_id)
+
+def test_replayed_event_is_handled_once(client, create_attendee, create_event, monkeypatch):
+    attendee_id     : int           = create_attendee()
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(attendee_id, event_id)
+
+    handled = []
+    complete_paid_registration = EventController.complete_paid_registration
+    monkeypatch.setattr(EventController, 'complete_paid_registration', lambda payment_intent: handled.append(payment_intent.id) or complete_paid_registration(payment_intent))
+
+    stripe_event : dict = payment_event('payment_intent.succeeded', payment_intent)
+    for _ in range(3):
+        assert deliver(client, stripe_event).status_code == 200
+
+    assert handled == [payment_intent.id]
+    assert StripeWebhookEvent.query.count() == 1
+    assert seats(event_id) == (1, 0)
+
+def test_failed_payment_releases_the_seat(client, create_attendee, create_event):
+    event_id        : int           = create_event(capacity=1, registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(create_attendee(), event_id)
+
+    with pytest.raises(Event.EventError.Full):
+        checkout(create_attendee(), event_id)
+
+    assert deliver(client, payment_event('payment_intent.payment_failed', payment_intent)).status_code == 200
+
+    assert seats(event_id) == (0, 0)
+    assert checkout(create_attendee(), event_id)
+    assert seats(event_id) == (0, 1)
+
+def test_payment_for_a_full_event_is_refunded(client, create_attendee, create_event, fake_stripe):
+    event_id        : int           = create_event(capacity=1, registration_fee=10.00)
+    attendee_id     : int           = create_attendee()
+    payment_intent  : PaymentIntent = checkout(attendee_id, event_id)
+
+    # The payment fails and the seat goes to someone else before the retry goes through
+    deliver(client, payment_event('payment_intent.payment_failed', payment_intent))
+    checkout(create_attendee(), event_id)
+
+    assert deliver(client, payment_event('payment_intent.succeeded', payment_intent)).status_code == 200
+
+    assert [refund['payment_intent'] for refund in fake_stripe.refunds.values()] == [payment_intent.id]
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.REFUNDED
+    assert not Registration.find(attendee_id=attendee_id, event_id=event_id)
+    assert seats(event_id) == (0, 1)
+
+    with pytest.raises(Event.EventError.Full):
+        EventController.register_to_event(attendee_id, event_id, payment_intent.client_secret)
+
+def test_refund_is_retried_until_stripe_answers(client, create_attendee, create_event, fake_stripe, monkeypatch, caplog):
+    event_id        : int           = create_event(capacity=1, registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(create_attendee(), event_id)
+    deliver(client, payment_event('payment_intent.payment_failed', payment_intent))
+    checkout(create_attendee(), event_id)
+
+    with monkeypatch.context() as stripe_down, caplog.at_level(logging.ERROR):
+        stripe_down.setattr(stripe.Refund, 'create', lambda **kwargs: (_ for _ in ()).throw(stripe.APIConnectionError('unreachable')))
+        deliver(client, payment_event('payment_intent.succeeded', payment_intent))
+
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.REFUND_REQUIRED
+    assert [record.getMessage() for record in caplog.records] == [f'Failed to refund payment intent {payment_intent.id}, left refund_required']
+    assert caplog.records[0].exc_info
+    assert not fake_stripe.refunds
+
+    assert PaymentController.retry_refunds() == 1
+    assert PaymentController.retry_refunds() == 0
+
+    assert PaymentIntent.find(payment_intent.id).status == PaymentIntent.REFUNDED
+    assert len(fake_stripe.refunds) == 1
+
+def test_deleting_an_attendee_gives_back_their_held_seats(create_attendee, create_event):
+    attendee_id     : int           = create_attendee()
+    event_id        : int           = create_event(registration_fee=10.00)
+    checkout(attendee_id, event_id)
+
+    UserController.delete_user(attendee_id)
+
+    assert PaymentIntent.query.count() == 0
+    assert seats(event_id) == (0, 0)
+
+def test_payment_after_the_event_was_deleted_is_refunded(client, create_attendee, create_event, fake_stripe):
+    event_id        : int           = create_event(registration_fee=10.00)
+    payment_intent  : PaymentIntent = checkout(create_attendee(), event_id)
+    stripe_event    : dict          = payment_event('payment_intent.succeeded', payment_intent)
+
+    EventController.delete_event(event_id)
+    assert PaymentIntent.query.count() == 0
+
+    assert deliver(client, stripe_event).status_code == 200
+    assert [refund['payment_intent'] for refund in fake_stripe.refunds.values()] == [stripe_event['data']['object']['id']]
@@ -1,5 +1,6 @@
+from flask import Response, stream_with_context
 from flask_restful import Resource, reqparse
-from controllers    import UserController, EventController
+from controllers    import UserController, EventController, CacheController, OutboundController
 from views.routes   import admin_only
 
 class DeleteUserResource(Resource):
@@ -27,8 +28,18 @@ class DeleteUserResource(Resource):
 class GetUsersResource(Resource):
     @admin_only
     def get(self, user_id : int):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'user_type',       location = 'args', type = str, required = False )
+        parser.add_argument( 'email_prefix',    location = 'args', type = str, required = False )
+        parser.add_argument( 'created_since',   location = 'args', type = str, required = False )
+        parser.add_argument( 'created_until',   location = 'args', type = str, required = False )
+        parser.add_argument( 'sort',            location = 'args', type = str, required = False )
+        parser.add_argument( 'order',           location = 'args', type = str, required = False )
+        parser.add_argument( 'limit',           location = 'args', type = int, required = False )
+        parser.add_argument( 'cursor',          location = 'args', type = str, required = False )
         try:
-            users : list[dict] = UserController.get_users()
+            args = parser.parse_args()
+            users : list[dict] | dict = UserController.get_users(**args)
             return users
         except Exception as e:
             HTTP_code : str = getattr(e, 'HTTP_code', None)
@@ -36,4 +47,44 @@ class GetUsersResource(Resource):
                 'status'    : 'error',
                 'code'      : str(e)
             }, HTTP_code if HTTP_code else 400
-        
\ No newline at end of file
+
+class ExportUsersResource(Resource):
+    @admin_only
+    def get(self, user_id : int):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'format',          location = 'args', type = str, required = False )
+        parser.add_argument( 'columns',         location = 'args', type = str, required = False )
+        parser.add_argument( 'user_type',       location = 'args', type = str, required = False )
+        parser.add_argument( 'email_prefix',    location = 'args', type = str, required = False )
+        parser.add_argument( 'created_since',   location = 'args', type = str, required = False )
+        parser.add_argument( 'created_until',   location = 'args', type = str, required = False )
+        parser.add_argument( 'sort',            location = 'args', type = str, required = False )
+        parser.add_argument( 'order',           location = 'args', type = str, required = False )
+        try:
+            args    : reqparse.Namespace    = parser.parse_args()
+            format  : str                   = args.pop('format') or 'csv'
+            requested : str                 = args.pop('columns')
+            columns : list[str]             = [column.strip() for column in requested.split(',')] if requested else None
+
+            chunks = UserController.export_users( format, columns, **args )
+            return Response(
+                stream_with_context(chunks),
+                mimetype    = UserController.DIRECTORY_FORMATS[format],
+                headers     = {'Content-Disposition' : f'attachment; filename=users.{format}'}
+            )
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
+
+class GetCacheStatsResource(Resource):
+    @admin_only
+    def get(self, user_id : int):
+        return CacheController.get_stats(), 200
+
+class GetOutboundMetricsResource(Resource):
+    @admin_only
+    def get(self, user_id : int):
+        return OutboundController.get_metrics(), 200
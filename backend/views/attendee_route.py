@@ -22,12 +22,14 @@ class RegisterToEventResource(Resource):
             if response.get('client_secret'):
                 return {
                     'status'        : 'payment_required',
-                    'client_secret' : response['client_secret']
+                    'client_secret' : response['client_secret'],
+                    'conflicts'     : response.get('conflicts', [])
                 }, 200
             
             return {
                 'status': 'registered',
-                'message': 'Successfully registered for the event'
+                'message': 'Successfully registered for the event',
+                'conflicts': response.get('conflicts', [])
             }, 201
         
         except Exception as e:
@@ -1,8 +1,8 @@
-from flask_restful  import Resource, reqparse
+from flask_restful  import Resource, reqparse, inputs
 from controllers    import EventController
-from views.routes   import organizer_only
+from views.routes   import organizer_only, auth_required
 
-from flask import request
+from flask import request, Response, stream_with_context
 
 class CreateEventResource(Resource):
     @organizer_only
@@ -68,25 +68,31 @@ class DeleteEventResource(Resource):
 class EditEventResource(Resource):
     @organizer_only
     def put(self, user_id):
+        return self.__edit(required=True)
 
-        print(request.get_json())
+    @organizer_only
+    def patch(self, user_id):
+        # Only the fields present in the body are changed
+        return self.__edit(required=False)
+
+    def __edit(self, required : bool):
         parser = reqparse.RequestParser()
 
-        parser.add_argument(    "event_id",         type = int,     required=True, help="Event_id is required"      )
-        parser.add_argument(    "title",            type = str,     required=True, help="Email is required"         )
-        parser.add_argument(    "start",            type = str,     required=True, help="Start time is required"    )
-        parser.add_argument(    "end",              type = str,     required=True, help="End time is required"      )
-        parser.add_argument(    "category",         type = str,     required=True, help="Category is required"      )
-        parser.add_argument(    "description",      type = str,     required=True, help="Description is required"   )
-        parser.add_argument(    "location",         type = str,     required=True, help="Location is required"      )
-        parser.add_argument(    "capacity",         type = int,     required=True, help="Capacity is required"      )
-        parser.add_argument(    "event_type",       type = str,     required=True, help="Event_type is required"    )
-        parser.add_argument(    "registration_fee", type = float,   required=True, help="registration_fee required" )
+        parser.add_argument(    "event_id",         type = int,     required=True,      help="Event_id is required"      )
+        parser.add_argument(    "title",            type = str,     required=required,  help="Email is required"         )
+        parser.add_argument(    "start",            type = str,     required=required,  help="Start time is required"    )
+        parser.add_argument(    "end",              type = str,     required=required,  help="End time is required"      )
+        parser.add_argument(    "category",         type = str,     required=required,  help="Category is required"      )
+        parser.add_argument(    "description",      type = str,     required=required,  help="Description is required"   )
+        parser.add_argument(    "location",         type = str,     required=required,  help="Location is required"      )
+        parser.add_argument(    "capacity",         type = int,     required=required,  help="Capacity is required"      )
+        parser.add_argument(    "event_type",       type = str,     required=required,  help="Event_type is required"    )
+        parser.add_argument(    "registration_fee", type = float,   required=required,  help="registration_fee required" )
 
         try:
             args = parser.parse_args()
             
-            EventController.edit_event( 
+            changed : list[str] = EventController.edit_event( 
                 args["event_id"],
                 args["title"], 
                 args["start"], 
@@ -98,7 +104,7 @@ class EditEventResource(Resource):
                 args["event_type"], 
                 args["registration_fee"]
                 )
-            return {'status':'editted'}
+            return {'status':'editted', 'changed' : changed}
         except Exception as e:
             print(e)
             HTTP_code : str = getattr(e, 'HTTP_code', None)
@@ -108,9 +114,22 @@ class EditEventResource(Resource):
             }, HTTP_code if HTTP_code else 400
            
 class GetEventResource(Resource):
+
+    PAGE_ARGUMENTS : tuple[str] = ('limit', 'cursor', 'category', 'event_type', 'location', 'start_from', 'start_to', 'min_fee', 'max_fee', 'sponsored')
+
     def get(self):
         parser = reqparse.RequestParser()
-        parser.add_argument( 'event_id', location = 'args', type = int, required = False )
+        parser.add_argument( 'event_id',    location = 'args', type = int,      required = False )
+        parser.add_argument( 'limit',       location = 'args', type = int,      required = False )
+        parser.add_argument( 'cursor',      location = 'args', type = str,      required = False )
+        parser.add_argument( 'category',    location = 'args', type = str,      required = False )
+        parser.add_argument( 'event_type',  location = 'args', type = str,      required = False )
+        parser.add_argument( 'location',    location = 'args', type = str,      required = False )
+        parser.add_argument( 'start_from',  location = 'args', type = str,      required = False )
+        parser.add_argument( 'start_to',    location = 'args', type = str,      required = False )
+        parser.add_argument( 'min_fee',     location = 'args', type = float,    required = False )
+        parser.add_argument( 'max_fee',     location = 'args', type = float,    required = False )
+        parser.add_argument( 'sponsored',   location = 'args', type = inputs.boolean, required = False )
         
         try:
             args        : reqparse.Namespace    = parser.parse_args()
@@ -120,9 +139,12 @@ class GetEventResource(Resource):
             if event_id:
                 return EventController.get_event( event_id ), 200
 
-            aa = EventController.get_available_events()
-            print(aa)
-            return aa, 200
+            # Any paging or filtering argument switches to the paginated response
+            if any(args.get(name) is not None for name in GetEventResource.PAGE_ARGUMENTS):
+                page_args : dict = {name : args.get(name) for name in GetEventResource.PAGE_ARGUMENTS}
+                return EventController.get_events_page( **page_args ), 200
+
+            return EventController.get_available_events(), 200
         
         except Exception as e:
             HTTP_code : str = getattr(e, 'HTTP_code', None)
@@ -131,6 +153,57 @@ class GetEventResource(Resource):
                 'code'      : str(e)
             }, HTTP_code if HTTP_code else 400
         
+class GetEventsInRangeResource(Resource):
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'from',    location = 'args', type = str, required = True, help = "from is required" )
+        parser.add_argument( 'to',      location = 'args', type = str, required = True, help = "to is required" )
+        try:
+            args : reqparse.Namespace = parser.parse_args()
+            return EventController.get_events_in_range( args.get('from'), args.get('to') ), 200
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
+
+class GetEventStatusesResource(Resource):
+    @auth_required
+    def get(self, user_id : int):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'event_ids', location = 'args', type = str, required = True, help = "event_ids is required" )
+        try:
+            args        : reqparse.Namespace    = parser.parse_args()
+            event_ids   : list[str]             = [event_id for event_id in args.get('event_ids').split(',') if event_id.strip()]
+
+            return {
+                'status'    : 'ok',
+                'events'    : EventController.get_event_statuses( user_id, event_ids )
+            }, 200
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
+
+class SearchEventsResource(Resource):
+    def get(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'q',       location = 'args', type = str, required = True, help = "A search query is required" )
+        parser.add_argument( 'limit',   location = 'args', type = int, required = False )
+        parser.add_argument( 'cursor',  location = 'args', type = str, required = False )
+        try:
+            args : reqparse.Namespace = parser.parse_args()
+            return EventController.search_events( args.get('q'), args.get('limit'), args.get('cursor') ), 200
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
+
 class GetAnalyticsResource(Resource):
     def get(self):
         parser = reqparse.RequestParser()
@@ -168,4 +241,32 @@ class GetCalendarResource(Resource):
             return {
                 'status'    : 'error',
                 'code'      : str(e)
-            }, HTTP_code if HTTP_code else 400
\ No newline at end of file
+            }, HTTP_code if HTTP_code else 400
+
+
+class ExportRosterResource(Resource):
+    @organizer_only
+    def get(self, user_id : int):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'event_id',            location = 'args', type = int, required = True )
+        parser.add_argument( 'format',              location = 'args', type = str, required = False )
+        parser.add_argument( 'columns',             location = 'args', type = str, required = False )
+        parser.add_argument( 'registered_since',    location = 'args', type = str, required = False )
+        try:
+            args        : reqparse.Namespace    = parser.parse_args()
+            event_id    : int                   = args.get('event_id')
+            format      : str                   = args.get('format') or 'csv'
+            columns     : list[str]             = [column.strip() for column in args.get('columns').split(',')] if args.get('columns') else None
+
+            chunks = EventController.export_roster( user_id, event_id, format, columns, args.get('registered_since') )
+            return Response(
+                stream_with_context(chunks),
+                mimetype    = EventController.ROSTER_FORMATS[format],
+                headers     = {'Content-Disposition' : f'attachment; filename=event-{event_id}-roster.{format}'}
+            )
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
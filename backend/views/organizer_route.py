@@ -7,6 +7,25 @@ class GetOrganizerEventResource(Resource):
     @organizer_only
     def get(self, user_id : int ):
         return OrganizerController.get_event( user_id )
+
+
+class GetOrganizerAnalyticsResource(Resource):
+    @organizer_only
+    def get(self, user_id : int ):
+        parser = reqparse.RequestParser()
+        parser.add_argument( 'group_by', location = 'args', type = str, required = False )
+        try:
+            args        : reqparse.Namespace    = parser.parse_args()
+            group_by    : str                   = args.get('group_by')
+            if not group_by:
+                group_by = 'day'
+            return OrganizerController.get_analytics( user_id, group_by ), 200
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 400
     
 
 class RequestSponsorshipResource(Resource):
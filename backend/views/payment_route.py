@@ -1,6 +1,24 @@
 from flask_restful  import Resource, reqparse
 from controllers    import PaymentController
 
+from flask          import request, current_app
+
 class PublicKeyResource(Resource):
     def get(self):
-        return {'stripe_public_key' : PaymentController.get_public_key()}, 200
\ No newline at end of file
+        return {'stripe_public_key' : PaymentController.get_public_key()}, 200
+
+class StripeWebhookResource(Resource):
+    def post(self):
+        try:
+            PaymentController.handle_webhook( request.get_data(), request.headers.get('Stripe-Signature', '') )
+            return {'status' : 'received'}, 200
+
+        except Exception as e:
+            HTTP_code : str = getattr(e, 'HTTP_code', None)
+            if not HTTP_code:
+                # Stripe retries the delivery, the traceback is what tells us why it keeps failing
+                current_app.logger.exception('Stripe webhook failed')
+            return {
+                'status'    : 'error',
+                'code'      : str(e)
+            }, HTTP_code if HTTP_code else 500
@@ -1,59 +1,23 @@
-from flask_jwt_extended import JWTManager, jwt_required
+from flask_jwt_extended import jwt_required
 from controllers        import UserController
-from models             import User
 from functools          import wraps
 
 
-def auth_required(f):
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user : User = UserController.authentication()
-        if not user:
-            ...
-        return f(args[0], user.id, **kwargs)
-    return decorated_function
+def role_required(*user_types : str):
+    # Authorization comes from the token claims, so no user row is loaded here
+    def decorator(f):
+        @wraps(f)
+        @jwt_required()
+        def decorated_function(*args, **kwargs):
+            user_id, user_type = UserController.get_identity()
+            if user_id is None or (user_types and user_type not in user_types):
+                return {'message': 'Unauthorized'}, 403
+            return f(args[0], user_id, **kwargs)
+        return decorated_function
+    return decorator
 
-def admin_only(f):
-    
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user : User = UserController.authentication()
-        if not user or user.get_type() != "admin":
-            ...
-        return f(args[0], user.id, **kwargs)
-    return decorated_function
-
-def attendee_only(f):
-    
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user : User = UserController.authentication()
-        if not user or user.get_type() not in ["attendee", "admin"]:
-            ...
-        return f(args[0], user.id, **kwargs)
-    return decorated_function
-
-def organizer_only(f):
-    
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user : User = UserController.authentication()
-        if not user or  user.get_type() not in ["organizer", "admin"]:
-            ...
-        return f(args[0],user.id, **kwargs)
-    return decorated_function
-
-def stakeholder_only(f):
-    
-    @wraps(f)
-    @jwt_required()
-    def decorated_function(*args, **kwargs):
-        user: User = UserController.authentication()
-        if not user or user.get_type() not in ["stakeholder", "admin"]:
-            return {'message': 'Unauthorized'}, 403
-        return f(args[0], user.id, **kwargs)
-    return decorated_function
+auth_required       = role_required()
+admin_only          = role_required("admin")
+attendee_only       = role_required("attendee", "admin")
+organizer_only      = role_required("organizer", "admin")
+stakeholder_only    = role_required("stakeholder", "admin")
@@ -59,11 +59,16 @@ class SponsoredEventsResource(Resource):
     @stakeholder_only
     def get(self, user_id):
         try:
-            # Get all events sponsored by this stakeholder
-            sponsored_events = StakeholderController.get_sponsored_events(user_id)
-            
-            # Return the list of events
-            return {"status": "success", "events": sponsored_events}, 200
+            parser = reqparse.RequestParser()
+            parser.add_argument("limit", location="args", type=int, required=False)
+            parser.add_argument("cursor", location="args", type=str, required=False)
+            parser.add_argument("when", location="args", type=str, required=False)
+            args = parser.parse_args()
+
+            # Events sponsored by this stakeholder, all of them unless a page is asked for
+            page = StakeholderController.get_sponsored_events(user_id, args.get("limit"), args.get("cursor"), args.get("when"))
+
+            return {"status": "success", **page}, 200
         except Exception as e:
             code = getattr(e, "HTTP_code", 400)
             return {"status": "error", "message": str(e)}, code
@@ -72,11 +77,16 @@ class SponsorshipRequestsResource(Resource):
     @stakeholder_only
     def get(self, user_id):
         try:
-            # Get all pending sponsorship requests for this stakeholder
-            requests = StakeholderController.get_sponsorship_requests(user_id)
-            
-            # Return the list of requests
-            return {"status": "success", "requests": requests}, 200
+            parser = reqparse.RequestParser()
+            parser.add_argument("status", location="args", type=str, required=False)
+            parser.add_argument("limit", location="args", type=int, required=False)
+            parser.add_argument("cursor", location="args", type=str, required=False)
+            args = parser.parse_args()
+
+            # Pending sponsorship requests for this stakeholder unless another status is asked for
+            page = StakeholderController.get_sponsorship_requests(user_id, args.get("status"), args.get("limit"), args.get("cursor"))
+
+            return {"status": "success", "requests": page["requests"], "next_cursor": page["next_cursor"]}, 200
         except Exception as e:
             code = getattr(e, "HTTP_code", 400)
             return {"status": "error", "message": str(e)}, code
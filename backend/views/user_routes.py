@@ -1,4 +1,4 @@
-from flask_restful import Resource
+from flask_restful import Resource, reqparse
 from controllers import UserController, StakeholderController
 from views.routes import auth_required
 
@@ -34,17 +34,25 @@ class UpdatePasswordResource(Resource):
 class EditProfileResource(Resource):
     @auth_required
     def put(self, user_id: int):
+        return self.__edit(user_id, required=True)
+
+    @auth_required
+    def patch(self, user_id: int):
+        # Only the fields present in the body are changed
+        return self.__edit(user_id, required=False)
+
+    def __edit(self, user_id: int, required: bool):
         parser = reqparse.RequestParser()
-        parser.add_argument("first_name", type=str, required=True, help="first_name is required")
-        parser.add_argument("last_name", type=str, required=True, help="last_name is required")
-        parser.add_argument("email", type=str, required=True, help="email is required")
+        parser.add_argument("first_name", type=str, required=required, help="first_name is required")
+        parser.add_argument("last_name", type=str, required=required, help="last_name is required")
+        parser.add_argument("email", type=str, required=required, help="email is required")
         parser.add_argument("phone_number", type=str, required=False)
         parser.add_argument("organization_name", type=str, required=False)
 
         try:
             args = parser.parse_args()
-            UserController.edit_profile(user_id, args['email'], args['first_name'], args['last_name'], args.get('phone_number'), args.get('organization_name'))
-            return {'status': 'updated'}, 200
+            changed = UserController.edit_profile(user_id, args['email'], args['first_name'], args['last_name'], args.get('phone_number'), args.get('organization_name'))
+            return {'status': 'updated', 'changed': changed}, 200
         except Exception as e:
             HTTP_code = getattr(e, 'HTTP_code', None)
             return {'status': 'error', 'code': str(e)}, HTTP_code if HTTP_code else 400
@@ -22,6 +22,7 @@ export default function CalendarView({ onBack }) {
   const [eventsData, setEventsData] = useState([]);
   const [filteredEvents, setFilteredEvents] = useState([]);
   const [registeredEvents, setRegisteredEvents] = useState([]);
+  const [statuses, setStatuses] = useState({});
   const [selectedEvent, setSelectedEvent] = useState(null);
   const [month, setMonth] = useState(new Date().getMonth());
   const [year, setYear] = useState(new Date().getFullYear());
@@ -35,7 +36,12 @@ export default function CalendarView({ onBack }) {
         const token = localStorage.getItem("token");
         if (!token) return navigate("/login");
 
-        const response = await fetch("http://localhost:5003/event/get", {
+        // Only the events overlapping the month on screen
+        const pad = (n) => n.toString().padStart(2, "0");
+        const from = `${year}-${pad(month + 1)}-01`;
+        const to = month === 11 ? `${year + 1}-01-01` : `${year}-${pad(month + 2)}-01`;
+
+        const response = await fetch(`http://localhost:5003/event/range?from=${from}&to=${to}`, {
           method: "GET",
           headers: {
             "Content-Type": "application/json",
@@ -72,6 +78,34 @@ export default function CalendarView({ onBack }) {
 
         setEventsData(mapped);
         setFilteredEvents(mapped);
+
+        // Registration or sponsorship status of the whole month, a batch of ids per call
+        const ids = mapped.map((event) => event.id);
+        const batches = [];
+        for (let i = 0; i < ids.length; i += 500) batches.push(ids.slice(i, i + 500));
+
+        try {
+          const pages = await Promise.all(
+            batches.map(async (batch) => {
+              const res = await fetch(
+                `http://localhost:5003/event/statuses?event_ids=${batch.join(",")}`,
+                {
+                  method: "GET",
+                  headers: {
+                    "Content-Type": "application/json",
+                    Authorization: `Bearer ${token}`,
+                  },
+                }
+              );
+              if (!res.ok) throw new Error("Failed to check event statuses");
+              return (await res.json()).events;
+            })
+          );
+          setStatuses(Object.assign({}, ...pages));
+        } catch {
+          // Not fatal, the modal checks the event it opens on its own
+          setStatuses({});
+        }
       } catch (err) {
         setError(err.message);
       } finally {
@@ -80,46 +114,15 @@ export default function CalendarView({ onBack }) {
     };
 
     fetchEvents();
-  }, [navigate, registeredEvents]);
+  }, [navigate, registeredEvents, month, year]);
 
-  const handleEventClick = async (event) => {
+  const handleEventClick = (event) => {
     const token = localStorage.getItem("token");
     if (!token) return navigate("/login");
 
-    try {
-      if (userType === "attendee") {
-        const res = await fetch(
-          `http://localhost:5003/event/check_registration?event_id=${event.id}`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-              Authorization: `Bearer ${token}`,
-            },
-          }
-        );
-        if (!res.ok) throw new Error("Failed to check registration");
-        const data = await res.json();
-        setSelectedEvent({ ...event, isRegistered: data.is_registered });
-      } else {
-        // Check if the stakeholder is sponsoring the event
-        const res = await fetch(
-          `http://localhost:5003/stakeholder/check_sponsorship?event_id=${event.id}`,
-          {
-            method: "GET",
-            headers: {
-              "Content-Type": "application/json",
-              Authorization: `Bearer ${token}`,
-            },
-          }
-        );
-        if (!res.ok) throw new Error("Failed to check sponsorship");
-        const data = await res.json();
-        setSelectedEvent({ ...event, isSponsored: data.is_sponsoring });
-      }
-    } catch (err) {
-      setError(err.message);
-    }
+    // Left undefined when the month's statuses did not load, the modal then asks for its own
+    const status = statuses[event.id];
+    setSelectedEvent({ ...event, isRegistered: status?.is_registered, isSponsored: status?.is_sponsoring });
   };
 
   const updateEvents = (eventId, isRegistered) => {
@@ -29,7 +29,13 @@ const SuggestedEvents = () => {
         return;
       }
 
-      const response = await fetch("http://localhost:5003/event/get", {
+      // Upcoming events only, pages start at the oldest event otherwise. Rounded to the
+      // hour so that every visitor in that hour shares the cached page.
+      const now = new Date();
+      const pad = (n) => n.toString().padStart(2, "0");
+      const startFrom = `${now.getFullYear()}-${pad(now.getMonth() + 1)}-${pad(now.getDate())}T${pad(now.getHours())}:00`;
+
+      const response = await fetch(`http://localhost:5003/event/get?limit=20&start_from=${startFrom}`, {
         method: "GET",
         headers: {
           "Content-Type": "application/json",
@@ -43,7 +49,7 @@ const SuggestedEvents = () => {
 
       const formatDate = (dateObj) => dateObj.toISOString().split("T")[0];
 
-      const formattedEvents = data.map((event) => {
+      const formattedEvents = data.events.map((event) => {
         const eventDateObj = new Date(event.start);
         const time = eventDateObj.toLocaleTimeString([], {
           hour: "2-digit",
@@ -62,7 +68,7 @@ const SuggestedEvents = () => {
       const randomEvent =
         formattedEvents[Math.floor(Math.random() * formattedEvents.length)];
 
-      setEvents([randomEvent]);
+      setEvents(randomEvent ? [randomEvent] : []);
       setCurrentIndex(0);
     } catch (err) {
       setError(err.message);
@@ -24,7 +24,8 @@ export default function AdminDashboard() {
         return;
       }
 
-      const response = await fetch("http://localhost:5003/admin/get_users", {
+      // One page of three is all the dashboard shows
+      const response = await fetch("http://localhost:5003/admin/get_users?limit=3", {
         method: "GET",
         headers: {
           Authorization: `Bearer ${token}`,
@@ -39,14 +40,8 @@ export default function AdminDashboard() {
 
       console.log(data);
 
-      // Show only the first 3 users
-      if (data.length > 3) {
-        setHasMoreUsers(true);
-        setUsers(data.slice(0, 3));
-      } else {
-        setUsers(data);
-        setHasMoreUsers(false);
-      }
+      setUsers(data.users);
+      setHasMoreUsers(Boolean(data.next_cursor));
     } catch (error) {
       setError("Failed to load users. Please try again later.");
     } finally {
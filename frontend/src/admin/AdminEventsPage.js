@@ -23,6 +23,7 @@ export default function AdminEventsPage({ onBack }) {
   const [eventsData, setEventsData] = useState([]);
   const [filteredEvents, setFilteredEvents] = useState([]);
   const [registeredEvents, setRegisteredEvents] = useState([]);
+  const [statuses, setStatuses] = useState({});
   const [selectedEvent, setSelectedEvent] = useState(null);
   const [searchQuery, setSearchQuery] = useState("");
   const [currentPage, setCurrentPage] = useState(1);
@@ -216,7 +217,7 @@ export default function AdminEventsPage({ onBack }) {
     setViewingRegistrations(!viewingRegistrations);
   };
 
-  const handleEventClick = async (event) => {
+  const handleEventClick = (event) => {
     const token = localStorage.getItem("token");
 
     if (!token) {
@@ -224,30 +225,7 @@ export default function AdminEventsPage({ onBack }) {
       return;
     }
 
-    try {
-      console.log(event.id);
-      const response = await fetch(
-        `http://localhost:5003/event/check_registration?event_id=${event.id}`,
-        {
-          method: "GET",
-          headers: {
-            "Content-Type": "application/json",
-            Authorization: `Bearer ${token}`,
-          },
-        }
-      );
-
-      if (!response.ok) {
-        throw new Error("Failed to check registration status");
-      }
-
-      const data = await response.json();
-      const isRegistered = data.is_registered;
-
-      setSelectedEvent({ ...event, isRegistered });
-    } catch (err) {
-      setError(err.message);
-    }
+    setSelectedEvent({ ...event, isRegistered: statuses[event.id]?.is_registered });
   };
 
   const updateEvents = (eventId, isRegistered) => {
@@ -264,6 +242,10 @@ export default function AdminEventsPage({ onBack }) {
       setRegisteredEvents(updatedRegisteredEvents);
     }
 
+    setStatuses((prev) => ({
+      ...prev,
+      [eventId]: { ...prev[eventId], is_registered: isRegistered },
+    }));
     setFilteredEvents(registeredEvents);
   };
 
@@ -286,6 +268,40 @@ export default function AdminEventsPage({ onBack }) {
     startIndex,
     startIndex + eventsPerPage
   );
+  const displayedIds = displayedEvents.map((event) => event.id).join(",");
+
+  // Statuses of the rows on screen in one call, rather than one per click
+  useEffect(() => {
+    const fetchStatuses = async () => {
+      const token = localStorage.getItem("token");
+      if (!token || !displayedIds) return;
+
+      try {
+        const response = await fetch(
+          `http://localhost:5003/event/statuses?event_ids=${displayedIds}`,
+          {
+            method: "GET",
+            headers: {
+              "Content-Type": "application/json",
+              Authorization: `Bearer ${token}`,
+            },
+          }
+        );
+
+        if (!response.ok) {
+          throw new Error("Failed to check registration status");
+        }
+
+        const data = await response.json();
+        setStatuses((prev) => ({ ...prev, ...data.events }));
+      } catch (err) {
+        // Not fatal, the table stays usable without the statuses
+        console.log(err.message);
+      }
+    };
+
+    fetchStatuses();
+  }, [displayedIds]);
 
   return (
     <div className="min-h-screen bg-white flex flex-col relative">
@@ -12,9 +12,16 @@ export default function EventModal({ event, onClose, updateEvents }) {
   const [isRegistered, setIsRegistered] = useState(false);
   const [isInPayment, setIsInPayment] = useState(false);
   const [clientSecret, setClientSecret] = useState(null);
+  const [conflicts, setConflicts] = useState([]);
 
   useEffect(() => {
     const checkRegistration = async () => {
+      // Pages that fetched the statuses of all their events in one call pass it along
+      if (typeof event.isRegistered === "boolean") {
+        setIsRegistered(event.isRegistered);
+        return;
+      }
+
       setIsLoading(true);
       setError(null);
 
@@ -26,7 +33,7 @@ export default function EventModal({ event, onClose, updateEvents }) {
 
       try {
         const res = await fetch(
-          `http://localhost:5003/event/check_registration?event_id=${event.id}`,
+          `http://localhost:5003/event/statuses?event_ids=${event.id}`,
           {
             method: "GET",
             headers: {
@@ -37,7 +44,7 @@ export default function EventModal({ event, onClose, updateEvents }) {
         );
         if (!res.ok) throw new Error("Failed to check registration");
         const data = await res.json();
-        setIsRegistered(data.is_registered);
+        setIsRegistered(Boolean(data.events[event.id]?.is_registered));
       } catch (err) {
         setError(err.message);
       } finally {
@@ -46,7 +53,7 @@ export default function EventModal({ event, onClose, updateEvents }) {
     };
 
     checkRegistration();
-  }, [event.id]);
+  }, [event.id, event.isRegistered]);
 
   const handleRegistration = async () => {
     setIsLoading(true);
@@ -78,10 +85,11 @@ export default function EventModal({ event, onClose, updateEvents }) {
 
       if (!response.ok) {
         const errorData = await response.json();
-        throw new Error(errorData.error || "An unknown error occurred");
+        throw new Error(errorData.error || errorData.code || "An unknown error occurred");
       }
 
       const data = await response.json();
+      setConflicts(data.conflicts || []);
 
       if (data.status === 'payment_required') {
         setClientSecret(data.client_secret);
@@ -172,6 +180,11 @@ export default function EventModal({ event, onClose, updateEvents }) {
         )} */}
 
         {error && <p className="text-red-500 text-center mt-4">{error}</p>}
+        {conflicts.length > 0 && (
+          <p className="text-amber-600 text-center mt-2">
+            Overlaps with {conflicts.map((conflict) => conflict.title).join(", ")}
+          </p>
+        )}
       </div>
     </div>
   );
@@ -12,6 +12,12 @@ export default function SponsorModal({ event, onClose, updateEvents }) {
 
   useEffect(() => {
     const checkSponsorship = async () => {
+      // Pages that fetched the statuses of all their events in one call pass it along
+      if (typeof event.isSponsored === "boolean") {
+        setIsSponsored(event.isSponsored);
+        return;
+      }
+
       setIsLoading(true);
       setError(null);
 
@@ -23,7 +29,7 @@ export default function SponsorModal({ event, onClose, updateEvents }) {
 
       try {
         const res = await fetch(
-          `http://localhost:5003/stakeholder/check_sponsorship?event_id=${event.id}`,
+          `http://localhost:5003/event/statuses?event_ids=${event.id}`,
           {
             method: "GET",
             headers: {
@@ -34,7 +40,7 @@ export default function SponsorModal({ event, onClose, updateEvents }) {
         );
         if (!res.ok) throw new Error("Failed to check sponsorship status");
         const data = await res.json();
-        setIsSponsored(data.is_sponsoring);
+        setIsSponsored(Boolean(data.events[event.id]?.is_sponsoring));
       } catch (err) {
         setError(err.message);
       } finally {
@@ -43,7 +49,7 @@ export default function SponsorModal({ event, onClose, updateEvents }) {
     };
 
     checkSponsorship();
-  }, [event.id]);
+  }, [event.id, event.isSponsored]);
 
   const handleSponsorship = async () => {
     setIsLoading(true);
@@ -9,6 +9,7 @@ export default function SponsorshipRequests() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [actionSuccess, setActionSuccess] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   
   const userType = localStorage.getItem("user_type");
 
@@ -16,7 +17,7 @@ export default function SponsorshipRequests() {
     fetchSponsorshipRequests();
   }, []);
 
-  const fetchSponsorshipRequests = async () => {
+  const fetchSponsorshipRequests = async (cursor = null) => {
     setLoading(true);
     setError(null);
 
@@ -27,7 +28,8 @@ export default function SponsorshipRequests() {
         return;
       }
 
-      const response = await fetch("http://localhost:5003/stakeholder/sponsorship_requests", {
+      const url = "http://localhost:5003/stakeholder/sponsorship_requests" + (cursor ? `?cursor=${encodeURIComponent(cursor)}` : "");
+      const response = await fetch(url, {
         method: "GET",
         headers: {
           "Content-Type": "application/json",
@@ -40,7 +42,8 @@ export default function SponsorshipRequests() {
       }
 
       const data = await response.json();
-      setRequests(data.requests || []);
+      setRequests((previous) => (cursor ? [...previous, ...(data.requests || [])] : data.requests || []));
+      setNextCursor(data.next_cursor || null);
     } catch (err) {
       setError(err.message);
     } finally {
@@ -224,8 +227,8 @@ export default function SponsorshipRequests() {
                       <div className="flex items-center text-gray-600">
                         <DollarSign className="w-5 h-5 mr-2 text-gray-500" />
                         <span>
-                          {request.event.registration_fee ? 
-                            `$${request.event.registration_fee.toFixed(2)}` : 
+                          {request.event.fee ? 
+                            `$${request.event.fee.toFixed(2)}` : 
                             'Free'}
                         </span>
                       </div>
@@ -265,6 +268,17 @@ export default function SponsorshipRequests() {
             ))}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={() => fetchSponsorshipRequests(nextCursor)}
+              className="bg-gray-800 hover:bg-gray-900 text-white py-2 px-4 rounded-lg transition"
+            >
+              Load more
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Footer */}